@@ -0,0 +1,84 @@
+"""Time the XIRR / TWR engine for a large synthetic portfolio.
+
+Run from the repository root with `python benchmarks/bench_returns.py [holdings]`"""
+
+import datetime
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "src"))
+
+from utils.ledger import Action, Transaction
+from utils.returns import cash_flows, performance, xirr
+from utils.timeseries import PriceMatrix
+from utils.utils import DAYS_PER_YEAR
+
+HOLDINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+YEARS = 7
+TRANSACTIONS_PER_HOLDING = 20
+
+
+def synthetic_prices(rng: np.random.Generator) -> PriceMatrix:
+    dates = np.arange("2018-01-01", f"{2018 + YEARS}-01-01", 7, dtype="datetime64[D]")
+    log_returns = rng.normal(0.001, 0.02, size=(len(dates), HOLDINGS))
+    return PriceMatrix(
+        dates=dates,
+        columns=[f"C{idx}" for idx in range(HOLDINGS)],
+        values=10 * np.exp(np.cumsum(log_returns, axis=0)),
+    )
+
+
+def synthetic_transactions(prices: PriceMatrix):
+    start = datetime.date(2018, 1, 1)
+    days = sorted(
+        random.randrange(YEARS * 365)
+        for _ in range(HOLDINGS * TRANSACTIONS_PER_HOLDING)
+    )
+    for day in days:
+        holding = random.randrange(HOLDINGS)
+        row = min(
+            np.searchsorted(prices.dates, np.datetime64(start, "D") + day),
+            len(prices.dates) - 1,
+        )
+        quantity = random.uniform(1, 100)
+        price = prices.values[row, holding]
+        yield Transaction(
+            start + datetime.timedelta(days=day),
+            Action.BUY,
+            f"C{holding}",
+            quantity,
+            quantity * price,
+        )
+
+
+def timed(label: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<40} {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def main() -> None:
+    random.seed(0)
+    prices = synthetic_prices(np.random.default_rng(0))
+    print(f"{HOLDINGS} holdings, {len(prices.dates)} price dates")
+    flows = timed(
+        "cash_flows (streamed transactions)", cash_flows, synthetic_transactions(prices)
+    )
+    timed("performance (XIRR + TWR)", performance, flows, prices)
+    # Each holding sold at its value on the last price date, as in `performance`
+    columns = prices.column_indices(flows.commodities)
+    last_prices = np.where(columns >= 0, prices.values[-1, np.maximum(columns, 0)], 0)
+    final_value = flows.quantity_change.sum(axis=0) * last_prices
+    dates = np.append(flows.dates, prices.dates[-1])
+    years = (dates - dates[0]).astype(float) / DAYS_PER_YEAR
+    amounts = np.vstack([flows.investor_flows, final_value])
+    timed("xirr only", xirr, amounts.T, years)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""Gunicorn settings for serving the dashboard:
+
+    python3 -m gunicorn -c gunicorn.conf.py wsgi:server
+
+Threaded workers by default, so a slow callback only ties up one thread rather than a whole
+worker. Set MONEY_DASHBOARD_WORKER_CLASS=gevent (with gevent installed) for green threads, or
+=sync for the previous behaviour"""
+
+import os
+
+bind = os.environ.get("MONEY_DASHBOARD_BIND", "unix:money_dashboard.sock")
+umask = 0o007
+pythonpath = "src"
+worker_class = os.environ.get("MONEY_DASHBOARD_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("MONEY_DASHBOARD_WORKERS", 3))
+threads = int(os.environ.get("MONEY_DASHBOARD_THREADS", 4))  # gthread only
+worker_connections = 100  # gevent only
+timeout = 120
@@ -7,33 +7,103 @@ os.environ["REACT_VERSION"] = (
 import dash_mantine_components as dmc
 from dash import Dash
 
-from pages import assets, info, investments, retirement, retirement_model
+from data.ids import ID
+from pages import assets, holdings, info, portfolio, retirement_model
+from utils.compression import register_compression
+from utils.fx import QUOTE_CURRENCY, available_currencies
+from utils.health import mark_ready, register_health
+from utils.http_cache import register_http_caching
+from utils.portfolio import discover_portfolios
+from utils.timeseries import AGGREGATIONS, FREQUENCIES, RAW
+from utils.validation import start_validation
+
+portfolios = discover_portfolios()
+start_validation()
 
 app = Dash(__name__, external_stylesheets=dmc.styles.ALL, title="Finances")
 server = (
     app.server
 )  # server points to the Flask server behind Dash. Gunicorn needs a reference to this
+register_http_caching(app)
+register_compression(app)
+register_health(app)
 app.layout = dmc.MantineProvider(
-    dmc.Tabs(
-        [
-            dmc.TabsList(
-                [
-                    dmc.TabsTab("Assets", value="1"),
-                    dmc.TabsTab("Investments", value="2"),
-                    dmc.TabsTab("Retirement Investments", value="3"),
-                    dmc.TabsTab("Retirement Model", value="4"),
-                    dmc.TabsTab("Info", value="5"),
-                ]
-            ),
-            dmc.TabsPanel(assets.layout(), value="1"),
-            dmc.TabsPanel(investments.layout(), value="2"),
-            dmc.TabsPanel(retirement.create_layout(), value="3"),
-            dmc.TabsPanel(retirement_model.create_layout(), value="4"),
-            dmc.TabsPanel(info.create_layout(), value="5"),
-        ],
-        value="1",
-    )
+    [
+        dmc.Group(
+            [
+                dmc.Select(
+                    data=[
+                        {"value": value, "label": label}
+                        for value, label in FREQUENCIES.items()
+                    ],
+                    value=RAW,
+                    id=ID.RESAMPLE_FREQUENCY,
+                    label="Chart frequency",
+                    size="xs",
+                    w=130,
+                    allowDeselect=False,
+                    persistence=True,
+                    persistence_type="local",
+                ),
+                dmc.Select(
+                    data=[
+                        {"value": value, "label": label}
+                        for value, label in AGGREGATIONS.items()
+                    ],
+                    value="last",
+                    id=ID.RESAMPLE_AGGREGATION,
+                    label="Aggregation",
+                    size="xs",
+                    w=100,
+                    allowDeselect=False,
+                    persistence=True,
+                    persistence_type="local",
+                ),
+                dmc.Select(
+                    data=available_currencies(),
+                    value=QUOTE_CURRENCY,
+                    id=ID.DISPLAY_CURRENCY,
+                    label="Display currency",
+                    size="xs",
+                    w=120,
+                    allowDeselect=False,
+                    persistence=True,
+                    persistence_type="local",
+                ),
+            ],
+            justify="flex-end",
+        ),
+        dmc.Tabs(
+            [
+                dmc.TabsList(
+                    [
+                        dmc.TabsTab("Assets", value="assets"),
+                        *[
+                            dmc.TabsTab(portfolio.portfolio_title(prefix), value=prefix)
+                            for prefix in portfolios
+                        ],
+                        dmc.TabsTab("All Holdings", value=holdings.TAB_VALUE),
+                        dmc.TabsTab("Retirement Model", value="retirement_model"),
+                        dmc.TabsTab("Info", value="info"),
+                    ]
+                ),
+                dmc.TabsPanel(assets.layout(), value="assets"),
+                *[
+                    dmc.TabsPanel(portfolio.create_layout(prefix), value=prefix)
+                    for prefix in portfolios
+                ],
+                dmc.TabsPanel(holdings.create_layout(), value=holdings.TAB_VALUE),
+                dmc.TabsPanel(
+                    retirement_model.create_layout(), value="retirement_model"
+                ),
+                dmc.TabsPanel(info.create_layout(), value="info"),
+            ],
+            id=ID.TABS,
+            value="assets",
+        ),
+    ]
 )
+mark_ready()
 
 if __name__ == "__main__":
     # Debug mode will automatically refresh web pages when changes to files are made
@@ -2,13 +2,43 @@ from enum import StrEnum
 
 
 class ID(StrEnum):
+    TABS = "tabs"
+    DISPLAY_CURRENCY = "display_currency"
+    RESAMPLE_FREQUENCY = "resample_frequency"
+    RESAMPLE_AGGREGATION = "resample_aggregation"
     ASSETS_CHECKBOX_GROUP = "assets_checkbox_group"
     ASSETS_MIX_BAR = "assets_mix_bar"
     ASSETS_OVERVIEW_GRAPH = "assets_overview_graph"
-    INVESTMENTS_PERFORMANCE_TABLE = "investments_performance_table"
-    INVESTMENTS_AVERAGE_RETURNS_TABLE = "investments_average_returns_table"
-    INVESTMENTS_PRICE_GRAPH = "investments_price_graph"
-    INVESTMENTS_PERFORMANCE_BAR_CHART = "investments_performance_bar_chart"
-    INVESTMENTS_PERFORMANCE_RADIO = "investments_performance_radio"
-    INVESTMENTS_MIX_BAR = "investments_mix_bar"
-    INVESTMENTS_MIX_PIE = "investments_mix_pie"
+    ASSETS_VIEW = "assets_view"
+    ASSETS_FORECAST_YEARS = "assets_forecast_years"
+    ASSETS_FORECAST_GRAPH = "assets_forecast_graph"
+    HOLDINGS_PANEL = "holdings_panel"
+    HOLDINGS_TABLE = "holdings_table"
+    HOLDINGS_COMMODITY_BAR = "holdings_commodity_bar"
+    HOLDINGS_TYPE_PIE = "holdings_type_pie"
+    RESULT_CACHE_STATS = "result_cache_stats"
+    DATA_VALIDATION = "data_validation"
+    DATA_VALIDATION_POLL = "data_validation_poll"
+
+
+class PortfolioID(StrEnum):
+    """Components repeated on every portfolio page, see `portfolio_id`"""
+
+    PANEL = "portfolio_panel"
+    PERFORMANCE_TABLE = "portfolio_performance_table"
+    AVERAGE_RETURNS_TABLE = "portfolio_average_returns_table"
+    PRICE_GRAPH = "portfolio_price_graph"
+    PERFORMANCE_BAR_CHART = "portfolio_performance_bar_chart"
+    PERFORMANCE_RADIO = "portfolio_performance_radio"
+    BENCHMARK_SELECT = "portfolio_benchmark_select"
+    MIX_BAR = "portfolio_mix_bar"
+    MIX_PIE = "portfolio_mix_pie"
+    VALUE_GRAPH = "portfolio_value_graph"
+    AS_OF_SLIDER = "portfolio_as_of_slider"
+    AS_OF_PIE = "portfolio_as_of_pie"
+
+
+def portfolio_id(component: PortfolioID, prefix) -> dict:
+    """Pattern-matching id for a component on the page of the portfolio `prefix`. Pass
+    `dash.MATCH` as the prefix to write one callback that serves every portfolio"""
+    return {"type": component.value, "portfolio": prefix}
@@ -1,16 +1,24 @@
 import dash_mantine_components as dmc
+import numpy as np
+import pandas as pd
 import plotly.colors
 import plotly.express as px
-from dash import Input, Output, callback, dash_table, dcc
+import plotly.graph_objects as go
+from dash import Input, Output, callback, dash_table, dcc, no_update
 
 from data.ids import ID
-from utils.dash_format import money_format
+from utils.dash_format import compact_figure, money_format, time_series_figure
+from utils.forecast import PERCENTILES, Forecast, net_worth_forecast
+from utils.history import AssetHistory, asset_history, subset_total
+from utils.timeseries import resample
 from utils.utils import csv_to_dict
 
-assets_time_series = csv_to_dict("assets_time_series.csv")
 latest_values = csv_to_dict("assets_latest_summary.csv")
 asset_names = tuple(latest_values[0].keys())[1:]
 color_scheme = dict(zip(asset_names, plotly.colors.qualitative.G10))
+SELECTED_TOTAL = "Selected total"
+ASSET_VIEWS = {"lines": "Lines", "stacked": "Stacked", "share": "Share of total"}
+DEFAULT_FORECAST_YEARS = 10
 money = money_format(0)
 column_format = [
     {
@@ -50,6 +58,35 @@ def asset_checkboxgroup() -> dmc.CheckboxGroup:
     )
 
 
+def asset_view_control() -> dmc.SegmentedControl:
+    """Show the chosen assets as lines, stacked areas or each one's share of their total"""
+    return dmc.SegmentedControl(
+        data=[{"value": value, "label": label} for value, label in ASSET_VIEWS.items()],
+        value="lines",
+        id=ID.ASSETS_VIEW,
+        size="xs",
+        persistence=True,
+        persistence_type="local",
+    )
+
+
+def forecast_section() -> list:
+    """Forecast of net worth, drawn by `update_forecast`"""
+    return [
+        dmc.NumberInput(
+            label="Forecast years",
+            value=DEFAULT_FORECAST_YEARS,
+            min=1,
+            max=40,
+            step=1,
+            w=130,
+            size="xs",
+            id=ID.ASSETS_FORECAST_YEARS,
+        ),
+        dcc.Graph(figure={}, id=ID.ASSETS_FORECAST_GRAPH),
+    ]
+
+
 def asset_split_barchart() -> dcc.Graph:
     """Bar chart showing the current split of asset types"""
     assets_to_display = [
@@ -89,9 +126,12 @@ def layout() -> list:
                 dmc.Grid(
                     [
                         dmc.GridCol([asset_table()], span=11),
-                        dmc.GridCol([asset_checkboxgroup()], span=2),
+                        dmc.GridCol(
+                            [asset_checkboxgroup(), asset_view_control()], span=2
+                        ),
                         dmc.GridCol([asset_graph()], span=7),
                         dmc.GridCol([asset_split_barchart()], span=2),
+                        dmc.GridCol(forecast_section(), span=9),
                     ]
                 ),
             ],
@@ -106,9 +146,120 @@ def layout() -> list:
         component_id=ID.ASSETS_CHECKBOX_GROUP,
         component_property="value",
     ),
+    Input(ID.ASSETS_VIEW, "value"),
+    Input(ID.RESAMPLE_FREQUENCY, "value"),
+    Input(ID.RESAMPLE_AGGREGATION, "value"),
+)
+def update_graph(col_chosen, view, frequency, how) -> go.Figure:
+    """Callback to update the asset chart when the check boxes, view or chart frequency are
+    changed. The total of the chosen assets comes from `subset_total`, cached for each
+    combination of check boxes"""
+    history = asset_history()
+    if view in ("stacked", "share"):
+        fig = area_figure(history, col_chosen, view, frequency, how)
+    else:
+        fig = lines_figure(history, col_chosen, frequency, how)
+    return compact_figure(fig, precision=3 if view == "share" else 0)
+
+
+def lines_figure(
+    history: AssetHistory, col_chosen: list[str], frequency: str, how: str
+) -> go.Figure:
+    """Lines of the chosen columns, and of their total if more than one asset (but not all of
+    them, which is the exported `Total`) is chosen. Only the chosen columns are copied out of
+    the history"""
+    chosen = [col for col in col_chosen if col in history.columns]
+    values = history.values[:, [history.columns.index(col) for col in chosen]]
+    selection = subset_total(history.subset_mask(col_chosen))
+    if 1 < len(selection.columns) < len(history.base_columns):
+        chosen = [*chosen, SELECTED_TOTAL]
+        values = np.column_stack([values, selection.total])
+    return time_series_figure(
+        history.dates,
+        values,
+        chosen,
+        frequency,
+        how,
+        colors={**color_scheme, SELECTED_TOTAL: "black"},
+    )
+
+
+def area_figure(
+    history: AssetHistory, col_chosen: list[str], view: str, frequency: str, how: str
+) -> go.Figure:
+    """Stacked areas of the chosen assets (leaving out the exported totals, which would count
+    them twice), in value or as shares of their total"""
+    selection = subset_total(history.subset_mask(col_chosen))
+    if view == "share":
+        values = selection.share
+    else:
+        values = history.values[
+            :, [history.columns.index(col) for col in selection.columns]
+        ]
+    # Candlesticks can't be stacked
+    dates, values = resample(
+        history.dates, values, frequency, "mean" if how == "mean" else "last"
+    )
+    fig = px.area(
+        pd.DataFrame(
+            values, index=pd.Index(dates, name="date"), columns=selection.columns
+        ),
+        color_discrete_map=color_scheme,
+    )
+    if view == "share":
+        fig.update_layout(yaxis_tickformat=".0%", yaxis_title="share of selected total")
+    return fig
+
+
+@callback(
+    Output(ID.ASSETS_FORECAST_GRAPH, "figure"),
+    Input(ID.ASSETS_FORECAST_YEARS, "value"),
 )
-def update_graph(col_chosen) -> plotly.graph_objs.Figure:
-    """Callback to update line chart when the check boxes are interacted with"""
-    return px.line(
-        assets_time_series, x="date", y=col_chosen, color_discrete_map=color_scheme
+def update_forecast(years) -> go.Figure:
+    """Callback to redraw the net worth forecast for a new horizon"""
+    if not isinstance(years, (int, float)) or years < 1:
+        return no_update
+    return compact_figure(
+        forecast_figure(asset_history(), net_worth_forecast(int(years))), precision=0
+    )
+
+
+def forecast_figure(history: AssetHistory, forecast: Forecast) -> go.Figure:
+    """The history of each asset class continued by its median forecast, stacked, with the
+    range of the forecast total"""
+    order = np.argsort(history.dates)
+    dates = np.concatenate([history.dates[order], forecast.dates[1:]])
+    fig = go.Figure()
+    for idx, col in enumerate(forecast.fit.columns):
+        fig.add_scatter(
+            x=dates,
+            y=np.concatenate([history.column(col)[order], forecast.median[1:, idx]]),
+            name=f"{col} ({forecast.fit.describe(col)})",
+            stackgroup="assets",
+            line={"width": 0.5, "color": color_scheme.get(col)},
+        )
+    for percentile, total in zip(PERCENTILES, forecast.total):
+        fig.add_scatter(
+            x=forecast.dates,
+            y=total,
+            name=f"Total, {percentile}th percentile",
+            line={"dash": "dot" if percentile == 50 else "dash", "color": "black"},
+        )
+    start = str(forecast.dates[0])
+    fig.update_layout(
+        title="Net Worth Forecast (median of each asset class)",
+        yaxis_title="value (£)",
+        shapes=[
+            {
+                "type": "line",
+                "xref": "x",
+                "yref": "paper",
+                "x0": start,
+                "x1": start,
+                "y0": 0,
+                "y1": 1,
+                "line": {"dash": "dot", "color": "grey"},
+            }
+        ],
     )
+    return fig
@@ -0,0 +1,138 @@
+import dash_mantine_components as dmc
+import plotly.express as px
+from dash import Input, Output, State, callback, dash_table, dcc, html, no_update
+
+from data.ids import ID
+from utils.dash_format import (
+    conditional_format_percent_change,
+    money_format,
+    number_format,
+    percent_format,
+    percent_format_pos,
+)
+from utils.holdings import Holdings, holdings_summary
+from utils.utils import RETURNS_YEARS
+
+TAB_VALUE = "holdings"
+
+
+def create_layout() -> html.Div:
+    """Placeholder for the All Holdings tab, filled in by `render_panel` when first opened"""
+    return html.Div([], id=ID.HOLDINGS_PANEL)
+
+
+def panel_contents(holdings: Holdings) -> list:
+    """Overall layout of the All Holdings tab"""
+    return [
+        dmc.Container(
+            [
+                dmc.Title("All Holdings", order=3),
+                dmc.Grid(
+                    [
+                        dmc.GridCol(commodity_bar(holdings), span=7),
+                        dmc.GridCol(type_pie(holdings), span=5),
+                        dmc.GridCol(holdings_table(holdings), span=11),
+                    ]
+                ),
+            ],
+            fluid=True,
+        ),
+    ]
+
+
+def holdings_table(holdings: Holdings) -> dash_table.DataTable:
+    """Table of the total exposure to each commodity across all portfolios"""
+    returns = [
+        {
+            "id": f"annualised{y}_percent",
+            "name": f"{y} Year Annualised",
+            "type": "numeric",
+            "format": percent_format_pos(1),
+        }
+        for y in reversed(RETURNS_YEARS)
+    ]
+    return dash_table.DataTable(
+        data=holdings.by_commodity,
+        columns=[
+            {"id": "commodity", "name": "Commodity"},
+            {"id": "commodity_name", "name": "Name"},
+            {"id": "commodity_type", "name": "Type"},
+            {"id": "portfolios", "name": "Held In"},
+            *returns,
+            {
+                "id": "quantity",
+                "name": "Quantity",
+                "type": "numeric",
+                "format": number_format(1),
+            },
+            {
+                "id": "value",
+                "name": "Value",
+                "type": "numeric",
+                "format": money_format(0),
+            },
+            {
+                "id": "percent_value",
+                "name": "Value (%)",
+                "type": "numeric",
+                "format": percent_format(1),
+            },
+        ],
+        id=ID.HOLDINGS_TABLE,
+        page_size=50,
+        sort_action="native",
+        style_table={"overflowX": "auto"},
+        style_data_conditional=conditional_format_percent_change(
+            [f"annualised{y}_percent" for y in RETURNS_YEARS]
+        ),
+        style_cell={
+            "height": "auto",
+            # all three widths are needed
+            "minWidth": "70px",
+            "width": "70px",
+            "maxWidth": "180px",
+            "whiteSpace": "normal",
+        },
+    )
+
+
+def commodity_bar(holdings: Holdings) -> dcc.Graph:
+    """Horizontal bar chart of the combined value of each commodity"""
+    return dcc.Graph(
+        figure=px.bar(
+            holdings.by_commodity[::-1],
+            x="value",
+            y="commodity",
+            color="commodity_type",
+            title="Total Exposure by Commodity",
+            orientation="h",
+            hover_data=["commodity_name", "portfolios"],
+        ),
+        id=ID.HOLDINGS_COMMODITY_BAR,
+    )
+
+
+def type_pie(holdings: Holdings) -> dcc.Graph:
+    """Pie chart of the combined mix of investment types"""
+    return dcc.Graph(
+        figure=px.pie(
+            holdings.by_type,
+            names="commodity_type",
+            values="value",
+            title=f"Combined mix. Total value = £{holdings.total_value:,.0f}",
+            hole=0.3,
+        ),
+        id=ID.HOLDINGS_TYPE_PIE,
+    )
+
+
+@callback(
+    Output(ID.HOLDINGS_PANEL, "children"),
+    Input(ID.TABS, "value"),
+    State(ID.HOLDINGS_PANEL, "children"),
+)
+def render_panel(tab: str, children: list) -> list:
+    """Callback to build the All Holdings tab the first time it is opened"""
+    if tab != TAB_VALUE or children:
+        return no_update
+    return panel_contents(holdings_summary())
@@ -2,11 +2,15 @@ import json
 import platform
 
 import dash_mantine_components as dmc
-from dash import html
+from dash import Input, Output, callback, dcc, html, no_update
 
+from data.ids import ID
+from utils.result_cache import RESULT_CACHE
 from utils.utils import DATA_PATH
+from utils.validation import ValidationReport, latest_report
 
 DATA_OUTPUT_FORMAT = {"font-family": "monospace", "color": "gray", "fontSize": 14}
+ISSUE_COLOURS = {True: "red", False: "darkorange"}
 
 with open(DATA_PATH / "update_log.json") as f:
     update_data = json.load(f)
@@ -32,6 +36,19 @@ def create_layout():
                             span=11,
                         ),
                         dmc.GridCol(data_file_table(), span=3),
+                        dmc.GridCol(html.Div(id=ID.RESULT_CACHE_STATS), span=8),
+                        dmc.GridCol(
+                            [
+                                dmc.Title("Data checks", order=5),
+                                html.Div(id=ID.DATA_VALIDATION),
+                                dcc.Interval(
+                                    id=ID.DATA_VALIDATION_POLL,
+                                    interval=2_000,
+                                    disabled=True,
+                                ),
+                            ],
+                            span=11,
+                        ),
                     ]
                 ),
             ],
@@ -78,5 +95,64 @@ def data_update_time():
     return output_format(f"Date last updated: {update_date}")
 
 
+def result_cache_stats() -> list:
+    """Size of the on-disk result cache, and how well it is serving this worker"""
+    if not RESULT_CACHE.enabled:
+        return [output_format("Result cache: off")]
+    stats = RESULT_CACHE.stats()
+    size_mb, max_mb = stats.size_bytes / 1024**2, stats.max_bytes / 1024**2
+    lookups = f"This worker: {stats.hits} hits, {stats.misses} misses"
+    if stats.hits + stats.misses:
+        lookups += f" (hit rate {stats.hit_rate:.0%})"
+    return [
+        output_format(f"Result cache: {stats.path}"),
+        output_format(f"Entries: {stats.entries}, {size_mb:,.1f} of {max_mb:,.0f} MB"),
+        output_format(f"{lookups}, {stats.evictions} evicted"),
+    ]
+
+
+@callback(Output(ID.RESULT_CACHE_STATS, "children"), Input(ID.TABS, "value"))
+def update_result_cache_stats(tab: str) -> list:
+    """Callback to refresh the result cache statistics whenever the Info tab is opened"""
+    if tab != "info":
+        return no_update
+    return result_cache_stats()
+
+
+def validation_results(report: ValidationReport | None) -> list:
+    """Problems found in the data files, errors first"""
+    if report is None:
+        return [output_format("Checking the data files...")]
+    if not report.issues:
+        return [output_format(f"All {len(report.files)} data files passed")]
+    rows = [
+        html.Tr(
+            [
+                html.Td("error" if issue.error else "warning"),
+                html.Td(issue.file),
+                html.Td(issue.message),
+            ],
+            style={**DATA_OUTPUT_FORMAT, "color": ISSUE_COLOURS[issue.error]},
+        )
+        for issue in sorted(report.issues, key=lambda issue: not issue.error)
+    ]
+    return [html.Table(rows)]
+
+
+@callback(
+    Output(ID.DATA_VALIDATION, "children"),
+    Output(ID.DATA_VALIDATION_POLL, "disabled"),
+    Input(ID.TABS, "value"),
+    Input(ID.DATA_VALIDATION_POLL, "n_intervals"),
+)
+def update_validation(tab: str, n_intervals) -> tuple[list, bool]:
+    """Callback to show the results of the data checks on the Info tab. The checks run in the
+    background, so poll until the first results are ready"""
+    if tab != "info":
+        return no_update, True
+    report = latest_report()
+    return validation_results(report), report is not None
+
+
 def output_format(text: str):
     return html.P(text, style=DATA_OUTPUT_FORMAT)
@@ -0,0 +1,716 @@
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+import dash_mantine_components as dmc
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects
+from dash import (
+    MATCH,
+    Input,
+    Output,
+    Patch,
+    State,
+    callback,
+    ctx,
+    dash_table,
+    dcc,
+    html,
+    no_update,
+)
+
+from data.ids import ID, PortfolioID, portfolio_id
+from utils.benchmark import (
+    RelativePerformance,
+    available_benchmarks,
+    portfolio_relative_performance,
+)
+from utils.dash_format import (
+    compact_figure,
+    conditional_format_percent_change,
+    money_format,
+    number_format,
+    percent_format,
+    percent_format_pos,
+    time_series_figure,
+)
+from utils.fx import convert_summary, converted_prices, currency_symbol
+from utils.portfolio import Portfolio, load_portfolio
+from utils.returns import PORTFOLIO, Performance, portfolio_performance
+from utils.table_query import TableIndex
+from utils.utils import RETURNS_YEARS, TableData, data_generation, sort_data
+from utils.valuation import Valuation, portfolio_valuation
+
+type FormattingData = list[dict[str, Any]]
+
+PORTFOLIO_TITLES = {
+    "investments": "Investments",
+    "retirement": "Retirement Investments",
+}
+
+
+def portfolio_title(prefix: str) -> str:
+    """Display name of a portfolio, e.g. `sipp_jane` -> `Sipp Jane`"""
+    return PORTFOLIO_TITLES.get(prefix, prefix.replace("_", " ").title())
+
+
+def create_layout(prefix: str) -> html.Div:
+    """Placeholder for a portfolio tab. The contents are only built, and the data only loaded,
+    when the tab is first opened (see `render_panel`)"""
+    return html.Div([], id=portfolio_id(PortfolioID.PANEL, prefix))
+
+
+def panel_contents(portfolio: Portfolio) -> list:
+    """Overall layout of a portfolio tab"""
+    prefix = portfolio.prefix
+    valuation = portfolio_valuation(prefix)
+    return [
+        dmc.Container(
+            [
+                dmc.Title(portfolio_title(prefix), order=3),
+                dmc.Grid(
+                    [
+                        dmc.GridCol(
+                            [
+                                price_graph(prefix),
+                                average_returns_table(portfolio),
+                            ],
+                            span=7,
+                        ),
+                        dmc.GridCol(performance_bar_chart(prefix), span=5),
+                        dmc.GridCol(performance_radiogroup(prefix), span=7),
+                        dmc.GridCol(benchmark_select(portfolio), span=4),
+                        dmc.GridCol(performance_table(portfolio), span=11),
+                        dmc.GridCol(mix_bar(portfolio), span=7),
+                        dmc.GridCol(mix_pie(prefix), span=5),
+                        dmc.GridCol(value_graph(prefix), span=7),
+                        dmc.GridCol(as_of_pie(prefix), span=5),
+                        dmc.GridCol(as_of_slider(prefix, valuation), span=11),
+                    ]
+                ),
+            ],
+            fluid=True,
+        ),
+    ]
+
+
+def performance_table(portfolio: Portfolio) -> dash_table.DataTable:
+    """The main table that lists each commodity and associated prices / values / changes. Paged,
+    sorted and filtered on the server, so only the visible page is sent"""
+    return dash_table.DataTable(
+        data=[],
+        columns=performance_columns(),
+        id=portfolio_id(PortfolioID.PERFORMANCE_TABLE, portfolio.prefix),
+        row_selectable="multi",
+        selected_rows=[],
+        page_action="custom",
+        page_current=0,
+        page_size=50,
+        sort_action="custom",
+        sort_mode="single",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
+        style_table={"overflowX": "auto"},
+        style_data_conditional=conditional_format_percent_change(
+            [f"annualised{y}_percent" for y in RETURNS_YEARS]
+            + ["xirr", "twr", "alpha", "excess_return"]
+        ),
+        style_cell={
+            "height": "auto",
+            # all three widths are needed
+            "minWidth": "70px",
+            "width": "70px",
+            "maxWidth": "180px",
+            "whiteSpace": "normal",
+        },
+        tooltip_delay=0,
+        css=[
+            {
+                "selector": ".dash-table-tooltip",
+                "rule": "background-color: grey; font-family: monospace; color: white",
+            }
+        ],
+    )
+
+
+def update_tooltips(summary: TableData) -> FormattingData:
+    """Provide tooltips for the performance table, in the same order as the table rows"""
+    return [
+        {
+            key: {"value": f"({row['commodity']})\n{row['commodity_name']}"}
+            for key, value in row.items()
+        }
+        for row in summary
+    ]
+
+
+def performance_columns(symbol: str = "£") -> FormattingData:
+    """Returns a list of the columns for the datatable with the formatting information for each"""
+    commodity = {"id": "commodity", "name": "Commodity"}
+    latest = {
+        "id": "latest_price",
+        "name": "Latest Price",
+        "type": "numeric",
+        "format": money_format(2, symbol),
+    }
+    quantity = {
+        "id": "quantity",
+        "name": "Quantity",
+        "type": "numeric",
+        "format": number_format(1),
+    }
+    identifier = {"id": "commodity_id", "name": "ISIN"}
+    ocf = {"id": "commodity_ocf", "name": "ocf"}
+    value = {
+        "id": "value",
+        "name": "Value",
+        "type": "numeric",
+        "format": money_format(0, symbol),
+    }
+    percent_value = {
+        "id": "percent_value",
+        "name": "Value (%)",
+        "type": "numeric",
+        "format": percent_format(1),
+    }
+    returns = []
+    for y in reversed(RETURNS_YEARS):
+        returns.extend(
+            [
+                {
+                    "id": f"annualised{y}_percent",
+                    "name": f"{y} Year Annualised",
+                    "type": "numeric",
+                    "format": percent_format_pos(1),
+                },
+            ]
+        )
+    return [
+        commodity,
+        latest,
+        identifier,
+        ocf,
+        *returns,
+        *money_weighted_columns(),
+        quantity,
+        value,
+        percent_value,
+    ]
+
+
+def average_returns_table(portfolio: Portfolio) -> dash_table.DataTable:
+    """Display the average returns for the whole portfolio"""
+    return dash_table.DataTable(
+        data=add_performance(
+            portfolio.avg_returns,
+            portfolio_performance(portfolio.prefix),
+            key=lambda row: PORTFOLIO,
+        ),
+        columns=average_returns_columns() + money_weighted_columns(),
+        id=portfolio_id(PortfolioID.AVERAGE_RETURNS_TABLE, portfolio.prefix),
+        page_size=2,
+        style_table={"overflowX": "auto"},
+        style_data_conditional=conditional_format_percent_change(
+            [f"year{y}" for y in RETURNS_YEARS] + ["xirr", "twr"]
+        ),
+        style_cell={
+            "height": "auto",
+            # all three widths are needed
+            "minWidth": "70px",
+            "width": "70px",
+            "maxWidth": "70px",
+            "whiteSpace": "normal",
+        },
+    )
+
+
+def average_returns_columns() -> FormattingData:
+    returns = []
+    for y in reversed(RETURNS_YEARS):
+        returns.extend(
+            [
+                {
+                    "id": f"year{y}",
+                    "name": f"{y} Year Returns",
+                    "type": "numeric",
+                    "format": percent_format_pos(1),
+                },
+            ]
+        )
+    return returns
+
+
+def money_weighted_columns() -> FormattingData:
+    """Columns for the returns calculated from the transaction ledger"""
+    return [
+        {
+            "id": "xirr",
+            "name": "Money-Weighted (XIRR)",
+            "type": "numeric",
+            "format": percent_format_pos(1),
+        },
+        {
+            "id": "twr",
+            "name": "Time-Weighted Annualised",
+            "type": "numeric",
+            "format": percent_format_pos(1),
+        },
+    ]
+
+
+def relative_columns(benchmark: str, years: int) -> FormattingData:
+    """Columns for the performance against a benchmark"""
+    return [
+        {
+            "id": "alpha",
+            "name": f"Alpha vs {benchmark} ({years}y)",
+            "type": "numeric",
+            "format": percent_format_pos(1),
+        },
+        {
+            "id": "beta",
+            "name": "Beta",
+            "type": "numeric",
+            "format": number_format(2),
+        },
+        {
+            "id": "tracking_error",
+            "name": "Tracking Error",
+            "type": "numeric",
+            "format": percent_format(1),
+        },
+        {
+            "id": "excess_return",
+            "name": "Excess Return (annualised)",
+            "type": "numeric",
+            "format": percent_format_pos(1),
+        },
+    ]
+
+
+def add_relative_performance(
+    rows: TableData, relative: RelativePerformance
+) -> TableData:
+    """Copy of `rows` with the statistics against the benchmark added"""
+    stats = relative.as_rows()
+    return [{**row, **stats.get(row["commodity"], {})} for row in rows]
+
+
+def performance_index(
+    prefix: str, currency: str, benchmark: str | None, years: int
+) -> TableIndex:
+    """Rows of the performance table in `currency`, with the statistics against `benchmark` over
+    `years` if one is chosen. Rebuilt only when the data is updated"""
+    return _performance_index(
+        prefix, currency, benchmark, years if benchmark else None, data_generation()
+    )
+
+
+@lru_cache(maxsize=32)
+def _performance_index(
+    prefix: str,
+    currency: str,
+    benchmark: str | None,
+    years: int | None,
+    generation: str,
+) -> TableIndex:
+    summary = add_performance(
+        convert_summary(load_portfolio(prefix).summary, currency),
+        portfolio_performance(prefix),
+    )
+    if benchmark:
+        summary = add_relative_performance(
+            summary, portfolio_relative_performance(prefix, benchmark, years)
+        )
+    # Rows are identified by commodity, so selections survive re-sorting and paging
+    return TableIndex([{**row, "id": row["commodity"]} for row in summary])
+
+
+def add_performance(
+    rows: TableData,
+    performance: Performance | None,
+    key: Callable[[dict], str] = lambda row: row["commodity"],
+) -> TableData:
+    """Copy of `rows` with the XIRR and TWR added, blank if the portfolio has no ledger"""
+    if performance is None:
+        return rows
+    return [
+        {
+            **row,
+            "xirr": performance.xirr.get(key(row), float("nan")),
+            "twr": performance.twr.get(key(row), float("nan")),
+        }
+        for row in rows
+    ]
+
+
+def price_graph(prefix: str) -> dcc.Graph:
+    """Line graph of individual stock / fund performance, drawn by `update_graph`"""
+    return dcc.Graph(figure={}, id=portfolio_id(PortfolioID.PRICE_GRAPH, prefix))
+
+
+def performance_bar_chart(prefix: str) -> dcc.Graph:
+    """Horizontal bar chart of performance comparisons, drawn by `radio_button_actions`"""
+    return dcc.Graph(
+        figure={}, id=portfolio_id(PortfolioID.PERFORMANCE_BAR_CHART, prefix)
+    )
+
+
+def update_bar_chart(summary: TableData, col: str) -> plotly.graph_objects.Figure:
+    """Returns a new Figure object for the performance bar chart based on either the
+    value or the percentage change of the investments"""
+    sorted_summary = sort_data(summary, column=col, sort_ascending=True)
+    if col == "value":
+        return px.bar(
+            sorted_summary,
+            x="value",
+            y="commodity",
+            title="Current Value of Investments",
+            orientation="h",
+        )
+    else:
+        year = col.removeprefix("annualised").removesuffix("_percent")
+        fig = px.bar(
+            sorted_summary,
+            x=col,
+            y="commodity",
+            title=f"{year} Year Change in Value (annualised %)",
+            orientation="h",
+        )
+        fig.update_xaxes(tickformat=".0%")
+    return fig
+
+
+def mix_bar(portfolio: Portfolio) -> dcc.Graph:
+    """Compares the relative values of different types of investment, compared to an ideal mixture"""
+    return dcc.Graph(
+        figure=px.bar(
+            portfolio.grouped_assets,
+            x="commodity_type",
+            y=["type_value", "ideal_mix"],
+            title="Investment Mix - Current v. Ideal",
+            barmode="group",
+        ),
+        id=portfolio_id(PortfolioID.MIX_BAR, portfolio.prefix),
+    )
+
+
+def mix_pie(prefix: str) -> dcc.Graph:
+    """Pie chart of the current mix of investment types. Drawn by `update_mix_pie`"""
+    return dcc.Graph(figure={}, id=portfolio_id(PortfolioID.MIX_PIE, prefix))
+
+
+def mix_pie_figure(portfolio: Portfolio, currency: str) -> plotly.graph_objects.Figure:
+    # The values are all exported in the same currency, so are converted by the same factor
+    total = sum(row["value"] for row in convert_summary(portfolio.summary, currency))
+    scale = total / portfolio.total_value if portfolio.total_value else 1.0
+    return px.pie(
+        [
+            {**row, "type_value": row["type_value"] * scale}
+            for row in portfolio.grouped_assets
+        ],
+        names="commodity_type",
+        values="type_value",
+        title=f"Current mix. Total value = {currency_symbol(currency)}{total:,.0f}",
+        hole=0.3,
+        hover_data="commodities",
+    )
+
+
+def value_graph(prefix: str) -> dcc.Graph:
+    """Stacked area chart of the value of the current holdings over time, by investment type.
+    Drawn by `update_as_of`"""
+    return dcc.Graph(figure={}, id=portfolio_id(PortfolioID.VALUE_GRAPH, prefix))
+
+
+def value_figure(
+    valuation: Valuation, idx: int, currency: str
+) -> plotly.graph_objects.Figure:
+    fig = px.area(
+        pd.DataFrame(valuation.by_type, index=valuation.dates, columns=valuation.types),
+        title=f"Value of Current Holdings Over Time ({currency})",
+        labels={"index": "date", "value": "value", "variable": "commodity_type"},
+    )
+    fig.update_layout(shapes=[as_of_marker(valuation.dates[idx])])
+    return compact_figure(fig, precision=0)
+
+
+def as_of_marker(date) -> dict:
+    """Vertical line marking the date selected with the slider"""
+    return {
+        "type": "line",
+        "xref": "x",
+        "yref": "paper",
+        "x0": str(date),
+        "x1": str(date),
+        "y0": 0,
+        "y1": 1,
+        "line": {"dash": "dot", "color": "grey"},
+    }
+
+
+def as_of_pie(prefix: str) -> dcc.Graph:
+    """Pie chart of the investment mix on the date selected with the slider, drawn by
+    `update_as_of`"""
+    return dcc.Graph(figure={}, id=portfolio_id(PortfolioID.AS_OF_PIE, prefix))
+
+
+def as_of_pie_figure(
+    valuation: Valuation, idx: int, currency: str
+) -> plotly.graph_objects.Figure:
+    values = valuation.as_of(idx)
+    return px.pie(
+        names=list(values.keys()),
+        values=list(values.values()),
+        title=(
+            f"Mix on {valuation.dates[idx]}. "
+            f"Total value = {currency_symbol(currency)}{valuation.total[idx]:,.0f}"
+        ),
+        hole=0.3,
+    )
+
+
+def as_of_slider(prefix: str, valuation: Valuation) -> dcc.Slider:
+    """Slider to select the date the holdings are valued at, marked at the start of each year"""
+    years = valuation.dates.astype("datetime64[Y]")
+    year_starts = np.flatnonzero(np.diff(years, prepend=years[0] - 1))
+    return dcc.Slider(
+        min=0,
+        max=len(valuation.dates) - 1,
+        step=1,
+        value=len(valuation.dates) - 1,
+        marks={int(idx): str(years[idx]) for idx in year_starts},
+        updatemode="drag",
+        id=portfolio_id(PortfolioID.AS_OF_SLIDER, prefix),
+    )
+
+
+def performance_radiogroup(prefix: str) -> dmc.RadioGroup:
+    """Group of radio buttons for changing the ordering of the datatable and graphs"""
+    return dmc.RadioGroup(
+        children=dmc.Group(performance_radios()),
+        id=portfolio_id(PortfolioID.PERFORMANCE_RADIO, prefix),
+        value=f"radio_year{RETURNS_YEARS[len(RETURNS_YEARS) // 2]}_percent",
+        size="sm",
+        persistence_type="local",
+        persistence=True,
+    )
+
+
+def benchmark_select(portfolio: Portfolio) -> dmc.Select:
+    """Index to compare the holdings against, over the horizon chosen with the radio buttons"""
+    return dmc.Select(
+        data=available_benchmarks(portfolio.price_matrix),
+        value=None,
+        placeholder="Compare with benchmark",
+        clearable=True,
+        size="sm",
+        id=portfolio_id(PortfolioID.BENCHMARK_SELECT, portfolio.prefix),
+        persistence=True,
+        persistence_type="local",
+    )
+
+
+def performance_radios() -> list[dmc.Radio]:
+    """Return a list of radio buttons that form part of the radio group"""
+    radios = [
+        dmc.Radio(label=f"{y} Year Returns", value=f"radio_year{y}_percent")
+        for y in reversed(RETURNS_YEARS)
+    ]
+    radios.extend([dmc.Radio(label="Current Value", value="radio_value")])
+    return radios
+
+
+def sort_column(radio_value: str) -> str:
+    """The summary column that the table and graphs are sorted by for a radio button value"""
+    if radio_value == "radio_value":
+        return "value"
+    year = radio_value.removeprefix("radio_year").removesuffix("_percent")
+    return f"annualised{year}_percent"
+
+
+def horizon_years(radio_value: str) -> int:
+    """Years to compare against a benchmark over: those of the selected returns, or the longest
+    when sorting by value"""
+    if radio_value == "radio_value":
+        return max(RETURNS_YEARS)
+    return int(radio_value.removeprefix("radio_year").removesuffix("_percent"))
+
+
+@callback(
+    Output(portfolio_id(PortfolioID.PANEL, MATCH), "children"),
+    Input(ID.TABS, "value"),
+    State(portfolio_id(PortfolioID.PANEL, MATCH), "id"),
+    State(portfolio_id(PortfolioID.PANEL, MATCH), "children"),
+)
+def render_panel(tab: str, panel_id: dict, children: list) -> list:
+    """Callback to build a portfolio tab the first time it is opened"""
+    prefix = panel_id["portfolio"]
+    if tab != prefix or children:
+        return no_update
+    return panel_contents(load_portfolio(prefix))
+
+
+@callback(
+    Output(portfolio_id(PortfolioID.PRICE_GRAPH, MATCH), "figure"),
+    Input(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "active_cell"),
+    Input(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "selected_row_ids"),
+    Input(portfolio_id(PortfolioID.PERFORMANCE_RADIO, MATCH), "value"),
+    Input(ID.DISPLAY_CURRENCY, "value"),
+    Input(ID.RESAMPLE_FREQUENCY, "value"),
+    Input(ID.RESAMPLE_AGGREGATION, "value"),
+    Input(portfolio_id(PortfolioID.BENCHMARK_SELECT, MATCH), "value"),
+    State(portfolio_id(PortfolioID.PERFORMANCE_RADIO, MATCH), "id"),
+)
+def update_graph(
+    active_cell, selected_ids, sort_col, currency, frequency, how, benchmark, radio_id
+) -> plotly.graph_objects.Figure:
+    """Callback to update the prices graph based on the selection of the radio
+    buttons or selecting rows in the main table. Several selected rows, or a benchmark, are
+    overlaid rebased to 100 from the first date they all have prices (and, with a benchmark,
+    from the start of the horizon). The graph is empty when none of them have prices"""
+    prefix = radio_id["portfolio"]
+    portfolio = load_portfolio(prefix)
+    if selected_ids:
+        chosen = list(selected_ids)
+    elif active_cell and active_cell.get("row_id"):
+        chosen = [active_cell["row_id"]]
+    else:
+        chosen = [row["commodity"] for row in portfolio.summary[:1]]
+    prices = converted_prices(prefix, currency)
+    chosen = [commodity for commodity in chosen if commodity in prices.columns]
+    if not chosen:
+        # Nothing selected has prices, e.g. a holding with no price history
+        return {}
+    names = {row["commodity"]: row["commodity_name"] for row in portfolio.summary}
+    title = names[chosen[0]] if len(chosen) == 1 else "Selected holdings"
+    if len(chosen) == 1 and not benchmark:
+        fig = time_series_figure(
+            prices.dates,
+            prices.values[:, prices.column_indices(chosen)],
+            chosen,
+            frequency,
+            how,
+        )
+        fig.update_layout(title=title, yaxis_title=f"{chosen[0]} ({currency})")
+        return compact_figure(fig, precision=4)
+
+    columns = chosen + [benchmark] if benchmark else chosen
+    start = 0
+    if benchmark:
+        years = horizon_years(sort_col)
+        start = prices.horizons.start(years)
+        title += f" vs {benchmark}, {years} years"
+    dates, values = prices.rebased(prices.column_indices(columns).tolist(), start)
+    fig = time_series_figure(dates, values, columns, frequency, how)
+    fig.update_layout(title=title, yaxis_title="Rebased (start = 100)")
+    return compact_figure(fig, precision=2)
+
+
+@callback(
+    Output(portfolio_id(PortfolioID.PERFORMANCE_BAR_CHART, MATCH), "figure"),
+    Output(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "columns"),
+    Output(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "sort_by"),
+    Input(portfolio_id(PortfolioID.PERFORMANCE_RADIO, MATCH), "value"),
+    Input(ID.DISPLAY_CURRENCY, "value"),
+    Input(portfolio_id(PortfolioID.BENCHMARK_SELECT, MATCH), "value"),
+    State(portfolio_id(PortfolioID.PERFORMANCE_RADIO, MATCH), "id"),
+)
+def radio_button_actions(
+    sort_col, currency, benchmark, radio_id
+) -> tuple[plotly.graph_objects.Figure, FormattingData, list[dict]]:
+    """Callback to update the bar chart and the table columns based on the selection of the radio
+    buttons, the display currency and the benchmark. The radio buttons set the table's sort,
+    which fetches the first page of rows through `update_table_page`"""
+    prefix = radio_id["portfolio"]
+    columns = performance_columns(currency_symbol(currency))
+    years = horizon_years(sort_col)
+    if benchmark:
+        columns += relative_columns(benchmark, years)
+    col = sort_column(sort_col)
+    index = performance_index(prefix, currency, benchmark, years)
+    return (
+        update_bar_chart(index.rows, col),
+        columns,
+        [{"column_id": col, "direction": "desc"}],
+    )
+
+
+@callback(
+    Output(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "data"),
+    Output(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "tooltip_data"),
+    Output(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "page_count"),
+    Output(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "page_current"),
+    Input(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "page_current"),
+    Input(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "page_size"),
+    Input(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "sort_by"),
+    Input(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "filter_query"),
+    State(portfolio_id(PortfolioID.PERFORMANCE_RADIO, MATCH), "value"),
+    State(ID.DISPLAY_CURRENCY, "value"),
+    State(portfolio_id(PortfolioID.BENCHMARK_SELECT, MATCH), "value"),
+    State(portfolio_id(PortfolioID.PERFORMANCE_TABLE, MATCH), "id"),
+)
+def update_table_page(
+    page_current,
+    page_size,
+    sort_by,
+    filter_query,
+    sort_col,
+    currency,
+    benchmark,
+    table_id,
+) -> tuple[TableData, FormattingData, int, int]:
+    """Callback to send the visible page of the performance table, and only its tooltips. The
+    currency, benchmark and radio buttons arrive as State, as changing any of them updates the
+    columns and sort through `radio_button_actions` first. A new sort or filter goes back to
+    the first page, and with no sort the rows are in the exported order"""
+    new_query = any(
+        prop.endswith((".sort_by", ".filter_query")) for prop in ctx.triggered_prop_ids
+    )
+    page_current = 0 if new_query else page_current or 0
+    index = performance_index(
+        table_id["portfolio"], currency, benchmark, horizon_years(sort_col)
+    )
+    page = index.query(sort_by, filter_query, page_current, page_size)
+    return (
+        page.rows,
+        update_tooltips(page.rows),
+        page.page_count,
+        page_current if new_query else no_update,
+    )
+
+
+@callback(
+    Output(portfolio_id(PortfolioID.MIX_PIE, MATCH), "figure"),
+    Input(ID.DISPLAY_CURRENCY, "value"),
+    State(portfolio_id(PortfolioID.MIX_PIE, MATCH), "id"),
+)
+def update_mix_pie(currency: str, graph_id: dict) -> plotly.graph_objects.Figure:
+    """Callback to draw the mix of investment types, valued in the display currency"""
+    return mix_pie_figure(load_portfolio(graph_id["portfolio"]), currency)
+
+
+@callback(
+    Output(portfolio_id(PortfolioID.VALUE_GRAPH, MATCH), "figure"),
+    Output(portfolio_id(PortfolioID.AS_OF_PIE, MATCH), "figure"),
+    Input(portfolio_id(PortfolioID.AS_OF_SLIDER, MATCH), "value"),
+    Input(ID.DISPLAY_CURRENCY, "value"),
+    State(portfolio_id(PortfolioID.AS_OF_SLIDER, MATCH), "id"),
+)
+def update_as_of(
+    idx: int, currency: str, slider_id: dict
+) -> tuple[Patch | plotly.graph_objects.Figure, plotly.graph_objects.Figure]:
+    """Callback to show the holdings as they were valued on the date selected with the slider.
+    The valuation is precomputed for every date, so moving the slider is only a lookup, and only
+    the date marker on the area chart is sent back"""
+    valuation = portfolio_valuation(slider_id["portfolio"], currency)
+    idx = min(idx, len(valuation.dates) - 1)
+    if ctx.triggered_id == slider_id:
+        value_fig = Patch()
+        value_fig["layout"]["shapes"] = [as_of_marker(valuation.dates[idx])]
+    else:
+        value_fig = value_figure(valuation, idx, currency)
+    return value_fig, as_of_pie_figure(valuation, idx, currency)
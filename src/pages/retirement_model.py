@@ -1,11 +1,39 @@
 import math
+from dataclasses import dataclass
+from functools import lru_cache
 
 import dash_mantine_components as dmc
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from dash import Input, Output, callback, dcc, html
+import plotly.graph_objects as go
+from dash import Input, Output, State, callback, ctx, dash_table, dcc, html, no_update
+from dash.exceptions import PreventUpdate
 
-from utils.utils import csv_to_dict
+from utils.background import BACKGROUND, BACKGROUND_MANAGER
+from utils.dash_format import compact_figure
+from utils.drawdown import (
+    PERCENTILES,
+    Drawdown,
+    removal_rate_income,
+    simulate_drawdown,
+)
+from utils.result_cache import disk_cached
+from utils.scenarios import (
+    Scenario,
+    ScenarioError,
+    check_scenario,
+    delete_scenario,
+    load_scenarios,
+    save_scenario,
+)
+from utils.tax import DEFAULT_TAX_YEAR, TAX_FREE_FRACTION, TAX_YEARS, gross_income
+from utils.utils import TableData, csv_to_dict, data_generation
+
+# Sensitivity grid: returns and inflation in %, contributions in £ a year
+SWEEP_RETURNS = np.arange(0, 12.5, 0.25)
+SWEEP_INFLATION = np.arange(0, 5, 0.1)
+SWEEP_CONTRIBUTIONS = np.arange(0, 20_000, 1_000)
 
 
 class RetirementModel:
@@ -31,10 +59,46 @@ class RetirementModel:
 
     @property
     def start_year_index(self) -> int:
+        """Index of the last year with a recorded value, which the projection starts from"""
         for idx, value in enumerate(self.actual_values):
             if math.isnan(value):
+                if idx == 0:
+                    raise ValueError(
+                        "The retirement value model has no recorded actual_values"
+                    )
                 return idx - 1
-        raise ValueError
+        raise ValueError(
+            "The retirement value model has no years without actual_values to project"
+        )
+
+    def target_met_ages(
+        self, target: float, net_returns: np.ndarray, contributions: np.ndarray
+    ) -> np.ndarray:
+        """Age the target is first met for every combination of `net_returns` and `contributions`
+        (broadcast against each other), projected all at once. NaN where it is never met
+        """
+        start = self.start_year_index
+        shape = np.broadcast_shapes(np.shape(net_returns), np.shape(contributions))
+        value = np.full(shape, self.actual_values[start])
+        met_age = np.where(value >= target, self.age[start], np.nan)
+        for age in self.age[start + 1 :]:
+            value = value * net_returns + contributions
+            met_age = np.where(np.isnan(met_age) & (value >= target), age, met_age)
+        return met_age
+
+    def project(self, net_returns: np.ndarray, contributions: np.ndarray) -> np.ndarray:
+        """Model values for many parameter sets at once, with a row for each combination of
+        `net_returns` and `contributions` (broadcast against each other) and a column for each
+        year. NaN before the start year"""
+        start = self.start_year_index
+        shape = np.broadcast_shapes(np.shape(net_returns), np.shape(contributions))
+        values = np.full((*shape, len(self.year)), np.nan)
+        value = np.full(shape, self.actual_values[start])
+        values[..., start] = value
+        for idx in range(start + 1, len(self.year)):
+            value = value * net_returns + contributions
+            values[..., idx] = value
+        return values
 
     def set_target(self, target_value):
         self.target = [target_value] * len(self.year)
@@ -65,14 +129,34 @@ class RetirementModel:
         )
 
 
-summary = csv_to_dict("retirement_summary.csv")
-prices = csv_to_dict("retirement_price_time_series.csv")
-avg_returns = csv_to_dict("retirement_average_returns.csv")
-grouped_assets = csv_to_dict("retirement_grouped_by_type.csv")
-value_model = csv_to_dict("retirement_value_model.csv")
-total_value = sum(float(row["value"]) for row in summary)
+def load_value_model() -> TableData:
+    """Actual values of the retirement fund by year, reread when the data is updated"""
+    return _load_value_model(data_generation())
+
+
+@lru_cache(maxsize=1)
+def _load_value_model(generation: str) -> TableData:
+    return csv_to_dict("retirement_value_model.csv")
+
+
+def sensitivity_grid(target: float) -> np.ndarray:
+    """Age the target is met for every combination of the sweep parameters, indexed by
+    [returns, inflation, contributions]. Cached for each target until the data is updated
+    """
+    return _sensitivity_grid(target, data_generation())
+
+
+@lru_cache(maxsize=8)
+@disk_cached
+def _sensitivity_grid(target: float, generation: str) -> np.ndarray:
+    net_returns = 1 + (SWEEP_RETURNS[:, None, None] - SWEEP_INFLATION[:, None]) / 100
+    return RetirementModel(load_value_model()).target_met_ages(
+        target, net_returns, SWEEP_CONTRIBUTIONS
+    )
+
+
+value_model = load_value_model()
 model = RetirementModel(value_model)
-dcc.Store(id="memory_value_model", data=value_model)
 
 
 #  Tab layout
@@ -89,6 +173,9 @@ def create_layout():
                                 dmc.GridCol(
                                     retirements_modelling_parameters(), span=12
                                 ),
+                                dmc.GridCol(sensitivity_section(), span=12),
+                                dmc.GridCol(drawdown_section(), span=12),
+                                dmc.GridCol(scenarios_section(), span=12),
                             ],
                             span=12,
                         ),
@@ -133,11 +220,15 @@ def retirements_modelling_parameters():
                         step=10,
                         max=10000,
                     ),
-                    dcc.Store(
-                        id="memory_annual_income_net", storage_type="local", data=0
-                    ),
-                    dcc.Store(
-                        id="memory_annual_income_gross", storage_type="local", data=0
+                    dmc.Select(
+                        id="retirement_tax_year",
+                        label="Tax year",
+                        data=list(TAX_YEARS),
+                        value=DEFAULT_TAX_YEAR,
+                        allowDeselect=False,
+                        style={"width": 300},
+                        persistence=True,
+                        persistence_type="local",
                     ),
                     html.Div(
                         id="retirement_annual_income",
@@ -161,7 +252,6 @@ def retirements_modelling_parameters():
                         decimalScale=2,
                         max=10,
                     ),
-                    dcc.Store(id="memory_income_sum", storage_type="local", data=0),
                     html.Div(
                         id="retirement_income_sum",
                         children=[
@@ -176,7 +266,6 @@ def retirements_modelling_parameters():
                         min=0,
                         step=1_000,
                     ),
-                    dcc.Store(id="memory_total_sum", storage_type="local", data=0),
                     html.Div(
                         id="retirement_total_sum",
                         children=[
@@ -223,11 +312,479 @@ def retirements_modelling_parameters():
     )
 
 
+def sensitivity_section():
+    return [
+        dmc.Title("Sensitivity", order=4),
+        dcc.Graph(figure={}, id="retirement_sensitivity_heatmap"),
+        dmc.Text("Annual contribution (present prices):", size="sm"),
+        dcc.Slider(
+            min=0,
+            max=len(SWEEP_CONTRIBUTIONS) - 1,
+            step=1,
+            value=0,
+            marks={
+                idx: f"£{value:,}"
+                for idx, value in enumerate(SWEEP_CONTRIBUTIONS.tolist())
+                if idx % 5 == 0
+            },
+            updatemode="drag",
+            id="retirement_sensitivity_contribution",
+        ),
+    ]
+
+
+def sensitivity_figure(
+    met_ages: np.ndarray, returns: float, inflation: float
+) -> go.Figure:
+    """Heatmap of the age the target is met by returns and inflation, with the current
+    parameters marked"""
+    fig = go.Figure(
+        go.Heatmap(
+            z=met_ages,
+            x=SWEEP_INFLATION,
+            y=SWEEP_RETURNS,
+            colorscale="RdYlGn_r",
+            colorbar={"title": "Age"},
+            hovertemplate="Returns %{y:.2f}%<br>Inflation %{x:.1f}%<br>"
+            "Target met at age %{z}<extra></extra>",
+        )
+    )
+    fig.add_scatter(
+        x=[inflation],
+        y=[returns],
+        mode="markers",
+        marker={"symbol": "x", "size": 12, "color": "black"},
+        name="Current",
+        hoverinfo="skip",
+    )
+    fig.update_layout(
+        title="Age target is met",
+        xaxis_title="Inflation rate (%)",
+        yaxis_title="Expected returns (%)",
+        showlegend=False,
+    )
+    return fig
+
+
+@dataclass(frozen=True)
+class RetirementTarget:
+    """Sum needed in the fund to provide an income, derived from the income parameters"""
+
+    annual_income_net: float
+    annual_income_gross: float
+    income_sum: int
+    total_sum: int
+
+
+def retirement_target(
+    monthly_income: float,
+    removal_rate: float,
+    lump_sum: float,
+    tax_year: str = DEFAULT_TAX_YEAR,
+) -> RetirementTarget:
+    annual_income_net = monthly_income * 12
+    annual_income_gross = calculate_gross_income(annual_income_net, tax_year=tax_year)
+    income_sum = int(annual_income_gross / (removal_rate / 100))
+    return RetirementTarget(
+        annual_income_net=annual_income_net,
+        annual_income_gross=annual_income_gross,
+        income_sum=income_sum,
+        total_sum=lump_sum + income_sum,
+    )
+
+
+def model_figure(projection: RetirementModel) -> go.Figure:
+    color = px.colors.qualitative.Set1
+    return px.line(
+        projection.as_df().melt(
+            id_vars=["Year"], value_vars=["Actual Values", "Target", "Model Values"]
+        ),
+        x="Year",
+        y="value",
+        color="variable",
+        color_discrete_sequence=[color[1], color[0], color[1]],
+        line_dash="variable",
+        line_dash_map={
+            "Actual Values": "solid",
+            "Target": "dash",
+            "Model Values": "dot",
+        },
+        # hover_data=["Age"],
+    )
+
+
+def target_met_text(projection: RetirementModel) -> str:
+    try:
+        return f"Target met at age {projection.target_met_age} in {projection.target_met_year}"
+    except ValueError:
+        return f"Target not met by age {projection.age[-1]}"
+
+
+def drawdown_section():
+    return [
+        dmc.Title("Drawdown", order=4),
+        dmc.Group(
+            [
+                dmc.NumberInput(
+                    **NUMBER_INPUT_SETTINGS,
+                    id="retirement_end_age",
+                    label="Income needed until age",
+                    value=95,
+                    min=50,
+                    max=120,
+                    step=1,
+                ),
+                dmc.NumberInput(
+                    **NUMBER_INPUT_SETTINGS,
+                    id="retirement_volatility",
+                    label="Volatility of returns (%)",
+                    value=10,
+                    min=0,
+                    step=0.5,
+                    decimalScale=1,
+                ),
+            ]
+        ),
+        dmc.Box(
+            [
+                dmc.LoadingOverlay(id="retirement_drawdown_loading", visible=False),
+                html.Div(id="retirement_drawdown_summary"),
+                dmc.Grid(
+                    [
+                        dmc.GridCol(
+                            dcc.Graph(figure={}, id="retirement_drawdown_graph"),
+                            span=7,
+                        ),
+                        dmc.GridCol(
+                            dcc.Graph(figure={}, id="retirement_depletion_histogram"),
+                            span=5,
+                        ),
+                    ]
+                ),
+            ],
+            pos="relative",
+        ),
+    ]
+
+
+def target_projection(
+    target: RetirementTarget, returns: float, inflation: float, contributions: float
+) -> RetirementModel:
+    """Projection of the fund against the target. A new model for each call, as callbacks can
+    run concurrently in a threaded worker"""
+    projection = RetirementModel(load_value_model())
+    projection.calculate_model_value(
+        net_returns=1 + (returns - inflation) / 100, contributions=contributions
+    )
+    projection.set_target(target_value=target.total_sum)
+    return projection
+
+
+def drawdown_start(projection: RetirementModel) -> tuple[int, float] | None:
+    """Age and fund value to start taking the income from, when the target is met. None if it
+    never is"""
+    for age, value in zip(projection.age, projection.model_values):
+        if value >= projection.target[0]:
+            return age, value
+    return None
+
+
+def retirement_drawdown(
+    start_value: float,
+    start_age: int,
+    target: RetirementTarget,
+    removal_rate: float,
+    end_age: int,
+    real_returns: float,
+    volatility: float,
+    inflation: float,
+    tax_year: str,
+) -> Drawdown:
+    """Simulate the drawdown from when the target is met. The lump sum is taken first, and the
+    income is `removal_rate` of the rest of the fund"""
+    pot = start_value - (target.total_sum - target.income_sum)
+    return simulate_drawdown(
+        pot=pot,
+        start_age=start_age,
+        end_age=end_age,
+        net_income=removal_rate_income(pot, removal_rate, tax_year),
+        real_returns=real_returns,
+        volatility=volatility,
+        inflation=inflation,
+        tax_year=tax_year,
+    )
+
+
+def drawdown_figure(drawdown: Drawdown) -> go.Figure:
+    """Fan chart of the fund value percentiles while the income is taken"""
+    ages = drawdown.pot_ages
+    low, median, high = drawdown.pot
+    fig = go.Figure(
+        [
+            go.Scatter(x=ages, y=high, line={"width": 0}, name=f"{PERCENTILES[2]}th"),
+            go.Scatter(
+                x=ages,
+                y=low,
+                fill="tonexty",
+                line={"width": 0},
+                name=f"{PERCENTILES[0]}th",
+            ),
+            go.Scatter(x=ages, y=median, name="Median"),
+        ]
+    )
+    fig.update_layout(
+        title="Fund value while drawing the income (present prices)",
+        xaxis_title="Age",
+        yaxis_title="value",
+        showlegend=False,
+    )
+    return compact_figure(fig, precision=0)
+
+
+def depletion_figure(drawdown: Drawdown) -> go.Figure:
+    """Share of the return paths running out of money at each age. Binned here rather than by
+    plotly, so that only one bar per age is sent rather than every path"""
+    ages, counts = np.unique(
+        drawdown.depletion_ages[~np.isnan(drawdown.depletion_ages)], return_counts=True
+    )
+    if not len(ages):
+        fig = go.Figure()
+        fig.update_layout(
+            title="Age the fund runs out",
+            xaxis={"visible": False},
+            yaxis={"visible": False},
+        )
+        fig.add_annotation(
+            text="No return path runs out of money", showarrow=False, font={"size": 16}
+        )
+        return fig
+    fig = px.bar(
+        x=ages,
+        y=100 * counts / len(drawdown.depletion_ages),
+        title="Age the fund runs out",
+        labels={"x": "Age", "y": "% of return paths"},
+    )
+    return compact_figure(fig, precision=2)
+
+
+def drawdown_summary(drawdown: Drawdown, end_age: int) -> list:
+    if not len(drawdown.ages):
+        return [
+            dmc.Text(
+                f"Target met at age {drawdown.start_age}, which isn't before age {end_age}"
+            )
+        ]
+    ages = drawdown.depletion_ages[~np.isnan(drawdown.depletion_ages)]
+    lines = [
+        dmc.Text(
+            f"Drawing £{drawdown.withdrawals[0]:,.0f} a year (gross, present prices) from "
+            f"age {drawdown.ages[0]}, the income lasts to age {end_age} in "
+            f"{drawdown.survival_rate:.0%} of {len(drawdown.depletion_ages):,} return paths"
+        )
+    ]
+    if len(ages):
+        lines.append(
+            dmc.Text(f"Where it runs out, the median age is {np.median(ages):.0f}")
+        )
+    return lines
+
+
+def scenarios_section():
+    return [
+        dmc.Title("Scenarios", order=4),
+        dmc.Group(
+            [
+                dmc.TextInput(
+                    id="retirement_scenario_name",
+                    label="Scenario name",
+                    placeholder="e.g. Retire at 60",
+                    style={"width": 300},
+                ),
+                dmc.Button("Save", id="retirement_scenario_save", size="sm"),
+                dmc.Select(
+                    id="retirement_scenario_select",
+                    label="Saved scenarios",
+                    placeholder="Load a scenario",
+                    data=[],
+                    clearable=True,
+                    style={"width": 300},
+                ),
+                dmc.Button(
+                    "Delete", id="retirement_scenario_delete", size="sm", color="red"
+                ),
+            ],
+            align="flex-end",
+        ),
+        html.Div(id="retirement_scenario_message"),
+        dcc.Graph(figure={}, id="retirement_scenario_graph"),
+        dash_table.DataTable(
+            data=[],
+            columns=SCENARIO_COLUMNS,
+            id="retirement_scenario_table",
+            style_table={"overflowX": "auto"},
+        ),
+    ]
+
+
+SCENARIO_COLUMNS = [
+    {"id": "name", "name": "Scenario"},
+    {"id": "returns", "name": "Returns (%)", "type": "numeric"},
+    {"id": "inflation", "name": "Inflation (%)", "type": "numeric"},
+    {"id": "contributions", "name": "Contribution (£/yr)", "type": "numeric"},
+    {"id": "monthly_income", "name": "Income (£/month)", "type": "numeric"},
+    {"id": "total_sum", "name": "Sum required (£)", "type": "numeric"},
+    {"id": "met_age", "name": "Target met at age", "type": "numeric"},
+    {"id": "survival", "name": "Income lasts (% of paths)", "type": "numeric"},
+]
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    """Projection of a saved scenario. `met_age` and `survival_rate` are NaN if the target is
+    never met"""
+
+    scenario: Scenario
+    target: RetirementTarget
+    model_values: np.ndarray
+    met_age: float
+    survival_rate: float
+
+    def as_row(self) -> dict:
+        s = self.scenario
+        return {
+            "name": s.name,
+            "returns": s.returns,
+            "inflation": s.inflation,
+            "contributions": s.contributions,
+            "monthly_income": s.monthly_income,
+            "total_sum": self.target.total_sum,
+            "met_age": None if math.isnan(self.met_age) else int(self.met_age),
+            "survival": (
+                None
+                if math.isnan(self.survival_rate)
+                else round(100 * self.survival_rate)
+            ),
+        }
+
+
+def evaluate_scenarios(
+    scenarios: list[Scenario],
+) -> tuple[list[ScenarioResult], dict[str, str]]:
+    """Project every scenario that can be, and the reason each of the others can't, by name.
+    Each result is cached until the data is updated"""
+    skipped = {}
+    for scenario in scenarios:
+        try:
+            check_scenario(scenario)
+        except ScenarioError as e:
+            skipped[scenario.name] = str(e)
+    generation = data_generation()
+    results = [
+        _scenario_result(scenario, generation)
+        for scenario in scenarios
+        if scenario.name not in skipped
+    ]
+    return results, skipped
+
+
+@lru_cache(maxsize=32)
+@disk_cached
+def _scenario_result(scenario: Scenario, generation: str) -> ScenarioResult:
+    return project_scenarios([scenario])[0]
+
+
+def project_scenarios(scenarios: list[Scenario]) -> list[ScenarioResult]:
+    projection = RetirementModel(load_value_model())
+    targets = [
+        retirement_target(s.monthly_income, s.removal_rate, s.lump_sum, s.tax_year)
+        for s in scenarios
+    ]
+    returns = np.array([s.returns for s in scenarios], dtype=float)
+    inflation = np.array([s.inflation for s in scenarios], dtype=float)
+    values = projection.project(
+        1 + (returns - inflation) / 100,
+        np.array([s.contributions for s in scenarios], dtype=float),
+    )
+    totals = np.array([target.total_sum for target in targets], dtype=float)
+    met = values >= totals[:, None]
+    ages = np.array(projection.age)
+    start = np.argmax(met, axis=1)
+    results = []
+    for idx, (scenario, target) in enumerate(zip(scenarios, targets)):
+        met_age = survival_rate = float("nan")
+        if met[idx].any():
+            met_age = ages[start[idx]]
+            survival_rate = retirement_drawdown(
+                values[idx, start[idx]],
+                met_age,
+                target,
+                removal_rate=scenario.removal_rate,
+                end_age=scenario.end_age,
+                real_returns=returns[idx] - inflation[idx],
+                volatility=scenario.volatility,
+                inflation=inflation[idx],
+                tax_year=scenario.tax_year,
+            ).survival_rate
+        results.append(
+            ScenarioResult(
+                scenario=scenario,
+                target=target,
+                model_values=values[idx],
+                met_age=met_age,
+                survival_rate=survival_rate,
+            )
+        )
+    return results
+
+
+def scenarios_figure(results: list[ScenarioResult]) -> go.Figure:
+    """Projection of each scenario, with its target as a dashed line in the same colour"""
+    projection = RetirementModel(load_value_model())
+    years = projection.year
+    fig = go.Figure(
+        go.Scatter(
+            x=years,
+            y=projection.actual_values,
+            name="Actual Values",
+            line={"color": "grey"},
+        )
+    )
+    colors = px.colors.qualitative.Plotly
+    for idx, result in enumerate(results):
+        color = colors[idx % len(colors)]
+        name = result.scenario.name
+        fig.add_scatter(
+            x=years,
+            y=result.model_values,
+            name=name,
+            legendgroup=name,
+            line={"color": color},
+        )
+        fig.add_scatter(
+            x=[years[0], years[-1]],
+            y=[result.target.total_sum] * 2,
+            name=f"{name} target",
+            legendgroup=name,
+            showlegend=False,
+            line={"dash": "dash", "color": color},
+            hoverinfo="skip",
+        )
+    fig.update_layout(
+        title="Saved scenarios",
+        xaxis_title="Year",
+        yaxis_title="value (present prices)",
+    )
+    return compact_figure(fig, precision=0)
+
+
 def calculate_gross_income(
-    annual_income_net: float, tax_free_fraction: float = 0.25
-) -> float | int:
-    """Estimate the gross income required to give a certain net income. Based on current income
-    tax bands
+    annual_income_net: float,
+    tax_free_fraction: float = TAX_FREE_FRACTION,
+    tax_year: str = DEFAULT_TAX_YEAR,
+) -> float:
+    """Gross pension withdrawals required to give a certain net income, using all the income tax
+    bands and personal allowance taper of `tax_year`. See `utils.tax` to evaluate many incomes
+    at once
 
     Parameters
     ----------
@@ -239,109 +796,234 @@ def calculate_gross_income(
     float
         Annual gross income
     """
-    tax_rate_lower = 0.2
-    personal_allowance = 12_570
-    taxable_fraction = 1 - tax_free_fraction
-    tax_payable = (
-        (taxable_fraction * annual_income_net - personal_allowance) * tax_rate_lower
-    ) / (1 - taxable_fraction * tax_rate_lower)
-    tax_payable = max(0, tax_payable)
-    return annual_income_net + tax_payable
+    return float(gross_income(annual_income_net, tax_year, tax_free_fraction))
 
 
 #  Callbacks
 @callback(
+    Output(component_id="retirement_annual_income", component_property="children"),
     Output(component_id="retirement_income_sum", component_property="children"),
-    Output(component_id="memory_income_sum", component_property="data"),
-    Input(component_id="memory_annual_income_gross", component_property="data"),
+    Output(component_id="retirement_total_sum", component_property="children"),
+    Output(component_id="retirements_model_graph", component_property="figure"),
+    Output(component_id="retirement_target_met_year", component_property="children"),
+    Input(component_id="retirement_monthly_income", component_property="value"),
     Input(component_id="retirement_removal_rate", component_property="value"),
+    Input(component_id="retirement_lump_sum", component_property="value"),
+    Input(component_id="retirement_expected_returns", component_property="value"),
+    Input(component_id="retirement_inflation_rate", component_property="value"),
+    Input(component_id="retirement_annual_contribution", component_property="value"),
+    Input(component_id="retirement_tax_year", component_property="value"),
 )
-def update_income_sum(gross_income, removal_rate):
-    income_sum = int(gross_income / (removal_rate / 100))
+def update_retirement_model(
+    monthly_income,
+    removal_rate,
+    lump_sum,
+    returns,
+    inflation,
+    contributions,
+    tax_year,
+):
+    """Callback to calculate the target and the projection of the fund. These are quick, so are
+    answered in the request, leaving the drawdown simulation to `update_drawdown`"""
+    parameters = (
+        monthly_income,
+        removal_rate,
+        lump_sum,
+        returns,
+        inflation,
+        contributions,
+    )
+    if any(value in (None, "") for value in parameters) or removal_rate <= 0:
+        raise PreventUpdate  # Part way through editing a number
+    target = retirement_target(monthly_income, removal_rate, lump_sum, tax_year)
+    projection = target_projection(target, returns, inflation, contributions)
     return (
         [
-            dmc.Text(f"Sum required to provide income: £{income_sum}"),
+            dmc.Text(
+                f"Annual income (net, present value): £{target.annual_income_net}"
+            ),
+            dmc.Text(
+                f"Annual income (gross, present value): £{target.annual_income_gross:.0f}"
+            ),
+            dmc.Text("(Assumes 25% of income is taken from pension pot tax-free)"),
         ],
-        income_sum,
+        [dmc.Text(f"Sum required to provide income: £{target.income_sum}")],
+        [dmc.Text(f"Total sum required: £{target.total_sum}")],
+        model_figure(projection),
+        [dmc.Text(target_met_text(projection))],
     )
 
 
 @callback(
-    Output(component_id="retirement_total_sum", component_property="children"),
-    Input(component_id="memory_total_sum", component_property="data"),
+    Output(component_id="retirement_drawdown_summary", component_property="children"),
+    Output(component_id="retirement_drawdown_graph", component_property="figure"),
+    Output(component_id="retirement_depletion_histogram", component_property="figure"),
+    Input(component_id="retirement_monthly_income", component_property="value"),
+    Input(component_id="retirement_removal_rate", component_property="value"),
+    Input(component_id="retirement_lump_sum", component_property="value"),
+    Input(component_id="retirement_expected_returns", component_property="value"),
+    Input(component_id="retirement_inflation_rate", component_property="value"),
+    Input(component_id="retirement_annual_contribution", component_property="value"),
+    Input(component_id="retirement_tax_year", component_property="value"),
+    Input(component_id="retirement_end_age", component_property="value"),
+    Input(component_id="retirement_volatility", component_property="value"),
+    background=BACKGROUND,
+    manager=BACKGROUND_MANAGER,
+    running=[(Output("retirement_drawdown_loading", "visible"), True, False)],
 )
-def update_total_sum(total_sum):
-    return [
-        dmc.Text(f"Total sum required: £{total_sum}"),
-    ]
+def update_drawdown(
+    monthly_income,
+    removal_rate,
+    lump_sum,
+    returns,
+    inflation,
+    contributions,
+    tax_year,
+    end_age,
+    volatility,
+):
+    """Callback to simulate drawing the income from the fund once the target is met. Runs as a
+    background callback where available, so the simulation doesn't hold up a server worker
+    """
+    parameters = (
+        monthly_income,
+        removal_rate,
+        lump_sum,
+        returns,
+        inflation,
+        contributions,
+    )
+    if any(value in (None, "") for value in (*parameters, end_age, volatility)):
+        raise PreventUpdate  # Part way through editing a number
+    if removal_rate <= 0:
+        raise PreventUpdate  # No sum produces an income without removing any of it
+    target = retirement_target(monthly_income, removal_rate, lump_sum, tax_year)
+    start = drawdown_start(target_projection(target, returns, inflation, contributions))
+    if start is None:
+        return [dmc.Text("Target not met, so there is no income to draw down")], {}, {}
+    start_age, start_value = start
+    drawdown = retirement_drawdown(
+        start_value,
+        start_age,
+        target,
+        removal_rate=removal_rate,
+        end_age=end_age,
+        real_returns=returns - inflation,
+        volatility=volatility,
+        inflation=inflation,
+        tax_year=tax_year,
+    )
+    return (
+        drawdown_summary(drawdown, end_age),
+        drawdown_figure(drawdown),
+        depletion_figure(drawdown),
+    )
 
 
 @callback(
-    Output(component_id="memory_total_sum", component_property="data"),
-    Input(component_id="memory_income_sum", component_property="data"),
+    Output(component_id="retirement_sensitivity_heatmap", component_property="figure"),
+    Input(component_id="retirement_monthly_income", component_property="value"),
+    Input(component_id="retirement_removal_rate", component_property="value"),
     Input(component_id="retirement_lump_sum", component_property="value"),
+    Input(component_id="retirement_expected_returns", component_property="value"),
+    Input(component_id="retirement_inflation_rate", component_property="value"),
+    Input(
+        component_id="retirement_sensitivity_contribution", component_property="value"
+    ),
+    Input(component_id="retirement_tax_year", component_property="value"),
 )
-def store_lump_sum(income_sum, lump_sum):
-    return lump_sum + income_sum
+def update_sensitivity_heatmap(
+    monthly_income,
+    removal_rate,
+    lump_sum,
+    returns,
+    inflation,
+    sensitivity_contribution,
+    tax_year,
+):
+    """Callback to show the ages the target is met at for the chosen contribution. The grid of
+    ages is cached for each target, so this is a lookup answered in the request, which keeps
+    dragging the slider responsive"""
+    parameters = (monthly_income, removal_rate, lump_sum, returns, inflation)
+    if any(value in (None, "") for value in parameters) or removal_rate <= 0:
+        raise PreventUpdate
+    target = retirement_target(monthly_income, removal_rate, lump_sum, tax_year)
+    return sensitivity_figure(
+        sensitivity_grid(target.total_sum)[:, :, sensitivity_contribution],
+        returns,
+        inflation,
+    )
 
 
-@callback(
-    Output(component_id="retirement_annual_income", component_property="children"),
-    Input(component_id="memory_annual_income_net", component_property="data"),
-    Input(component_id="memory_annual_income_gross", component_property="data"),
-)
-def update_annual_income(net_income, gross_income):
-    return [
-        dmc.Text(f"Annual income (net, present value): £{net_income}"),
-        dmc.Text(f"Annual income (gross, present value): £{gross_income:.0f}"),
-        dmc.Text("(Assumes 25% of income is taken from pension pot tax-free)"),
-    ]
+SCENARIO_INPUTS = {
+    "monthly_income": "retirement_monthly_income",
+    "removal_rate": "retirement_removal_rate",
+    "lump_sum": "retirement_lump_sum",
+    "returns": "retirement_expected_returns",
+    "inflation": "retirement_inflation_rate",
+    "contributions": "retirement_annual_contribution",
+    "tax_year": "retirement_tax_year",
+    "end_age": "retirement_end_age",
+    "volatility": "retirement_volatility",
+}
 
 
 @callback(
-    Output(component_id="memory_annual_income_net", component_property="data"),
-    Output(component_id="memory_annual_income_gross", component_property="data"),
-    Input(component_id="retirement_monthly_income", component_property="value"),
+    Output("retirement_scenario_select", "data"),
+    Output("retirement_scenario_select", "value"),
+    Output("retirement_scenario_graph", "figure"),
+    Output("retirement_scenario_table", "data"),
+    Output("retirement_scenario_message", "children"),
+    Input("retirement_scenario_save", "n_clicks"),
+    Input("retirement_scenario_delete", "n_clicks"),
+    State("retirement_scenario_name", "value"),
+    State("retirement_scenario_select", "value"),
+    *[State(component_id, "value") for component_id in SCENARIO_INPUTS.values()],
+    background=BACKGROUND,
+    manager=BACKGROUND_MANAGER,
 )
-def store_annual_income(monthly_income: int):
-    annual_income_net = monthly_income * 12
-    annual_income_gross = calculate_gross_income(annual_income_net)
-    return annual_income_net, annual_income_gross
+def update_scenarios(save_clicks, delete_clicks, name, selected, *values):
+    """Callback to save the current inputs as a scenario, or delete the selected one, and
+    compare all of the saved scenarios. Runs as a background callback where available, as
+    each scenario's drawdown is simulated"""
+    message, select_value = [], no_update
+    try:
+        if ctx.triggered_id == "retirement_scenario_save":
+            if any(value in (None, "") for value in values):
+                raise ScenarioError("Fill in all of the inputs before saving")
+            save_scenario(
+                Scenario(name=name or "", **dict(zip(SCENARIO_INPUTS, values)))
+            )
+        elif ctx.triggered_id == "retirement_scenario_delete" and selected:
+            delete_scenario(selected)
+            select_value = None
+    except ScenarioError as e:
+        message = [dmc.Text(str(e), c="red")]
+    # Scenarios that can't be projected are still listed, so they can be loaded or deleted
+    scenarios = load_scenarios()
+    results, skipped = evaluate_scenarios(scenarios)
+    message += [
+        dmc.Text(f"Not comparing {name}: {reason}", c="red")
+        for name, reason in skipped.items()
+    ]
+    return (
+        [scenario.name for scenario in scenarios],
+        select_value,
+        scenarios_figure(results),
+        [result.as_row() for result in results],
+        message,
+    )
 
 
 @callback(
-    Output(component_id="retirements_model_graph", component_property="figure"),
-    Output(component_id="retirement_target_met_year", component_property="children"),
-    Input(component_id="memory_total_sum", component_property="data"),
-    Input(component_id="retirement_expected_returns", component_property="value"),
-    Input(component_id="retirement_inflation_rate", component_property="value"),
-    Input(component_id="retirement_annual_contribution", component_property="value"),
+    *[Output(component_id, "value") for component_id in SCENARIO_INPUTS.values()],
+    Output("retirement_scenario_name", "value"),
+    Input("retirement_scenario_select", "value"),
+    prevent_initial_call=True,
 )
-def update_model_graph(target, returns, inflation, contributions):
-    color = px.colors.qualitative.Set1
-    net_returns = 1 + (returns - inflation) / 100
-    model.calculate_model_value(net_returns=net_returns, contributions=contributions)
-    model.set_target(target_value=target)
-    return (
-        px.line(
-            model.as_df().melt(
-                id_vars=["Year"], value_vars=["Actual Values", "Target", "Model Values"]
-            ),
-            x="Year",
-            y="value",
-            color="variable",
-            color_discrete_sequence=[color[1], color[0], color[1]],
-            line_dash="variable",
-            line_dash_map={
-                "Actual Values": "solid",
-                "Target": "dash",
-                "Model Values": "dot",
-            },
-            # hover_data=["Age"],
-        ),
-        [
-            dmc.Text(
-                f"Target met at age {model.target_met_age} in {model.target_met_year}"
-            ),
-        ],
-    )
+def load_scenario(name):
+    """Callback to set the model inputs to those of the selected scenario"""
+    scenario = next((s for s in load_scenarios() if s.name == name), None)
+    if scenario is None:
+        raise PreventUpdate
+    return *[getattr(scenario, field) for field in SCENARIO_INPUTS], scenario.name
@@ -0,0 +1,33 @@
+import logging
+import os
+
+from dash import DiskcacheManager
+
+from utils.utils import CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Set MONEY_DASHBOARD_BACKGROUND=0 to run every callback inside the request
+USE_BACKGROUND = os.environ.get("MONEY_DASHBOARD_BACKGROUND", "1") != "0"
+
+
+def _background_manager() -> DiskcacheManager | None:
+    """Manager running background callbacks in their own processes, or None if they are turned
+    off or `diskcache`, `multiprocess` and `psutil` aren't installed"""
+    if not USE_BACKGROUND:
+        return None
+    try:
+        import diskcache
+    except ImportError:
+        logger.info("diskcache not installed, background callbacks run in the request")
+        return None
+    try:
+        return DiskcacheManager(diskcache.Cache(CACHE_PATH / "background"))
+    except ImportError as e:
+        logger.info("%s, background callbacks run in the request", e)
+        return None
+
+
+BACKGROUND_MANAGER = _background_manager()
+# For `@callback(background=...)`. Without a manager, background callbacks run like any other
+BACKGROUND = BACKGROUND_MANAGER is not None
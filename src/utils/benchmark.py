@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from utils.fx import QUOTE_CURRENCY, converted_prices
+from utils.result_cache import disk_cached
+from utils.timeseries import PriceMatrix
+from utils.utils import DAYS_PER_YEAR, data_generation
+
+# Index-like columns of the price series that holdings can be compared against
+BENCHMARKS = (
+    "UK Equity",
+    "US Equity Index",
+    "Overseas Equity",
+    "Bond",
+    "Index Linked Gilt",
+)
+
+
+@dataclass(frozen=True)
+class RelativePerformance:
+    """Performance of each column of a price matrix against a benchmark column over a horizon.
+    All annualised, and NaN for columns without prices over the whole horizon"""
+
+    columns: list[str]
+    alpha: np.ndarray
+    beta: np.ndarray
+    tracking_error: np.ndarray
+    excess_return: np.ndarray
+
+    def as_rows(self) -> dict[str, dict[str, float]]:
+        """The statistics of each column, keyed like the performance table"""
+        return {
+            column: {
+                "alpha": alpha,
+                "beta": beta,
+                "tracking_error": tracking_error,
+                "excess_return": excess_return,
+            }
+            for column, alpha, beta, tracking_error, excess_return in zip(
+                self.columns,
+                self.alpha.tolist(),
+                self.beta.tolist(),
+                self.tracking_error.tolist(),
+                self.excess_return.tolist(),
+            )
+        }
+
+
+def available_benchmarks(prices: PriceMatrix) -> list[str]:
+    return [column for column in BENCHMARKS if column in prices.columns]
+
+
+def portfolio_relative_performance(
+    prefix: str, benchmark: str, years: int
+) -> RelativePerformance:
+    """Relative performance of every holding of a portfolio against `benchmark` over the last
+    `years`, in `QUOTE_CURRENCY`. Recalculated only when the data is updated"""
+    return _portfolio_relative_performance(prefix, benchmark, years, data_generation())
+
+
+@lru_cache(maxsize=32)
+@disk_cached
+def _portfolio_relative_performance(
+    prefix: str, benchmark: str, years: int, generation: str
+) -> RelativePerformance:
+    return relative_performance(
+        converted_prices(prefix, QUOTE_CURRENCY), benchmark, years
+    )
+
+
+def relative_performance(
+    prices: PriceMatrix, benchmark: str, years: float
+) -> RelativePerformance:
+    """Alpha, beta, tracking error and excess return of every column against `benchmark`.
+
+    Returns are taken between consecutive price dates in the last `years`, with gaps filled by
+    the previous price. The covariances of all columns with the benchmark come from one pass
+    over the (dates x columns) return matrix"""
+    rows = slice(prices.horizons.start(years), None)
+    filled = prices.filled[rows]
+    bench = filled[:, prices.columns.index(benchmark)]
+    span = (prices.dates[rows][-1] - prices.dates[rows][0]).astype(float)
+    span /= DAYS_PER_YEAR
+    periods_per_year = (len(filled) - 1) / span
+
+    with np.errstate(all="ignore"):
+        returns = filled[1:] / filled[:-1] - 1
+        bench_returns = bench[1:] / bench[:-1] - 1
+        # Columns missing a price at any point in the horizon aren't comparable
+        complete = ~np.isnan(returns).any(axis=0) & ~np.isnan(bench_returns).any()
+
+        excess = returns - bench_returns[:, None]
+        centred = returns - returns.mean(axis=0)
+        bench_centred = bench_returns - bench_returns.mean()
+        beta = (bench_centred @ centred) / (bench_centred @ bench_centred)
+        alpha = returns.mean(axis=0) - beta * bench_returns.mean()
+        tracking_error = excess.std(axis=0, ddof=1)
+        growth = (filled[-1] / filled[0]) ** (1 / span)
+        excess_return = growth - (bench[-1] / bench[0]) ** (1 / span)
+
+    def masked(values: np.ndarray) -> np.ndarray:
+        return np.where(complete, values, np.nan)
+
+    return RelativePerformance(
+        columns=prices.columns,
+        alpha=masked(alpha * periods_per_year),
+        beta=masked(beta),
+        tracking_error=masked(tracking_error * np.sqrt(periods_per_year)),
+        excess_return=masked(excess_return),
+    )
@@ -0,0 +1,93 @@
+import gzip
+import logging
+import os
+import threading
+
+from dash import Dash
+from flask import Response, jsonify, request
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip is used if brotli isn't installed
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MIN_COMPRESS_BYTES = 500
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Higher levels cost too much CPU on the Pi for little gain
+PAYLOAD_BUDGET_BYTES = int(os.environ.get("MONEY_DASHBOARD_PAYLOAD_BUDGET", "100000"))
+
+_payloads: dict[str, dict[str, int]] = {}
+_payloads_lock = threading.Lock()
+
+
+def register_compression(app: Dash) -> None:
+    """Compress the JSON responses of the Dash routes, and keep a per-callback report of their
+    sizes at `/_payload-report`. Callbacks sending more than `PAYLOAD_BUDGET_BYTES` (after
+    compression) are logged"""
+    prefix = app.config.routes_pathname_prefix
+    json_routes = {
+        prefix,
+        f"{prefix}_dash-layout",
+        f"{prefix}_dash-dependencies",
+        f"{prefix}_dash-update-component",
+    }
+
+    @app.server.after_request
+    def compress(response: Response) -> Response:
+        if request.path not in json_routes or response.status_code != 200:
+            return response
+        raw_size = response.content_length or 0
+        encoding = _accepted_encoding()
+        if (
+            encoding
+            and raw_size >= MIN_COMPRESS_BYTES
+            and not response.direct_passthrough
+            and "Content-Encoding" not in response.headers
+        ):
+            data = response.get_data()
+            if encoding == "br":
+                response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+            else:
+                response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        _record_payload(request.path, raw_size, response.content_length or 0)
+        return response
+
+    @app.server.route(f"{prefix}_payload-report")
+    def payload_report():
+        with _payloads_lock:
+            return jsonify(budget=PAYLOAD_BUDGET_BYTES, payloads=_payloads)
+
+
+def _accepted_encoding() -> str | None:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _record_payload(path: str, raw_size: int, sent_size: int) -> None:
+    """Keep the count, latest and largest sizes sent for each callback (or layout route)"""
+    body = request.get_json(silent=True, cache=True) if request.is_json else None
+    name = body["output"] if isinstance(body, dict) and "output" in body else path
+    with _payloads_lock:
+        stats = _payloads.setdefault(
+            name, {"calls": 0, "last_bytes": 0, "max_bytes": 0, "max_raw_bytes": 0}
+        )
+        stats["calls"] += 1
+        stats["last_bytes"] = sent_size
+        stats["max_bytes"] = max(stats["max_bytes"], sent_size)
+        stats["max_raw_bytes"] = max(stats["max_raw_bytes"], raw_size)
+    if sent_size > PAYLOAD_BUDGET_BYTES:
+        logger.warning(
+            "%s sent %d bytes (%d uncompressed), over the budget of %d",
+            name,
+            sent_size,
+            raw_size,
+            PAYLOAD_BUDGET_BYTES,
+        )
@@ -1,5 +1,17 @@
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
 from dash.dash_table.Format import Format, Group, Scheme, Sign, Symbol
 
+from utils.timeseries import resample, resample_ohlc
+
+# Set MONEY_DASHBOARD_COMPACT_FIGURES=0 to send figures at full precision
+COMPACT_FIGURES = os.environ.get("MONEY_DASHBOARD_COMPACT_FIGURES", "1") != "0"
+TRACE_ARRAYS = ("x", "y", "values", "open", "high", "low", "close")
+
 
 def number_format(precision: int):
     return Format(
@@ -12,7 +24,7 @@ def number_format(precision: int):
     )
 
 
-def money_format(precision: int):
+def money_format(precision: int, symbol: str = "£"):
     return Format(
         scheme=Scheme.fixed,
         precision=precision,
@@ -21,7 +33,7 @@ def money_format(precision: int):
         group_delimiter=",",
         decimal_delimiter=".",
         symbol=Symbol.yes,
-        symbol_prefix="£",
+        symbol_prefix=symbol,
     )
 
 
@@ -87,3 +99,66 @@ def conditional_format_percent_change(columns: list[str]) -> list[dict]:
     # )
 
     return conditional
+
+
+def compact_figure(fig: go.Figure, precision: int) -> go.Figure:
+    """Shrink the JSON of a figure's traces, in place. Numbers are rounded to `precision` decimal
+    places and sent as 32-bit values where that changes nothing at this precision, and dates
+    without a time of day are sent as plain dates"""
+    if not COMPACT_FIGURES:
+        return fig
+    for trace in fig.data:
+        for name in TRACE_ARRAYS:
+            values = getattr(trace, name, None)
+            if isinstance(values, np.ndarray):
+                trace[name] = compact_array(values, precision)
+    return fig
+
+
+def compact_array(values: np.ndarray, precision: int) -> np.ndarray:
+    if values.dtype.kind == "M":
+        days = values.astype("datetime64[D]")
+        return np.datetime_as_string(days) if (days == values).all() else values
+    if values.dtype.kind != "f":
+        return values
+    rounded = np.round(values, precision)
+    as_float32 = rounded.astype(np.float32)
+    error = np.nan_to_num(np.abs(as_float32 - rounded), nan=0.0)
+    return as_float32 if error.max(initial=0) < 0.5 * 10**-precision else rounded
+
+
+def time_series_figure(
+    dates: np.ndarray,
+    values: np.ndarray,
+    names: list[str],
+    frequency: str,
+    how: str,
+    colors: dict[str, str] | None = None,
+) -> go.Figure:
+    """Candlesticks of each column of `values` at `frequency` if `how` is "ohlc", otherwise
+    lines of the columns resampled with `how`"""
+    if how == "ohlc":
+        ohlc = resample_ohlc(dates, values, frequency)
+        fig = go.Figure(
+            [
+                go.Candlestick(
+                    x=ohlc.dates,
+                    open=ohlc.open[:, idx],
+                    high=ohlc.high[:, idx],
+                    low=ohlc.low[:, idx],
+                    close=ohlc.close[:, idx],
+                    name=name,
+                    increasing_line_color=(colors or {}).get(name),
+                )
+                for idx, name in enumerate(names)
+            ]
+        )
+        fig.update_layout(xaxis_rangeslider_visible=False, xaxis_title="date")
+    else:
+        dates, values = resample(dates, values, frequency, how)
+        fig = px.line(
+            pd.DataFrame(values, index=pd.Index(dates, name="date"), columns=names),
+            color_discrete_map=colors or {},
+        )
+    fig.update_layout(showlegend=len(names) > 1)
+    return fig
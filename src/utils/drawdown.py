@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from utils.result_cache import disk_cached
+from utils.tax import DEFAULT_TAX_YEAR, gross_income, net_income
+
+N_PATHS = 5_000
+SEED = 20240526  # Fixed, so the same parameters always give the same distribution
+PERCENTILES = (10, 50, 90)
+
+
+@dataclass(frozen=True)
+class Drawdown:
+    """Simulated value of a retirement fund while an income is taken from it, in present prices.
+    `pot` has a row for each of `PERCENTILES` and a column for each of `pot_ages`"""
+
+    start_age: int
+    ages: np.ndarray
+    withdrawals: np.ndarray
+    pot: np.ndarray
+    depletion_ages: np.ndarray
+
+    @property
+    def pot_ages(self) -> np.ndarray:
+        """Ages at the start of each year withdrawn, and the end age"""
+        return self.start_age + np.arange(self.pot.shape[1])
+
+    @property
+    def survival_rate(self) -> float:
+        """Fraction of the return paths that still have money left at the end age"""
+        return float(np.isnan(self.depletion_ages).mean())
+
+
+def removal_rate_income(
+    pot: float, removal_rate: float, tax_year: str = DEFAULT_TAX_YEAR
+) -> float:
+    """Net income from withdrawing `removal_rate` % of `pot` in the first year, which
+    `simulate_drawdown` then keeps level in present prices"""
+    return float(net_income(max(pot, 0) * removal_rate / 100, tax_year))
+
+
+def simulate_drawdown(
+    pot: float,
+    start_age: int,
+    end_age: int,
+    net_income: float,
+    real_returns: float,
+    volatility: float,
+    inflation: float,
+    tax_year: str = DEFAULT_TAX_YEAR,
+) -> Drawdown:
+    """Withdraw `net_income` a year (present prices, grossed up for tax) from `pot` at the start
+    of each year from `start_age` to `end_age`, over `N_PATHS` random return paths at once.
+
+    Returns are normally distributed around `real_returns` (all rates in %). Tax thresholds are
+    taken as frozen, so the real cost of the income rises with `inflation`. Cached, as it's
+    rerun for every change to the retirement parameters"""
+    return _simulate_drawdown(
+        float(pot),
+        int(start_age),
+        int(end_age),
+        float(net_income),
+        float(real_returns),
+        float(volatility),
+        float(inflation),
+        tax_year,
+    )
+
+
+@lru_cache(maxsize=16)
+@disk_cached
+def _simulate_drawdown(
+    pot: float,
+    start_age: int,
+    end_age: int,
+    net_income: float,
+    real_returns: float,
+    volatility: float,
+    inflation: float,
+    tax_year: str,
+) -> Drawdown:
+    ages = np.arange(start_age, max(end_age, start_age))
+    prices = (1 + inflation / 100) ** np.arange(len(ages))
+    withdrawals = gross_income(net_income * prices, tax_year) / prices
+
+    rng = np.random.default_rng(SEED)
+    growth = 1 + rng.normal(real_returns, volatility, (len(ages), N_PATHS)) / 100
+    value = np.full(N_PATHS, pot)
+    pots = [value]
+    depletion_ages = np.full(N_PATHS, np.nan)
+    for age, withdrawal, year_growth in zip(ages, withdrawals, np.maximum(growth, 0)):
+        runs_out = np.isnan(depletion_ages) & (value < withdrawal)
+        depletion_ages[runs_out] = age
+        value = np.maximum(value - withdrawal, 0) * year_growth
+        pots.append(value)
+    return Drawdown(
+        start_age=start_age,
+        ages=ages,
+        withdrawals=withdrawals,
+        pot=np.percentile(np.array(pots), PERCENTILES, axis=1),
+        depletion_ages=depletion_ages,
+    )
@@ -0,0 +1,158 @@
+"""Forecast of net worth, projecting each asset class in the asset history forward with the
+trend and volatility seen so far.
+
+Classes that have always had a value grow at a constant rate (a straight line through the log
+of their values), while those that have been empty, typically savings built up by transfers,
+grow by a constant amount a year. Random shocks are added to both, correlated between classes
+as they have been historically, and all the classes are projected over `N_PATHS` random paths
+at once."""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from utils.history import AssetHistory, asset_history
+from utils.result_cache import disk_cached
+from utils.utils import DAYS_PER_YEAR, data_generation
+
+N_PATHS = 2_000
+SEED = 20241220  # Fixed, so the same inputs always give the same forecast
+PERCENTILES = (10, 50, 90)
+STEPS_PER_YEAR = 12
+
+
+@dataclass(frozen=True)
+class GrowthFit:
+    """Trend and volatility a year of each asset class: in log terms where `compounding`, and in
+    money otherwise. `correlation` is between the shocks to the classes"""
+
+    columns: list[str]
+    compounding: np.ndarray
+    trend: np.ndarray
+    volatility: np.ndarray
+    correlation: np.ndarray
+
+    def describe(self, column: str) -> str:
+        """The trend of a class as text, e.g. +5.1% a year, or +£2,400 a year if it doesn't
+        compound"""
+        idx = self.columns.index(column)
+        if self.compounding[idx]:
+            return f"{np.expm1(self.trend[idx]):+.1%} a year"
+        sign = "-" if self.trend[idx] < 0 else "+"
+        return f"{sign}£{abs(self.trend[idx]):,.0f} a year"
+
+
+@dataclass(frozen=True)
+class Forecast:
+    """Projected value of each class, and of their total, at each of `dates`. The first date is
+    the last in the history. `median` has a column for each class, `total` a row for each of
+    `PERCENTILES`"""
+
+    fit: GrowthFit
+    dates: np.ndarray
+    median: np.ndarray
+    total: np.ndarray
+
+
+def fit_growth(history: AssetHistory, columns: list[str]) -> GrowthFit:
+    """Fit the trend of `columns` by least squares over the whole history, and the volatility
+    and correlation from the changes between consecutive snapshots"""
+    order = np.argsort(history.dates)
+    dates = history.dates[order]
+    values = history.values[order][:, [history.columns.index(col) for col in columns]]
+    present = ~np.isnan(values)
+    compounding = np.where(present, values > 0, True).all(axis=0) & present.any(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        y = np.where(compounding, np.log(np.where(values > 0, values, np.nan)), values)
+    years = (dates - dates[0]).astype(float) / DAYS_PER_YEAR
+
+    valid = ~np.isnan(y)
+    n = np.maximum(valid.sum(axis=0), 1)
+    t = np.where(valid, years[:, None], 0)
+    t_centred = np.where(valid, t - t.sum(axis=0) / n, 0)
+    y_centred = np.where(valid, y - np.nansum(y, axis=0) / n, 0)
+    t_variance = (t_centred**2).sum(axis=0)
+    trend = np.divide(
+        (t_centred * y_centred).sum(axis=0),
+        t_variance,
+        out=np.zeros(len(columns)),
+        where=t_variance > 0,
+    )
+
+    # Shocks to each change, scaled to a year as the snapshots are at uneven intervals
+    dy = np.diff(y, axis=0)
+    dt = np.diff(years)[:, None]
+    changed = ~np.isnan(dy) & (dt > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shocks = np.where(changed, (dy - trend * dt) / np.sqrt(dt), 0)
+    counts = changed.astype(float)
+    covariance = (shocks.T @ shocks) / np.maximum(counts.T @ counts - 1, 1)
+    volatility = np.sqrt(np.diag(covariance))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = covariance / np.outer(volatility, volatility)
+    correlation = np.where(np.isfinite(correlation), correlation, 0)
+    np.fill_diagonal(correlation, 1)
+    return GrowthFit(
+        columns=columns,
+        compounding=compounding,
+        trend=trend,
+        volatility=volatility,
+        correlation=np.clip(correlation, -1, 1),
+    )
+
+
+def net_worth_forecast(years: int) -> Forecast:
+    """Forecast of each individual asset class `years` ahead. Cached for each horizon until the
+    data is updated"""
+    return _net_worth_forecast(int(years), data_generation())
+
+
+@lru_cache(maxsize=8)
+@disk_cached
+def _net_worth_forecast(years: int, generation: str) -> Forecast:
+    history = asset_history()
+    return forecast(history, history.base_columns, years)
+
+
+def forecast(history: AssetHistory, columns: list[str], years: int) -> Forecast:
+    fit = fit_growth(history, columns)
+    latest = np.argmax(history.dates)
+    start = history.values[latest, [history.columns.index(col) for col in columns]]
+    start = np.nan_to_num(start)
+    steps = max(int(years), 0) * STEPS_PER_YEAR
+    dt = 1 / STEPS_PER_YEAR
+
+    # Correlated shocks from the eigendecomposition, which unlike a Cholesky factor copes with
+    # classes that always move together
+    eigenvalues, eigenvectors = np.linalg.eigh(fit.correlation)
+    scale = eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+    rng = np.random.default_rng(SEED)
+    median = np.empty((steps + 1, len(columns)))
+    total = np.empty((len(PERCENTILES), steps + 1))
+    median[0] = start
+    total[:, 0] = start.sum()
+    # The paths are built a year at a time, carrying on from where the last year ended, so the
+    # memory used doesn't grow with the horizon
+    walk = np.zeros((N_PATHS, 1, len(columns)))
+    for first in range(0, steps, STEPS_PER_YEAR):
+        block = slice(first + 1, min(first + STEPS_PER_YEAR, steps) + 1)
+        n_steps = block.stop - block.start
+        shocks = rng.standard_normal((N_PATHS, n_steps, len(columns))) @ scale.T
+        shocks *= fit.volatility * np.sqrt(dt)
+        shocks += fit.trend * dt
+        walk = np.cumsum(shocks, axis=1, out=shocks) + walk[:, -1:]
+        paths = np.maximum(start + walk, 0)
+        paths[..., fit.compounding] = start[fit.compounding] * np.exp(
+            walk[..., fit.compounding]
+        )
+        median[block] = np.median(paths, axis=0)
+        total[:, block] = np.percentile(paths.sum(axis=2), PERCENTILES, axis=0)
+
+    days = np.round(np.arange(steps + 1) * DAYS_PER_YEAR * dt).astype(int)
+    return Forecast(
+        fit=fit,
+        dates=history.dates[latest] + days.astype("timedelta64[D]"),
+        median=median,
+        total=total,
+    )
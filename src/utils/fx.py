@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from utils.portfolio import Portfolio, load_portfolio
+from utils.timeseries import PriceMatrix, forward_fill
+from utils.utils import (
+    CURRENCY_SYMBOLS,
+    DATA_PATH,
+    FX_FILE,
+    QUOTE_CURRENCY,
+    TableData,
+    csv_to_dict,
+    data_generation,
+)
+
+
+@dataclass(frozen=True)
+class FxRates:
+    """Value of one unit of each currency in `QUOTE_CURRENCY`, on each date. Gaps are filled
+    with the previous rate"""
+
+    dates: np.ndarray
+    currencies: list[str]
+    values: np.ndarray
+
+    def factors(
+        self, dates: np.ndarray, currencies: list[str], base: str
+    ) -> np.ndarray:
+        """Multipliers converting amounts in `currencies` to `base`, using the latest rate on or
+        before each of `dates` (or the earliest rate, for dates before the first one)"""
+        positions = {currency: idx for idx, currency in enumerate(self.currencies)}
+        rows = np.searchsorted(self.dates, dates, side="right") - 1
+        rates = self.values[np.maximum(rows, 0)]
+        from_rates = rates[:, [positions[currency] for currency in currencies]]
+        return from_rates / rates[:, [positions[base]]]
+
+
+def currency_symbol(currency: str) -> str:
+    return CURRENCY_SYMBOLS.get(currency, f"{currency} ")
+
+
+def fx_rates() -> FxRates:
+    """Exchange rates from `FX_FILE`, or only `QUOTE_CURRENCY` if there is no such file"""
+    return _fx_rates(data_generation())
+
+
+@lru_cache(maxsize=1)
+def _fx_rates(generation: str) -> FxRates:
+    if not (DATA_PATH / FX_FILE).exists():
+        return FxRates(
+            dates=np.array(["1970-01-01"], dtype="datetime64[D]"),
+            currencies=[QUOTE_CURRENCY],
+            values=np.ones((1, 1)),
+        )
+    table = PriceMatrix.from_table(csv_to_dict(FX_FILE))
+    currencies = [col for col in table.columns if col != QUOTE_CURRENCY]
+    values = forward_fill(table.values[:, table.column_indices(currencies)])
+    values = np.column_stack([np.ones(len(table.dates)), values])
+    # Backfill rates before each currency's first quote with that first quote
+    first = np.argmax(~np.isnan(values), axis=0)
+    values = np.where(
+        np.isnan(values), values[first, np.arange(values.shape[1])], values
+    )
+    return FxRates(
+        dates=table.dates, currencies=[QUOTE_CURRENCY, *currencies], values=values
+    )
+
+
+def available_currencies() -> list[str]:
+    return fx_rates().currencies
+
+
+def commodity_currencies(summary: TableData, commodities: list[str]) -> list[str]:
+    """Currency each commodity is priced in, from the optional `commodity_currency` summary
+    column. Anything not listed is taken to be priced in `QUOTE_CURRENCY`"""
+    listed = {
+        row["commodity"]: row["commodity_currency"]
+        for row in summary
+        if isinstance(row.get("commodity_currency"), str) and row["commodity_currency"]
+    }
+    known = set(available_currencies())
+    return [
+        listed[c] if listed.get(c) in known else QUOTE_CURRENCY for c in commodities
+    ]
+
+
+def converted_prices(prefix: str, base: str) -> PriceMatrix:
+    """Price series of a portfolio converted to `base`. Kept with the loaded portfolio for each
+    currency, so switching display currency back and forth doesn't redo the conversion, and
+    the converted prices are freed along with the portfolio when it is evicted or reloaded
+    """
+    portfolio = load_portfolio(prefix)
+    key = ("converted_prices", base)
+    if (prices := portfolio.derived.get(key)) is None:
+        prices = portfolio.derived[key] = _convert_prices(portfolio, base)
+    return prices
+
+
+def _convert_prices(portfolio: Portfolio, base: str) -> PriceMatrix:
+    prices = portfolio.price_matrix
+    currencies = commodity_currencies(portfolio.summary, prices.columns)
+    if base == QUOTE_CURRENCY and set(currencies) == {QUOTE_CURRENCY}:
+        return prices
+    factors = fx_rates().factors(prices.dates, currencies, base)
+    return PriceMatrix(
+        dates=prices.dates, columns=prices.columns, values=prices.values * factors
+    )
+
+
+def convert_summary(summary: TableData, base: str) -> TableData:
+    """Copy of a portfolio summary with prices and values converted to `base` at the latest
+    rates. Prices are in each commodity's own currency, while values are already in
+    `QUOTE_CURRENCY`, so the share of each holding is unchanged"""
+    commodities = [row["commodity"] for row in summary]
+    currencies = commodity_currencies(summary, commodities)
+    if base == QUOTE_CURRENCY and set(currencies) == {QUOTE_CURRENCY}:
+        return summary
+    rates = fx_rates()
+    factors = rates.factors(rates.dates[-1:], [*currencies, QUOTE_CURRENCY], base)[0]
+    value_factor = factors[-1]
+    return [
+        {
+            **row,
+            "latest_price": row["latest_price"] * factor,
+            "value": row["value"] * value_factor,
+        }
+        for row, factor in zip(summary, factors[:-1])
+    ]
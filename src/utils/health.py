@@ -0,0 +1,113 @@
+"""Health checks for the process supervisor and load balancer.
+
+`/healthz` answers as long as the worker is running. `/readyz` answers 200 once the app has
+been built and the data files it lists are present, and 503 before then, so rolling restarts
+can wait for each worker. Both report the data generation, the age of each data file, load
+times and the worker's memory. They only stat files, so are cheap enough to poll every few
+seconds. Data older than `STALE_AFTER_HOURS` is flagged as stale, but the worker stays ready, as
+every worker would be serving the same data."""
+
+import datetime
+import json
+import os
+import resource
+import threading
+import time
+
+from dash import Dash
+from flask import Response, jsonify
+
+from utils.portfolio import loaded_portfolio_load_times
+from utils.utils import DATA_PATH, UPDATE_LOG, data_generation
+
+STALE_AFTER_HOURS = float(os.environ.get("MONEY_DASHBOARD_STALE_HOURS", "48"))
+
+_started = time.monotonic()
+_ready = threading.Event()
+_startup_seconds: float | None = None
+
+
+def mark_ready() -> None:
+    """Record that the app has been built and can serve requests"""
+    global _startup_seconds
+    _startup_seconds = time.monotonic() - _started
+    _ready.set()
+
+
+def register_health(app: Dash) -> None:
+    prefix = app.config.routes_pathname_prefix
+
+    @app.server.route(f"{prefix}healthz")
+    def healthz() -> Response:
+        return _no_store(jsonify(status="ok", **_worker()))
+
+    @app.server.route(f"{prefix}readyz")
+    def readyz() -> Response:
+        data = data_status()
+        ready = _ready.is_set() and not data["missing_files"] and "error" not in data
+        response = jsonify(
+            status="ready" if ready else "not ready", **_worker(), **data
+        )
+        response.status_code = 200 if ready else 503
+        return _no_store(response)
+
+
+def _no_store(response: Response) -> Response:
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def _worker() -> dict:
+    return {
+        "pid": os.getpid(),
+        "uptime_seconds": round(time.monotonic() - _started, 1),
+        "startup_seconds": (
+            None if _startup_seconds is None else round(_startup_seconds, 3)
+        ),
+        "memory_bytes": _resident_memory(),
+        "peak_memory_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "portfolio_load_seconds": {
+            prefix: round(seconds, 3)
+            for prefix, seconds in loaded_portfolio_load_times().items()
+        },
+    }
+
+
+def _resident_memory() -> int | None:
+    """Current resident set size, where /proc is available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def data_status() -> dict:
+    """Generation of the data, how long ago it and each listed file were written, and whether
+    it is stale"""
+    now = time.time()
+    try:
+        generation = data_generation()
+        with open(UPDATE_LOG) as f:
+            log = json.load(f)
+        files = log["files"]
+    except (OSError, ValueError, KeyError) as e:
+        return {"error": f"Can't read {UPDATE_LOG.name}: {e}", "missing_files": []}
+    try:
+        written = datetime.datetime.fromisoformat(log["time"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        written = UPDATE_LOG.stat().st_mtime
+    ages, missing = {}, []
+    for file in files:
+        try:
+            ages[file] = round(now - (DATA_PATH / file).stat().st_mtime)
+        except FileNotFoundError:
+            missing.append(file)
+    age = now - written
+    return {
+        "generation": generation,
+        "generation_age_seconds": round(age),
+        "stale": age > STALE_AFTER_HOURS * 3600,
+        "file_age_seconds": ages,
+        "missing_files": missing,
+    }
@@ -0,0 +1,209 @@
+"""Append-only binary store of asset value snapshots, read with a memory map.
+
+File layout (little-endian)::
+
+    8 bytes   magic, b"MDHIST01"
+    4 bytes   uint32, number of value columns
+    4 bytes   uint32, length of the column names block
+    n bytes   column names, UTF-8, newline separated, padded with spaces to a multiple of 8
+    records   int64 date (days since 1970-01-01), then a float64 per column
+
+Records are in date order, so adding a snapshot only appends one record to the end of the
+file. A record cut short by an interrupted write is ignored when reading.
+
+Convert the existing CSV history (from `src`) with::
+
+    python -m utils.history
+"""
+
+import struct
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from utils.utils import DATA_PATH, TableData, csv_to_dict, data_generation
+
+HISTORY_FILE = "assets_history.bin"
+HISTORY_CSV = "assets_time_series.csv"
+MAGIC = b"MDHIST01"
+_HEADER = struct.Struct("<8sII")
+# Columns exported as sums of the others, so not added into the totals of a selection
+TOTAL_COLUMNS = ("Available Total", "Total")
+
+
+class HistoryError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class AssetHistory:
+    """Asset values by date, oldest first. When read from the binary store `values` is a view of
+    the memory-mapped file rather than a copy"""
+
+    dates: np.ndarray
+    columns: list[str]
+    values: np.ndarray
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self.columns.index(name)]
+
+    @property
+    def base_columns(self) -> list[str]:
+        """The individual assets, without the exported totals"""
+        return [col for col in self.columns if col not in TOTAL_COLUMNS]
+
+    def subset_mask(self, chosen: list[str]) -> int:
+        """Bitmask of the chosen assets, with bit i set for `base_columns[i]`"""
+        return sum(
+            1 << idx for idx, col in enumerate(self.base_columns) if col in chosen
+        )
+
+
+@dataclass(frozen=True)
+class SubsetTotal:
+    """Total value of a selection of assets on each date, and each one's share of it"""
+
+    columns: list[str]
+    total: np.ndarray
+    share: np.ndarray
+
+
+def asset_history() -> AssetHistory:
+    """History of the asset values, from `HISTORY_FILE` if it exists or else `HISTORY_CSV`.
+    Reopened when the data is updated"""
+    return _asset_history(data_generation())
+
+
+@lru_cache(maxsize=1)
+def _asset_history(generation: str) -> AssetHistory:
+    if (DATA_PATH / HISTORY_FILE).exists():
+        return read_history(DATA_PATH / HISTORY_FILE)
+    return history_from_table(csv_to_dict(HISTORY_CSV))
+
+
+def subset_total(mask: int) -> SubsetTotal:
+    """Sum of the assets selected by `mask` (see `AssetHistory.subset_mask`). Cached for each
+    selection until the data is updated"""
+    return _subset_total(mask, data_generation())
+
+
+@lru_cache(maxsize=64)
+def _subset_total(mask: int, generation: str) -> SubsetTotal:
+    return history_subset_total(asset_history(), mask)
+
+
+def history_subset_total(history: AssetHistory, mask: int) -> SubsetTotal:
+    base = history.base_columns
+    selected = np.array([bool(mask >> idx & 1) for idx in range(len(base))])
+    values = history.values[:, [history.columns.index(col) for col in base]]
+    # One pass over the history, whatever the selection. Deselected columns are zeroed rather
+    # than multiplied by zero, so that their gaps (NaN) don't leak into the total
+    total = np.where(selected, values, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = values[:, selected] / total[:, None]
+    return SubsetTotal(
+        columns=[col for col, chosen in zip(base, selected) if chosen],
+        total=total,
+        share=share,
+    )
+
+
+def history_from_table(table: TableData) -> AssetHistory:
+    """History from CSV rows with a `date` column, in any order. Columns without a name (such as
+    a saved pandas index) are dropped"""
+    table = sorted(table, key=lambda row: row["date"])
+    columns = [col for col in table[0] if col and col != "date"]
+    return AssetHistory(
+        dates=np.array([row["date"] for row in table], dtype="datetime64[D]"),
+        columns=columns,
+        values=np.array([[row[col] for col in columns] for row in table], dtype=float),
+    )
+
+
+def _record_dtype(columns: list[str]) -> np.dtype:
+    return np.dtype([("date", "<i8"), ("values", "<f8", (len(columns),))])
+
+
+def _write_header(path: Path, columns: list[str]) -> None:
+    names = "\n".join(columns).encode()
+    names += b" " * (-len(names) % 8)
+    with open(path, "xb") as f:
+        f.write(_HEADER.pack(MAGIC, len(columns), len(names)) + names)
+
+
+def _read_header(path: Path) -> tuple[list[str], int]:
+    """Column names, and the offset of the first record"""
+    with open(path, "rb") as f:
+        magic, n_columns, names_length = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise HistoryError(f"{path} is not an asset history file")
+        columns = f.read(names_length).decode().rstrip(" ").split("\n")
+    if len(columns) != n_columns:
+        raise HistoryError(f"{path} has a corrupt header")
+    return columns, _HEADER.size + names_length
+
+
+def read_history(path: Path) -> AssetHistory:
+    """Memory map the history file. Nothing is read until the values are used"""
+    columns, offset = _read_header(path)
+    dtype = _record_dtype(columns)
+    n_records = (path.stat().st_size - offset) // dtype.itemsize
+    if n_records == 0:
+        records = np.zeros(0, dtype=dtype)
+    else:
+        records = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=n_records)
+    return AssetHistory(
+        dates=records["date"].view("datetime64[D]"),
+        columns=columns,
+        values=records["values"],
+    )
+
+
+def append_snapshot(path: Path, date, values: dict[str, float]) -> None:
+    """Add the asset values on `date` to the end of the history, creating the file with these
+    columns if needed. The date must be later than the last one stored, any column missing
+    from `values` is stored as NaN, and a column the file doesn't have is an error"""
+    append_snapshots(path, np.array([date], dtype="datetime64[D]"), [values])
+
+
+def append_snapshots(
+    path: Path, dates: np.ndarray, rows: list[dict[str, float]]
+) -> None:
+    if not rows:
+        return
+    if not path.exists():
+        _write_header(path, [col for col in rows[0] if col and col != "date"])
+    columns, offset = _read_header(path)
+    unknown = {col for row in rows for col in row if col and col != "date"} - set(
+        columns
+    )
+    if unknown:
+        raise HistoryError(f"{path} has no columns {', '.join(sorted(unknown))}")
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    history = read_history(path)
+    last = history.dates[-1] if len(history.dates) else np.datetime64("NaT", "D")
+    if (np.diff(dates) <= np.timedelta64(0, "D")).any() or dates[0] <= last:
+        raise HistoryError("Snapshots must be added in date order")
+
+    records = np.zeros(len(rows), dtype=_record_dtype(columns))
+    records["date"] = dates.astype(np.int64)
+    records["values"] = [[row.get(col, np.nan) for col in columns] for row in rows]
+    with open(path, "r+b") as f:
+        # Drop any partial record left by an interrupted append
+        f.truncate(offset + len(history.dates) * records.dtype.itemsize)
+        f.seek(0, 2)
+        f.write(records.tobytes())
+
+
+def import_csv(csv_file: str = HISTORY_CSV, history_file: str = HISTORY_FILE) -> int:
+    """Create the binary history from the CSV history. Returns the number of snapshots"""
+    history = history_from_table(csv_to_dict(csv_file))
+    rows = [dict(zip(history.columns, row)) for row in history.values.tolist()]
+    append_snapshots(DATA_PATH / history_file, history.dates, rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    print(f"Imported {import_csv()} snapshots to {DATA_PATH / HISTORY_FILE}")
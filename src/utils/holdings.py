@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.portfolio import discover_portfolios, load_portfolio
+from utils.utils import RETURNS_YEARS, TableData, data_generation
+
+MISSING_IDS = ("", "n/a", "unknown")
+RETURNS_COLUMNS = [f"annualised{y}_percent" for y in RETURNS_YEARS]
+DESCRIPTION_COLUMNS = ["commodity", "commodity_name", "commodity_type"]
+
+
+@dataclass(frozen=True)
+class Holdings:
+    """Holdings combined across every portfolio"""
+
+    by_commodity: TableData
+    by_type: TableData
+    total_value: float
+
+
+def holdings_summary() -> Holdings:
+    """Holdings combined across all portfolios, recalculated only when the data is updated"""
+    return _holdings_summary(data_generation())
+
+
+@lru_cache(maxsize=1)
+def _holdings_summary(generation: str) -> Holdings:
+    # Through the portfolio cache, so the portfolios already loaded aren't read again
+    summaries = {
+        prefix: load_portfolio(prefix).summary for prefix in discover_portfolios()
+    }
+    return aggregate_holdings(summaries)
+
+
+def aggregate_holdings(summaries: dict[str, TableData]) -> Holdings:
+    """Join the portfolio summaries on `commodity_id` (or `commodity` where there is no id) and
+    sum the quantities and values. Returns are re-weighted by value, ignoring holdings with no
+    return for that period"""
+    rows = pd.concat(
+        [
+            pd.DataFrame(summary).assign(portfolio=prefix)
+            for prefix, summary in summaries.items()
+        ],
+        ignore_index=True,
+    )
+    key = rows["commodity_id"].where(
+        ~rows["commodity_id"].isin(MISSING_IDS) & rows["commodity_id"].notna(),
+        rows["commodity"],
+    )
+    value = rows["value"].to_numpy()
+    returns = rows[RETURNS_COLUMNS].to_numpy(dtype=float)
+    sums = (
+        pd.DataFrame(
+            {
+                "quantity": rows["quantity"],
+                "value": value,
+                **_weighted_columns(returns, value),
+            }
+        )
+        .groupby(key.to_numpy(), sort=False)
+        .sum()
+    )
+    by_commodity = _weighted_returns(sums)
+    described = rows.groupby(key.to_numpy(), sort=False)
+    by_commodity[DESCRIPTION_COLUMNS] = described[DESCRIPTION_COLUMNS].first()
+    by_commodity["portfolios"] = described["portfolio"].agg(", ".join)
+    total_value = float(by_commodity["value"].sum())
+    by_commodity["percent_value"] = by_commodity["value"] / total_value
+
+    # The type mix reuses the weighted sums from the single pass over the holdings
+    by_type = _weighted_returns(sums.groupby(by_commodity["commodity_type"]).sum())
+    by_type = by_type.drop(columns="quantity")
+    by_type["percent_value"] = by_type["value"] / total_value
+
+    by_commodity = by_commodity.rename_axis("commodity_id").reset_index()
+    by_type = by_type.reset_index()
+    return Holdings(
+        by_commodity=by_commodity.sort_values("value", ascending=False).to_dict(
+            "records"
+        ),
+        by_type=by_type.sort_values("value", ascending=False).to_dict("records"),
+        total_value=total_value,
+    )
+
+
+def _weighted_columns(returns: np.ndarray, value: np.ndarray) -> dict[str, np.ndarray]:
+    """Value-weighted returns and the weights used, ready to be summed by group"""
+    weights = ~np.isnan(returns) * value[:, None]
+    weighted = np.nan_to_num(returns) * weights
+    columns = {}
+    for idx, col in enumerate(RETURNS_COLUMNS):
+        columns[f"{col}_weighted"] = weighted[:, idx]
+        columns[f"{col}_weight"] = weights[:, idx]
+    return columns
+
+
+def _weighted_returns(sums: pd.DataFrame) -> pd.DataFrame:
+    """Turn summed weighted returns back into returns, dropping the intermediate columns"""
+    result = sums[["quantity", "value"]].copy()
+    for col in RETURNS_COLUMNS:
+        weight = sums[f"{col}_weight"]
+        result[col] = (sums[f"{col}_weighted"] / weight).where(weight > 0)
+    return result
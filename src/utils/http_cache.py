@@ -0,0 +1,62 @@
+import hashlib
+
+from dash import Dash
+from flask import Response, g, request
+
+from utils.utils import BASE_PATH, data_generation
+
+STATIC_MAX_AGE = 7 * 24 * 60 * 60  # For files in /assets, which aren't fingerprinted
+
+
+def _code_version() -> str:
+    """Changes whenever the app's source is edited, so a new deployment invalidates ETags"""
+    mtimes = sorted(path.stat().st_mtime_ns for path in BASE_PATH.rglob("*.py"))
+    return str(mtimes[-1] if mtimes else 0)
+
+
+CODE_VERSION = _code_version()
+
+
+def register_http_caching(app: Dash) -> None:
+    """Add ETags to the Dash layout responses, derived from the code and data generation so that
+    they change when either does. Requests sending a matching `If-None-Match` get an empty 304
+    without the layout being serialised. The ETags are weak, as the same content may be sent
+    gzip or brotli compressed.
+
+    Callback responses aren't given ETags, as they also depend on state that isn't part of the
+    data generation, such as the saved retirement scenarios and background job progress
+    """
+    prefix = app.config.routes_pathname_prefix
+    layout_routes = {prefix, f"{prefix}_dash-layout", f"{prefix}_dash-dependencies"}
+    assets_route = f"{prefix}assets/"
+
+    @app.server.before_request
+    def check_etag():
+        if request.method != "GET" or request.path not in layout_routes:
+            return None
+        g.etag = _etag()
+        if request.if_none_match.contains_weak(g.etag):
+            return _not_modified(g.etag)
+        return None
+
+    @app.server.after_request
+    def add_cache_headers(response: Response) -> Response:
+        etag = g.pop("etag", None)
+        if etag and response.status_code == 200:
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = "private, no-cache"
+        elif request.path.startswith(assets_route) and response.status_code == 200:
+            # Replaces the no-cache that Flask sends files with by default
+            response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}"
+        return response
+
+
+def _etag() -> str:
+    return hashlib.sha1(f"{CODE_VERSION}:{data_generation()}".encode()).hexdigest()
+
+
+def _not_modified(etag: str) -> Response:
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,221 @@
+"""Streaming parser for transaction files, and the positions they build up.
+
+Two formats are read, both one transaction per buy / sell / dividend / fee, in date order:
+
+CSV (`<prefix>_transactions.csv`)::
+
+    date,action,commodity,quantity,amount
+    2024-01-05,buy,AZN,10,1000.00
+    2024-03-01,dividend,AZN,0,12.50
+
+Ledger-style journal (`<prefix>_transactions.journal`)::
+
+    2024-01-05 * Buy AstraZeneca
+        Assets:Investments:AZN      10 AZN @ 100.00
+        Assets:Cash
+    2024-03-01 Dividend
+        Income:Dividends:AZN        -12.50 GBP
+        Assets:Cash
+
+In a journal, postings with a commodity are buys (positive quantity) or sells (negative), priced
+with `@` (unit price) or `@@` (total). Amounts in a currency (those in `CURRENCY_SYMBOLS`) are
+money rather than a commodity. Postings to `Income:Dividends:<commodity>` and
+`Expenses:Fees[:<commodity>]` are dividends and fees. Other postings only balance the cash.
+"""
+
+import csv
+import datetime
+import logging
+import re
+from collections.abc import Iterable, Iterator
+from enum import StrEnum
+from pathlib import Path
+from typing import NamedTuple, TextIO
+
+from utils.utils import CURRENCY_SYMBOLS, DATA_PATH, TableData
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIXES = (".journal", ".ledger")
+_HEADER = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:\s+[*!])?(?:\s+(.*))?$")
+_POSTING = re.compile(
+    r"^\s+(?P<account>\S+(?: \S+)*)"
+    r"(?:\s{2,}|\t)\s*(?P<quantity>-?[£$€\d,.]+)"
+    r"(?:\s+(?P<commodity>[A-Za-z][\w.&]*|\"[^\"]+\"))?"
+    r"(?:\s+(?P<at>@@?)\s+(?P<price>[£$€\d,.]+)(?:\s+[A-Z]{3})?)?\s*$"
+)
+
+
+class Action(StrEnum):
+    BUY = "buy"
+    SELL = "sell"
+    DIVIDEND = "dividend"
+    FEE = "fee"
+
+
+class Transaction(NamedTuple):
+    date: datetime.date
+    action: Action
+    commodity: str
+    quantity: float
+    amount: float  # Cash value of the transaction, always positive
+
+
+class LedgerError(ValueError):
+    """A transaction file could not be understood"""
+
+
+def transactions_file(prefix: str) -> Path | None:
+    """The transaction file exported for a portfolio, if there is one"""
+    for suffix in (".csv", *JOURNAL_SUFFIXES):
+        path = DATA_PATH / f"{prefix}_transactions{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def read_transactions(path: Path) -> Iterator[Transaction]:
+    """Stream the transactions in a file, checking they are in date order. Only one line (or one
+    journal entry) is held in memory at a time"""
+    with open(path) as f:
+        if path.suffix in JOURNAL_SUFFIXES:
+            transactions = parse_journal(f)
+        else:
+            transactions = parse_csv(f)
+        last_date = datetime.date.min
+        for transaction in transactions:
+            if transaction.date < last_date:
+                raise LedgerError(
+                    f"{path.name}: {transaction.date} is before {last_date}, "
+                    "transactions must be in date order"
+                )
+            last_date = transaction.date
+            yield transaction
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[Transaction]:
+    for line_num, row in enumerate(csv.DictReader(lines), start=2):
+        if missing := [col for col, value in row.items() if value is None]:
+            raise LedgerError(f"line {line_num}: no {', '.join(missing)}")
+        try:
+            yield Transaction(
+                date=datetime.date.fromisoformat(row["date"]),
+                action=Action(row["action"].strip().lower()),
+                commodity=row["commodity"].strip(),
+                quantity=abs(_number(row["quantity"] or "0")),
+                amount=abs(_number(row["amount"] or "0")),
+            )
+        except (KeyError, ValueError) as e:
+            raise LedgerError(f"line {line_num}: {e}") from e
+
+
+def parse_journal(lines: TextIO | Iterable[str]) -> Iterator[Transaction]:
+    date = None
+    for line_num, line in enumerate(lines, start=1):
+        line = line.split(";", 1)[0].rstrip()
+        if not line.strip():
+            continue
+        if not line[0].isspace():
+            header = _HEADER.match(line)
+            if header is None:
+                raise LedgerError(f"line {line_num}: not a transaction header: {line}")
+            date = datetime.date.fromisoformat(header.group(1))
+            continue
+        if date is None:
+            raise LedgerError(f"line {line_num}: posting before any transaction header")
+        posting = _POSTING.match(line)
+        if posting is None:
+            continue  # A posting with no amount, which balances the transaction
+        try:
+            transaction = _posting_transaction(date, posting)
+        except ValueError as e:
+            raise LedgerError(f"line {line_num}: {e}") from e
+        if transaction is not None:
+            yield transaction
+
+
+def _posting_transaction(date: datetime.date, posting: re.Match) -> Transaction | None:
+    account = posting["account"]
+    quantity = _number(posting["quantity"])
+    commodity = (posting["commodity"] or "").strip('"')
+    if commodity and commodity not in CURRENCY_SYMBOLS:
+        if posting["at"] == "@@":
+            amount = _number(posting["price"])
+        elif posting["at"] == "@":
+            amount = abs(quantity) * _number(posting["price"])
+        else:
+            amount = 0.0
+        action = Action.BUY if quantity > 0 else Action.SELL
+        return Transaction(date, action, commodity, abs(quantity), abs(amount))
+    account_parts = account.split(":")
+    if account.lower().startswith("income:dividend"):
+        return Transaction(date, Action.DIVIDEND, account_parts[-1], 0.0, abs(quantity))
+    if account.lower().startswith("expenses:fee"):
+        commodity = account_parts[-1] if len(account_parts) > 2 else ""
+        return Transaction(date, Action.FEE, commodity, 0.0, abs(quantity))
+    return None
+
+
+def _number(text: str) -> float:
+    return float(text.strip().lstrip("£$€").replace(",", ""))
+
+
+def positions_by_date(
+    transactions: Iterable[Transaction],
+) -> Iterator[tuple[datetime.date, dict[str, float]]]:
+    """Running quantity of each commodity, yielded at the end of each date that has transactions.
+    Memory depends only on the number of commodities, not the number of transactions"""
+    positions: dict[str, float] = {}
+    date = None
+    for transaction in transactions:
+        if date is not None and transaction.date != date:
+            yield date, dict(positions)
+        date = transaction.date
+        if transaction.action == Action.BUY:
+            positions[transaction.commodity] = (
+                positions.get(transaction.commodity, 0.0) + transaction.quantity
+            )
+        elif transaction.action == Action.SELL:
+            positions[transaction.commodity] = (
+                positions.get(transaction.commodity, 0.0) - transaction.quantity
+            )
+    if date is not None:
+        yield date, dict(positions)
+
+
+def final_positions(transactions: Iterable[Transaction]) -> dict[str, float]:
+    """Quantity of each commodity held after the last transaction"""
+    positions = {}
+    for _, positions in positions_by_date(transactions):
+        pass
+    return positions
+
+
+def apply_positions(summary: TableData, positions: dict[str, float]) -> TableData:
+    """Replace the quantities in a portfolio summary with those from the transaction ledger and
+    update the values to match. Commodities not in the ledger keep their exported quantity, and
+    those held according to the ledger but not in the summary are logged, as they have no price.
+
+    Values stay in `QUOTE_CURRENCY`, like the export: prices are converted at the rate implied
+    by each holding's exported value, or taken as already in `QUOTE_CURRENCY` if it has none
+    """
+    for row in summary:
+        if row["commodity"] in positions:
+            exported = row["quantity"] * row["latest_price"]
+            rate = row["value"] / exported if exported and row["value"] else 1.0
+            row["quantity"] = positions[row["commodity"]]
+            row["value"] = row["quantity"] * row["latest_price"] * rate
+    in_summary = {row["commodity"] for row in summary}
+    if unpriced := sorted(
+        commodity
+        for commodity, quantity in positions.items()
+        if quantity and commodity not in in_summary
+    ):
+        logger.warning(
+            "Held in the transaction ledger but not in the summary, so not valued: %s",
+            ", ".join(unpriced),
+        )
+    total_value = sum(row["value"] for row in summary)
+    for row in summary:
+        row["percent_value"] = row["value"] / total_value if total_value else 0.0
+    return summary
@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+
+from utils.ledger import (
+    apply_positions,
+    final_positions,
+    read_transactions,
+    transactions_file,
+)
+from utils.timeseries import PriceMatrix
+from utils.utils import (
+    DATA_PATH,
+    RETURNS_YEARS,
+    TableData,
+    csv_to_dict,
+    data_generation,
+)
+
+PORTFOLIO_FILES = ("summary", "price_time_series", "average_returns", "grouped_by_type")
+MAX_LOADED_PORTFOLIOS = 2
+MAX_IDLE_SECONDS = 15 * 60
+
+
+@dataclass
+class Portfolio:
+    """All of the data exported for one portfolio, e.g. `investments_*.csv`"""
+
+    prefix: str
+    generation: str
+    summary: TableData
+    prices: TableData
+    avg_returns: TableData
+    grouped_assets: TableData
+    last_used: float = field(default=0.0, compare=False)
+    load_seconds: float = field(default=0.0, compare=False)
+    # Results derived from the data, such as the prices in other currencies, kept here so they
+    # are freed with the portfolio when it is evicted
+    derived: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def total_value(self) -> float:
+        return sum(float(row["value"]) for row in self.summary)
+
+    @cached_property
+    def price_matrix(self) -> PriceMatrix:
+        return PriceMatrix.from_table(self.prices)
+
+
+_loaded: OrderedDict[str, Portfolio] = OrderedDict()
+_lock = threading.Lock()
+
+
+def discover_portfolios() -> list[str]:
+    """Prefixes of every portfolio in the data directory that has a complete set of files"""
+    prefixes = (
+        path.name.removesuffix("_summary.csv")
+        for path in DATA_PATH.glob("*_summary.csv")
+    )
+    return sorted(
+        prefix
+        for prefix in prefixes
+        if all(
+            (DATA_PATH / f"{prefix}_{name}.csv").exists() for name in PORTFOLIO_FILES
+        )
+    )
+
+
+def load_portfolio(prefix: str) -> Portfolio:
+    """Return the data for a portfolio, reading the files on first use or after a data update.
+    Portfolios not used recently are evicted so memory stays flat as more are added"""
+    generation = data_generation()
+    now = time.monotonic()
+    with _lock:
+        portfolio = _loaded.pop(prefix, None)
+        if portfolio is None or portfolio.generation != generation:
+            portfolio = _read_portfolio(prefix, generation)
+            portfolio.load_seconds = time.monotonic() - now
+        portfolio.last_used = now
+        _loaded[prefix] = portfolio
+        _evict(now)
+    return portfolio
+
+
+def loaded_portfolios() -> list[str]:
+    """Prefixes of the portfolios currently held in memory, least recently used first"""
+    with _lock:
+        return list(_loaded)
+
+
+def loaded_portfolio_load_times() -> dict[str, float]:
+    """Seconds taken to read each portfolio held in memory"""
+    with _lock:
+        return {prefix: portfolio.load_seconds for prefix, portfolio in _loaded.items()}
+
+
+def read_summary(prefix: str, prices: TableData | None = None) -> TableData:
+    """The exported summary of a portfolio, with quantities taken from its transaction ledger
+    when there is one. Returns over any of `RETURNS_YEARS` not in the export are calculated from
+    `prices`, which are read if not given"""
+    summary = csv_to_dict(f"{prefix}_summary.csv")
+    if ledger := transactions_file(prefix):
+        apply_positions(summary, final_positions(read_transactions(ledger)))
+    missing = [y for y in RETURNS_YEARS if f"annualised{y}_percent" not in summary[0]]
+    if missing:
+        if prices is None:
+            prices = csv_to_dict(f"{prefix}_price_time_series.csv")
+        add_horizon_returns(summary, PriceMatrix.from_table(prices), missing)
+    return summary
+
+
+def add_horizon_returns(
+    summary: TableData, prices: PriceMatrix, years: list[int]
+) -> TableData:
+    """Add the returns columns of the export for each of `years` to the rows of a summary, from
+    the price at the start of the horizon to the latest. NaN for commodities without a price
+    then, and for all of them if the prices don't go back that far"""
+    columns = prices.column_indices([row["commodity"] for row in summary])
+    latest = np.array([row["latest_price"] for row in summary], dtype=float)
+    value = np.array([row["value"] for row in summary], dtype=float)
+    for y in years:
+        start = prices.filled[prices.horizons.start(y), np.maximum(columns, 0)]
+        start = np.where((columns >= 0) & prices.horizons.covers(y), start, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = latest / start
+            annualised = ratio ** (1 / y) - 1
+        for row, price, r, a, v in zip(
+            summary, start.tolist(), ratio.tolist(), annualised.tolist(), value.tolist()
+        ):
+            row[f"price_year{y}"] = price
+            row[f"year{y}"] = r
+            row[f"year{y}_percent"] = r - 1
+            row[f"annualised{y}_percent"] = a
+            # Weighted by the annualised return, like the export, so that the sum over the
+            # holdings divided by their value is the portfolio's annualised return
+            row[f"year{y}_percent_value"] = v * a
+    return summary
+
+
+def add_average_returns(avg_returns: TableData, summary: TableData) -> TableData:
+    """Add the whole-portfolio returns over any of `RETURNS_YEARS` not in the export: the
+    annualised returns of the holdings with a price at the start of the horizon, weighted by
+    their value over the total value. NaN if none of the holdings had a price then"""
+    total_value = sum(row["value"] for row in summary)
+    for row in avg_returns:
+        for y in RETURNS_YEARS:
+            if f"year{y}" not in row:
+                change = np.array([r[f"year{y}_percent_value"] for r in summary])
+                if np.isnan(change).all() or not total_value:
+                    row[f"year{y}"] = float("nan")
+                else:
+                    row[f"year{y}"] = float(np.nansum(change) / total_value)
+    return avg_returns
+
+
+def _read_portfolio(prefix: str, generation: str) -> Portfolio:
+    prices = csv_to_dict(f"{prefix}_price_time_series.csv")
+    summary = read_summary(prefix, prices)
+    return Portfolio(
+        prefix=prefix,
+        generation=generation,
+        summary=summary,
+        prices=prices,
+        avg_returns=add_average_returns(
+            csv_to_dict(f"{prefix}_average_returns.csv"), summary
+        ),
+        grouped_assets=csv_to_dict(f"{prefix}_grouped_by_type.csv"),
+    )
+
+
+def _evict(now: float) -> None:
+    """Drop the least recently used portfolios beyond the limit, and any left idle too long.
+    The most recently used portfolio is always kept"""
+    while len(_loaded) > 1:
+        prefix, portfolio = next(iter(_loaded.items()))
+        if (
+            len(_loaded) <= MAX_LOADED_PORTFOLIOS
+            and now - portfolio.last_used < MAX_IDLE_SECONDS
+        ):
+            break
+        del _loaded[prefix]
@@ -0,0 +1,225 @@
+"""Results of expensive calculations kept on disk, so they are shared by all the server's workers
+and survive restarts.
+
+Entries are named by a hash of the function, its arguments and the app's source code, so a
+change to anything a cached function calls is never served a stale result. The cached functions
+take the data generation as an argument, so results of old data are never read again and are
+evicted, least recently used first, once the cache is over its size limit. Writes go to a
+temporary file that is renamed into place, so readers never see a partial entry, and eviction
+takes a lock shared between processes.
+
+Each process keeps a running total of the cache size, starting from a scan of the directory and
+corrected by every eviction, rather than scanning on each write. Entries written by the other
+workers since are only counted by them, so the cache can briefly go over its limit."""
+
+import fcntl
+import functools
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from utils.utils import BASE_PATH, CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_PATH = Path(
+    os.environ.get("MONEY_DASHBOARD_RESULT_CACHE_DIR", CACHE_PATH / "results")
+)
+# Set MONEY_DASHBOARD_RESULT_CACHE_MB=0 to turn the cache off
+RESULT_CACHE_MAX_BYTES = int(
+    float(os.environ.get("MONEY_DASHBOARD_RESULT_CACHE_MB", "256")) * 1024**2
+)
+# Eviction removes entries until the cache is this fraction of its limit, so that it doesn't run
+# on every write once full
+EVICT_TO = 0.8
+_SUFFIX = ".pkl"
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Entries on disk, and the lookups made by this process"""
+
+    path: Path
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else float("nan")
+
+
+class ResultCache:
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+        self._size_bytes: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _entry(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}{_SUFFIX}"
+
+    def get(self, key: str):
+        """Cached value for `key`. Raises KeyError if there is none or it can't be read"""
+        entry = self._entry(key)
+        try:
+            with open(entry, "rb") as f:
+                value = pickle.load(f)
+            # The modification time orders the entries for eviction
+            os.utime(entry)
+        except FileNotFoundError:
+            self._count(misses=1)
+            raise KeyError(key) from None
+        except Exception as e:
+            logger.warning("Discarding unreadable cache entry %s: %s", entry, e)
+            entry.unlink(missing_ok=True)
+            self._count(misses=1)
+            raise KeyError(key) from e
+        self._count(hits=1)
+        return value
+
+    def put(self, key: str, value) -> None:
+        entry = self._entry(key)
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp, entry)
+            except BaseException:
+                os.unlink(temp)
+                raise
+            size = entry.stat().st_size
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+            # Unpicklable values raise TypeError or AttributeError as well as PicklingError
+            logger.warning("Could not write cache entry %s: %s", entry, e)
+            return
+        if self._add_size(size) > self.max_bytes:
+            self.evict()
+
+    def _add_size(self, size: int) -> int:
+        """Add a new entry to the running total of the cache size, and return the total"""
+        with self._lock:
+            if self._size_bytes is None:
+                # The scan already includes the new entry
+                self._size_bytes = self._size()
+            else:
+                self._size_bytes += size
+            return self._size_bytes
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        entries = []
+        for entry in self.path.glob(f"*/*{_SUFFIX}"):
+            try:
+                entries.append((entry, entry.stat()))
+            except FileNotFoundError:  # Evicted by another worker
+                pass
+        return entries
+
+    def _size(self) -> int:
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def evict(self, target: float = EVICT_TO) -> int:
+        """Remove the least recently used entries until the cache is `target` of its limit.
+        Returns the number removed"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        removed = 0
+        with open(self.path / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = sorted(self._entries(), key=lambda e: e[1].st_mtime_ns)
+            size = sum(stat.st_size for _, stat in entries)
+            for entry, stat in entries:
+                if size <= target * self.max_bytes:
+                    break
+                entry.unlink(missing_ok=True)
+                size -= stat.st_size
+                removed += 1
+        with self._lock:
+            self._size_bytes = size
+        self._count(evictions=removed)
+        return removed
+
+    def clear(self) -> int:
+        return self.evict(target=0)
+
+    def stats(self) -> CacheStats:
+        entries = self._entries()
+        return CacheStats(
+            path=self.path,
+            entries=len(entries),
+            size_bytes=sum(stat.st_size for _, stat in entries),
+            max_bytes=self.max_bytes,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+        )
+
+    def _count(self, hits: int = 0, misses: int = 0, evictions: int = 0) -> None:
+        with self._lock:
+            self._hits += hits
+            self._misses += misses
+            self._evictions += evictions
+
+
+RESULT_CACHE = ResultCache(RESULT_CACHE_PATH, RESULT_CACHE_MAX_BYTES)
+
+
+def _code_version() -> str:
+    """Hash of all the app's source files, read once at startup"""
+    digest = hashlib.sha256()
+    for path in sorted(BASE_PATH.rglob("*.py")):
+        digest.update(f"{path.relative_to(BASE_PATH)}\n".encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+CODE_VERSION = _code_version()
+
+
+def cache_key(func: Callable, args: tuple, kwargs: dict) -> str:
+    """Hash of the function, including its code and the app's source so that changes to it or
+    anything it calls aren't served stale results, and the `repr` of its arguments"""
+    code = func.__code__
+    content = (
+        f"{CODE_VERSION}\n{func.__module__}.{func.__qualname__}\n{code.co_code.hex()}\n"
+        f"{code.co_consts!r}\n{args!r}\n{sorted(kwargs.items())!r}"
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def disk_cached(func: Callable) -> Callable:
+    """Cache the results of `func` in `RESULT_CACHE`. The arguments must have a `repr` that
+    identifies them, like the strings and numbers passed to the `_function(..., generation)`
+    helpers, and the result must be picklable. Put `lru_cache` above this, so repeated calls
+    in the same process don't read the file"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not RESULT_CACHE.enabled:
+            return func(*args, **kwargs)
+        key = cache_key(func, args, kwargs)
+        try:
+            return RESULT_CACHE.get(key)
+        except KeyError:
+            pass
+        result = func(*args, **kwargs)
+        RESULT_CACHE.put(key, result)
+        return result
+
+    return wrapper
@@ -0,0 +1,212 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from utils.ledger import Action, Transaction, read_transactions, transactions_file
+from utils.portfolio import load_portfolio
+from utils.result_cache import disk_cached
+from utils.timeseries import PriceMatrix
+from utils.utils import DAYS_PER_YEAR, data_generation
+
+# Key of the whole-portfolio figures in `Performance.xirr` and `Performance.twr`
+PORTFOLIO = "portfolio"
+
+
+@dataclass(frozen=True)
+class CashFlows:
+    """Transactions summed by (date, commodity). Fees not charged to a commodity are kept in a
+    final column with an empty commodity name"""
+
+    dates: np.ndarray
+    commodities: list[str]
+    bought: np.ndarray
+    sold: np.ndarray
+    dividends: np.ndarray
+    fees: np.ndarray
+    quantity_change: np.ndarray
+
+    @property
+    def investor_flows(self) -> np.ndarray:
+        """Cash flows as seen by the investor: money in to the portfolio is negative"""
+        return self.sold + self.dividends - self.bought - self.fees
+
+
+@dataclass(frozen=True)
+class Performance:
+    """Annualised money-weighted (XIRR) and time-weighted returns for each commodity and for the
+    whole portfolio (under the `PORTFOLIO` key)"""
+
+    xirr: dict[str, float]
+    twr: dict[str, float]
+
+
+def portfolio_performance(prefix: str) -> Performance | None:
+    """Returns of a portfolio calculated from its transaction ledger, or None if it has no ledger.
+    Recalculated only when the data is updated"""
+    return _portfolio_performance(prefix, data_generation())
+
+
+@lru_cache(maxsize=8)
+@disk_cached
+def _portfolio_performance(prefix: str, generation: str) -> Performance | None:
+    ledger = transactions_file(prefix)
+    if ledger is None:
+        return None
+    flows = cash_flows(read_transactions(ledger))
+    return performance(flows, load_portfolio(prefix).price_matrix)
+
+
+def cash_flows(transactions: Iterable[Transaction]) -> CashFlows:
+    """Sum a stream of transactions by date and commodity"""
+    totals: dict[tuple[np.datetime64, str, Action], list[float]] = {}
+    for t in transactions:
+        total = totals.setdefault(
+            (np.datetime64(t.date, "D"), t.commodity, t.action), [0, 0]
+        )
+        total[0] += t.amount
+        total[1] += t.quantity
+
+    dates = np.unique(np.array([key[0] for key in totals], dtype="datetime64[D]"))
+    commodities = sorted({key[1] for key in totals if key[1]}) + [""]
+    columns = {commodity: idx for idx, commodity in enumerate(commodities)}
+    arrays = {action: np.zeros((len(dates), len(commodities))) for action in Action}
+    quantity_change = np.zeros((len(dates), len(commodities)))
+    for (date, commodity, action), (amount, quantity) in totals.items():
+        row, col = np.searchsorted(dates, date), columns[commodity]
+        arrays[action][row, col] += amount
+        if action == Action.BUY:
+            quantity_change[row, col] += quantity
+        elif action == Action.SELL:
+            quantity_change[row, col] -= quantity
+    return CashFlows(
+        dates=dates,
+        commodities=commodities,
+        bought=arrays[Action.BUY],
+        sold=arrays[Action.SELL],
+        dividends=arrays[Action.DIVIDEND],
+        fees=arrays[Action.FEE],
+        quantity_change=quantity_change,
+    )
+
+
+def performance(flows: CashFlows, prices: PriceMatrix) -> Performance:
+    """XIRR and TWR of each commodity in `flows`, valued with `prices` on the last price date"""
+    columns = prices.column_indices(flows.commodities)
+    last_prices = np.where(columns >= 0, prices.filled[-1, np.maximum(columns, 0)], 0)
+    final_value = np.nan_to_num(flows.quantity_change.sum(axis=0) * last_prices)
+
+    # XIRR: the transactions, plus selling everything at the final value on the last date
+    dates = np.append(flows.dates, prices.dates[-1])
+    amounts = np.vstack([flows.investor_flows, final_value])
+    amounts = np.column_stack([amounts, amounts.sum(axis=1)])
+    years = (dates - dates[0]).astype(float) / DAYS_PER_YEAR
+    rates = xirr(amounts.T, years)
+
+    twr = time_weighted_returns(flows, prices, columns)
+    names = [*flows.commodities[:-1], PORTFOLIO]
+    keep = [*range(len(flows.commodities) - 1), len(flows.commodities)]
+    return Performance(
+        xirr=dict(zip(names, rates[keep].tolist())),
+        twr=dict(zip(names, twr[keep].tolist())),
+    )
+
+
+def xirr(
+    amounts: np.ndarray, years: np.ndarray, tol: float = 1e-9, max_iter: int = 50
+) -> np.ndarray:
+    """Annual rate that gives each row of `amounts` (paid at `years`) a net present value of zero.
+    Solved for every row at once with Newton's method, falling back to bisection for rows that
+    fail to converge. NaN where there is no solution, e.g. all flows have the same sign
+    """
+    n = amounts.shape[0]
+    # Most holdings only trade on a few of the dates, so work with the non-zero flows only
+    rows, cols = np.nonzero(amounts)
+    flows = _SparseFlows(rows, amounts[rows, cols], years[cols], n)
+    has_solution = (amounts > 0).any(axis=1) & (amounts < 0).any(axis=1)
+    rate = np.full(n, 0.1)
+    converged = ~has_solution
+    with np.errstate(all="ignore"):
+        for _ in range(max_iter):
+            npv, slope = flows.npv(rate, with_slope=True)
+            step = np.where(converged, 0, npv / slope)
+            rate = rate - step
+            converged |= np.abs(step) < tol
+            if converged.all():
+                break
+        failed = ~converged | ~np.isfinite(rate) | (rate <= -1)
+    if failed.any():
+        rate[failed] = _bisect_xirr(flows, failed, tol)
+    rate[~has_solution] = np.nan
+    return rate
+
+
+class _SparseFlows:
+    def __init__(
+        self, rows: np.ndarray, amounts: np.ndarray, years: np.ndarray, n: int
+    ):
+        self.rows = rows
+        self.amounts = amounts
+        self.years = years
+        self.n = n
+
+    def npv(self, rate: np.ndarray, with_slope: bool = False):
+        discounted = self.amounts * (1 + rate[self.rows]) ** -self.years
+        npv = np.bincount(self.rows, discounted, minlength=self.n)
+        if not with_slope:
+            return npv
+        slope = np.bincount(self.rows, -self.years * discounted, minlength=self.n)
+        return npv, slope / (1 + rate)
+
+
+def _bisect_xirr(flows: _SparseFlows, failed: np.ndarray, tol: float) -> np.ndarray:
+    low = np.full(flows.n, -0.9999)
+    high = np.full(flows.n, 100.0)
+    with np.errstate(all="ignore"):
+        npv_low = flows.npv(low)
+        bracketed = np.sign(npv_low) != np.sign(flows.npv(high))
+        while (high - low)[failed].max() > tol:
+            mid = (low + high) / 2
+            npv_mid = flows.npv(mid)
+            same_sign = np.sign(npv_mid) == np.sign(npv_low)
+            low = np.where(same_sign, mid, low)
+            npv_low = np.where(same_sign, npv_mid, npv_low)
+            high = np.where(same_sign, high, mid)
+    return np.where(bracketed, (low + high) / 2, np.nan)[failed]
+
+
+def time_weighted_returns(
+    flows: CashFlows, prices: PriceMatrix, columns: np.ndarray
+) -> np.ndarray:
+    """Annualised time-weighted return of each commodity, and of all of them together (the last
+    element). Daily returns are chained across the price dates, with each transaction taken as
+    happening on the first price date on or after it"""
+    rows = np.minimum(np.searchsorted(prices.dates, flows.dates), len(prices.dates) - 1)
+    steps = np.zeros((len(prices.dates), len(flows.commodities)))
+    np.add.at(steps, rows, flows.quantity_change)
+    net_in = np.zeros_like(steps)
+    np.add.at(net_in, rows, flows.bought - flows.sold - flows.dividends)
+    fees = np.zeros_like(steps)
+    np.add.at(fees, rows, flows.fees)
+
+    unit_prices = np.where(columns >= 0, prices.filled[:, np.maximum(columns, 0)], 0)
+    value = np.nan_to_num(np.cumsum(steps, axis=0) * unit_prices)
+    value = np.column_stack([value, value.sum(axis=1)])
+    net_in = np.column_stack([net_in, net_in.sum(axis=1)])
+    fees = np.column_stack([fees, fees.sum(axis=1)])
+
+    previous = value[:-1]
+    with np.errstate(all="ignore"):
+        growth = (value[1:] - net_in[1:] - fees[1:]) / previous
+    growth = np.where(previous > 0, growth, 1)
+    total = np.prod(growth, axis=0)
+
+    # Annualise over the time since each commodity was first held
+    held = value > 0
+    first_held = prices.dates[np.argmax(held, axis=0)]
+    years = (prices.dates[-1] - first_held).astype(float) / DAYS_PER_YEAR
+    with np.errstate(all="ignore"):
+        return np.where(
+            held.any(axis=0) & (years > 0), total ** (1 / years) - 1, np.nan
+        )
@@ -0,0 +1,140 @@
+"""Named sets of Retirement Model inputs, kept in a SQLite database on the server so they can
+be compared and used from any device.
+
+Each call opens its own connection, as callbacks run in several threads and worker processes.
+The database is in write-ahead log mode, so reading the scenarios isn't blocked by a save.
+"""
+
+import contextlib
+import dataclasses
+import datetime
+import json
+import math
+import os
+import sqlite3
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from utils.tax import DEFAULT_TAX_YEAR, TAX_YEARS
+from utils.utils import BASE_PATH
+
+SCENARIO_DB = Path(
+    os.environ.get("MONEY_DASHBOARD_SCENARIO_DB", BASE_PATH.parent / "scenarios.db")
+)
+MAX_NAME_LENGTH = 60
+# Allowed range of each number, as (minimum, maximum) with None for no limit. The removal rate
+# must be above its minimum, as the sum required is the income divided by it
+LIMITS = {
+    "monthly_income": (0, None),
+    "removal_rate": (0, 100),
+    "lump_sum": (0, None),
+    "returns": (None, None),
+    "inflation": (None, None),
+    "contributions": (0, None),
+    "end_age": (50, 120),
+    "volatility": (0, None),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    name TEXT PRIMARY KEY,
+    parameters TEXT NOT NULL,
+    updated TEXT NOT NULL
+)
+"""
+
+
+class ScenarioError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Inputs of the Retirement Model. Rates are in %, money in present prices"""
+
+    name: str
+    monthly_income: float
+    removal_rate: float
+    lump_sum: float
+    returns: float
+    inflation: float
+    contributions: float
+    tax_year: str = DEFAULT_TAX_YEAR
+    end_age: int = 95
+    volatility: float = 10
+
+    @property
+    def parameters(self) -> dict:
+        return {k: v for k, v in dataclasses.asdict(self).items() if k != "name"}
+
+    @classmethod
+    def from_parameters(cls, name: str, parameters: dict) -> "Scenario":
+        """Scenario from stored parameters, ignoring any no longer used and defaulting any added
+        since it was saved"""
+        fields = {field.name for field in dataclasses.fields(cls)}
+        return cls(name=name, **{k: v for k, v in parameters.items() if k in fields})
+
+
+def check_scenario(scenario: Scenario) -> None:
+    """Raise ScenarioError if the scenario can't be projected"""
+    for field, (low, high) in LIMITS.items():
+        value = getattr(scenario, field)
+        label = field.replace("_", " ").capitalize()
+        if not isinstance(value, int | float) or not math.isfinite(value):
+            raise ScenarioError(f"{label} must be a number")
+        if field == "removal_rate" and value <= low:
+            raise ScenarioError(f"{label} must be more than {low}")
+        if (low is not None and value < low) or (high is not None and value > high):
+            limits = f"at least {low}" if high is None else f"from {low} to {high}"
+            raise ScenarioError(f"{label} must be {limits}")
+    if not isinstance(scenario.tax_year, str) or scenario.tax_year not in TAX_YEARS:
+        raise ScenarioError(f"Unknown tax year {scenario.tax_year}")
+
+
+@contextlib.contextmanager
+def _connect(path: Path) -> Iterator[sqlite3.Connection]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=10)
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(_SCHEMA)
+        with connection:  # Commits, or rolls back on an exception
+            yield connection
+    finally:
+        connection.close()
+
+
+def save_scenario(scenario: Scenario, path: Path = SCENARIO_DB) -> None:
+    """Save a scenario, replacing any with the same name"""
+    check_scenario(scenario)
+    name = scenario.name.strip()
+    if not name:
+        raise ScenarioError("A scenario needs a name")
+    if len(name) > MAX_NAME_LENGTH:
+        raise ScenarioError(
+            f"Scenario names are limited to {MAX_NAME_LENGTH} characters"
+        )
+    with _connect(path) as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO scenarios (name, parameters, updated) VALUES (?, ?, ?)",
+            (
+                name,
+                json.dumps(scenario.parameters),
+                datetime.datetime.now(tz=datetime.UTC).isoformat(),
+            ),
+        )
+
+
+def load_scenarios(path: Path = SCENARIO_DB) -> list[Scenario]:
+    """Every saved scenario, by name"""
+    with _connect(path) as connection:
+        rows = connection.execute(
+            "SELECT name, parameters FROM scenarios ORDER BY name"
+        ).fetchall()
+    return [Scenario.from_parameters(name, json.loads(params)) for name, params in rows]
+
+
+def delete_scenario(name: str, path: Path = SCENARIO_DB) -> None:
+    with _connect(path) as connection:
+        connection.execute("DELETE FROM scenarios WHERE name = ?", (name,))
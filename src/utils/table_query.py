@@ -0,0 +1,164 @@
+"""Paging, sorting and filtering of table rows on the server, for DataTables with
+`page_action`, `sort_action` and `filter_action` set to "custom".
+
+Each column is ranked once when the index is built, so sorting a request is a lookup of a
+precomputed order and filtering is a vectorised comparison over the column arrays"""
+
+import math
+import re
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+from utils.utils import TableData
+
+# The filter expressions written by the DataTable, e.g. `{value} s> 1000 && {commodity}
+# icontains vanguard`. An `s` or `i` prefix makes the comparison case sensitive or not
+_FILTER_TERM = re.compile(
+    r"^\{(?P<column>[^}]+)\}\s*(?P<case>[si]?)"
+    r"(?P<operator>contains|datestartswith|eq|ne|lt|le|gt|ge|<=|>=|!=|<|>|=)"
+    r"\s*(?P<value>.*)$"
+)
+_OPERATORS = {"eq": "=", "ne": "!=", "lt": "<", "le": "<=", "gt": ">", "ge": ">="}
+
+
+@dataclass(frozen=True)
+class Filter:
+    column: str
+    operator: str
+    value: float | str
+    case_sensitive: bool = True
+
+
+@dataclass(frozen=True)
+class Page:
+    """Rows on one page of a table, and the number of pages after filtering"""
+
+    rows: TableData
+    page_count: int
+    matched: int
+
+
+def parse_filter(query: str | None) -> list[Filter]:
+    """Terms of a DataTable filter query. Terms that can't be parsed are ignored, as the
+    DataTable itself does"""
+    filters = []
+    for term in (query or "").split(" && "):
+        match = _FILTER_TERM.match(term.strip())
+        if not match:
+            continue
+        value = match["value"].strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+            value = value[1:-1]
+        else:
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        filters.append(
+            Filter(
+                column=match["column"],
+                operator=_OPERATORS.get(match["operator"], match["operator"]),
+                value=value,
+                case_sensitive=match["case"] != "i",
+            )
+        )
+    return filters
+
+
+@dataclass(frozen=True)
+class TableIndex:
+    """Rows of a table with each column held as an array for sorting and filtering"""
+
+    rows: TableData
+
+    @cached_property
+    def columns(self) -> dict[str, np.ndarray]:
+        """Numeric columns as floats, anything else as strings"""
+        names = self.rows[0].keys() if self.rows else []
+        columns = {}
+        for name in names:
+            values = [row.get(name) for row in self.rows]
+            if all(isinstance(v, (int, float)) for v in values):
+                columns[name] = np.array(values, dtype=float)
+            else:
+                columns[name] = np.array(["" if v is None else str(v) for v in values])
+        return columns
+
+    @cached_property
+    def ranks(self) -> dict[str, np.ndarray]:
+        """Position of each row's value in each column's ascending order, NaN first like
+        `sort_data`, with equal values sharing a rank"""
+        ranks = {}
+        for name, values in self.columns.items():
+            if values.dtype.kind == "f":
+                values = np.where(np.isnan(values), -np.inf, values)
+            ranks[name] = np.unique(values, return_inverse=True)[1]
+        return ranks
+
+    def order(self, column: str, ascending: bool = True) -> np.ndarray:
+        """Row indices sorted by `column`. Stable, so ties keep their original order"""
+        rank = self.ranks[column]
+        return np.argsort(rank if ascending else -rank, kind="stable")
+
+    def mask(self, filters: list[Filter]) -> np.ndarray:
+        """Rows matching all `filters`. A filter on an unknown column matches nothing"""
+        mask = np.ones(len(self.rows), dtype=bool)
+        for f in filters:
+            if f.column not in self.columns:
+                return np.zeros(len(self.rows), dtype=bool)
+            mask &= _matches(self.columns[f.column], f)
+        return mask
+
+    def query(
+        self,
+        sort_by: list[dict] | None,
+        filter_query: str | None,
+        page_current: int,
+        page_size: int,
+    ) -> Page:
+        """One page of the rows matching `filter_query`, sorted as in the DataTable's `sort_by`"""
+        selected = np.flatnonzero(self.mask(parse_filter(filter_query)))
+        # Apply the sort keys from the least to the most significant, relying on stability
+        for sort in reversed(sort_by or []):
+            if sort["column_id"] in self.ranks:
+                order = self.order(sort["column_id"], sort["direction"] == "asc")
+                position = np.empty_like(order)
+                position[order] = np.arange(len(order))
+                selected = selected[np.argsort(position[selected], kind="stable")]
+        start = page_current * page_size
+        return Page(
+            rows=[self.rows[i] for i in selected[start : start + page_size].tolist()],
+            page_count=max(math.ceil(len(selected) / page_size), 1),
+            matched=len(selected),
+        )
+
+
+def _matches(values: np.ndarray, f: Filter) -> np.ndarray:
+    if values.dtype.kind == "f":
+        if not isinstance(f.value, float):
+            return np.zeros(len(values), dtype=bool)
+        target = f.value
+    else:
+        target = str(f.value) if not isinstance(f.value, float) else f"{f.value:g}"
+        if not f.case_sensitive:
+            values, target = np.char.lower(values), target.lower()
+    match f.operator:
+        case "contains" if values.dtype.kind != "f":
+            return np.char.find(values, target) >= 0
+        case "datestartswith" if values.dtype.kind != "f":
+            return np.char.startswith(values, target)
+        case "=":
+            return values == target
+        case "!=":
+            return values != target
+        case "<":
+            return values < target
+        case "<=":
+            return values <= target
+        case ">":
+            return values > target
+        case ">=":
+            return values >= target
+    return np.zeros(len(values), dtype=bool)
@@ -0,0 +1,95 @@
+"""UK income tax (England, Wales and Northern Ireland rates) on pension withdrawals.
+
+All functions take scalars or numpy arrays of incomes, so whole sweeps of scenarios are
+evaluated in one call"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Part of each withdrawal taken from the tax-free lump sum allowance
+TAX_FREE_FRACTION = 0.25
+
+
+@dataclass(frozen=True)
+class TaxYear:
+    """Income tax rules for one tax year. `bands` are (lower limit, rate) pairs, with the limits
+    applying to income after the personal allowance"""
+
+    personal_allowance: float
+    bands: tuple[tuple[float, float], ...]
+    # The allowance is reduced by `taper_rate` for each £1 of income over `taper_threshold`
+    taper_threshold: float = 100_000
+    taper_rate: float = 0.5
+
+    @property
+    def taper_end(self) -> float:
+        """Income at which the personal allowance has been withdrawn completely"""
+        return self.taper_threshold + self.personal_allowance / self.taper_rate
+
+
+_FROZEN_THRESHOLDS = TaxYear(
+    personal_allowance=12_570, bands=((0, 0.2), (37_700, 0.4), (125_140, 0.45))
+)
+TAX_YEARS = {
+    "2022/23": TaxYear(
+        personal_allowance=12_570, bands=((0, 0.2), (37_700, 0.4), (150_000, 0.45))
+    ),
+    "2023/24": _FROZEN_THRESHOLDS,
+    "2024/25": _FROZEN_THRESHOLDS,
+    "2025/26": _FROZEN_THRESHOLDS,
+    "2026/27": _FROZEN_THRESHOLDS,
+}
+DEFAULT_TAX_YEAR = "2026/27"
+
+
+def income_tax(income, tax_year: str = DEFAULT_TAX_YEAR) -> np.ndarray:
+    """Income tax due on a total taxable income"""
+    rules = TAX_YEARS[tax_year]
+    income = np.asarray(income, dtype=float)
+    withdrawn = np.maximum(income - rules.taper_threshold, 0) * rules.taper_rate
+    allowance = np.maximum(rules.personal_allowance - withdrawn, 0)
+    taxable = np.maximum(income - allowance, 0)
+    limits = [lower for lower, _ in rules.bands[1:]] + [np.inf]
+    tax = np.zeros_like(income)
+    for (lower, rate), upper in zip(rules.bands, limits):
+        tax += rate * np.clip(taxable - lower, 0, upper - lower)
+    return tax
+
+
+def net_income(
+    gross,
+    tax_year: str = DEFAULT_TAX_YEAR,
+    tax_free_fraction: float = TAX_FREE_FRACTION,
+) -> np.ndarray:
+    """Income after tax from pension withdrawals of `gross`, a fraction of which is tax-free"""
+    gross = np.asarray(gross, dtype=float)
+    return gross - income_tax((1 - tax_free_fraction) * gross, tax_year)
+
+
+def gross_income(
+    net, tax_year: str = DEFAULT_TAX_YEAR, tax_free_fraction: float = TAX_FREE_FRACTION
+) -> np.ndarray:
+    """Pension withdrawals needed to give an income of `net` after tax, to the nearest penny.
+
+    Net income is a piecewise-linear, increasing function of the gross, so it is evaluated
+    exactly at its breakpoints once and inverted for all of `net` by interpolation"""
+    gross_points = _breakpoints(TAX_YEARS[tax_year]) / (1 - tax_free_fraction)
+    net_points = net_income(gross_points, tax_year, tax_free_fraction)
+    return np.round(np.interp(net, net_points, gross_points), 2)
+
+
+def _breakpoints(rules: TaxYear) -> np.ndarray:
+    """Taxable incomes where the marginal rate can change: the allowance and taper limits, and
+    each band limit reached with the full, part or no allowance"""
+    a, t, r = rules.personal_allowance, rules.taper_threshold, rules.taper_rate
+    limits = np.array([lower for lower, _ in rules.bands])
+    points = np.concatenate(
+        [
+            [0, a, t, rules.taper_end, 1e12],
+            limits + a,
+            limits,
+            (limits + a + r * t) / (1 + r),
+        ]
+    )
+    return np.unique(points[points >= 0])
@@ -0,0 +1,211 @@
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+
+import numpy as np
+
+from utils.utils import DAYS_PER_YEAR, RETURNS_YEARS, TableData
+
+
+@dataclass(frozen=True)
+class PriceMatrix:
+    """Columnar form of a price time series: one row per date, one column per commodity"""
+
+    dates: np.ndarray
+    columns: list[str]
+    values: np.ndarray
+
+    @classmethod
+    def from_table(cls, table: TableData, date_column: str = "date") -> "PriceMatrix":
+        columns = [col for col in table[0] if col != date_column]
+        return cls(
+            dates=np.array([row[date_column] for row in table], dtype="datetime64[D]"),
+            columns=columns,
+            values=np.array(
+                [[row[col] for col in columns] for row in table], dtype=float
+            ),
+        )
+
+    @cached_property
+    def filled(self) -> np.ndarray:
+        """Prices carried forward over gaps, NaN only before a commodity's first price"""
+        return forward_fill(self.values)
+
+    @cached_property
+    def first_valid(self) -> np.ndarray:
+        """Row of each column's first price, or the number of rows if it has none"""
+        has_price = ~np.isnan(self.values)
+        return np.where(
+            has_price.any(axis=0), np.argmax(has_price, axis=0), len(self.dates)
+        )
+
+    def rebased(
+        self, columns: list[int], start: int = 0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Dates and prices of `columns` from the first row on or after `start` at which all of
+        them have a price, each as a percentage of its price on that row"""
+        start = max(start, *self.first_valid[columns].tolist())
+        if start >= len(self.dates):
+            return self.dates[:0], self.values[:0, columns]
+        return (
+            self.dates[start:],
+            100 * self.values[start:, columns] / self.filled[start, columns],
+        )
+
+    @cached_property
+    def horizons(self) -> "HorizonIndex":
+        return horizon_index(self.dates)
+
+    def column_indices(self, columns: list[str]) -> np.ndarray:
+        """Positions of `columns` in the matrix, -1 for any that have no prices"""
+        positions = {col: idx for idx, col in enumerate(self.columns)}
+        return np.array([positions.get(col, -1) for col in columns], dtype=int)
+
+
+@dataclass(frozen=True)
+class HorizonIndex:
+    """Row of a date index that each horizon (in years) starts from: the first on or after the
+    date that many years before the last"""
+
+    dates: np.ndarray
+    starts: dict[float, int]
+
+    def start(self, years: float) -> int:
+        """Looked up for the horizons in the table, and searched for otherwise"""
+        if (row := self.starts.get(years)) is None:
+            row = int(np.searchsorted(self.dates, horizon_start(self.dates, years)))
+        return row
+
+    def covers(self, years: float) -> bool:
+        """Whether the dates go back over the whole horizon"""
+        return (
+            bool(len(self.dates)) and horizon_start(self.dates, years) >= self.dates[0]
+        )
+
+
+def horizon_start(dates: np.ndarray, years: float) -> np.datetime64:
+    """First date of the last `years` of a date index"""
+    return dates[-1] - np.timedelta64(round(years * DAYS_PER_YEAR), "D")
+
+
+def horizon_index(
+    dates: np.ndarray, years: list[float] = RETURNS_YEARS
+) -> HorizonIndex:
+    """Start rows of all of `years`, found with one binary search of the (sorted) dates"""
+    years = sorted(set(years))
+    if not len(dates):
+        return HorizonIndex(dates=dates, starts=dict.fromkeys(years, 0))
+    starts = np.searchsorted(dates, [horizon_start(dates, y) for y in years])
+    return HorizonIndex(dates=dates, starts=dict(zip(years, starts.tolist())))
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Replace NaNs with the last valid value above them in the same column"""
+    rows = np.arange(values.shape[0])[:, None]
+    last_valid = np.where(np.isnan(values), 0, rows)
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    return values[last_valid, np.arange(values.shape[1])]
+
+
+RAW = "raw"  # No resampling
+FREQUENCIES = {
+    RAW: "As recorded",
+    "D": "Daily",
+    "W": "Weekly",
+    "M": "Monthly",
+    "Q": "Quarterly",
+    "Y": "Yearly",
+}
+AGGREGATIONS = {"last": "Last", "mean": "Mean", "ohlc": "OHLC"}
+
+
+@dataclass(frozen=True)
+class Buckets:
+    """Rows of a sorted date index grouped into periods. Bucket `i` is the rows from `starts[i]`
+    up to (not including) `ends[i]`, labelled with the first day of its period"""
+
+    labels: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+
+
+@dataclass(frozen=True)
+class OHLC:
+    dates: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+
+def buckets(dates: np.ndarray, frequency: str) -> Buckets:
+    """Periods of `frequency` ("D", "W", "M", "Q" or "Y") covering `dates`, which must be in
+    order. Weeks start on Monday. Cached, as the same date index is resampled repeatedly
+    """
+    return _buckets(np.asarray(dates, dtype="datetime64[D]").tobytes(), frequency)
+
+
+@lru_cache(maxsize=32)
+def _buckets(dates: bytes, frequency: str) -> Buckets:
+    days = np.frombuffer(dates, dtype="datetime64[D]")
+    if frequency == "D":
+        periods = days
+        labels = days
+    elif frequency == "W":
+        # 1970-01-01 was a Thursday
+        periods = (days.astype(np.int64) + 3) // 7
+        labels = (periods * 7 - 3).astype("datetime64[D]")
+    elif frequency in ("M", "Q"):
+        months = days.astype("datetime64[M]").astype(np.int64)
+        periods = months // 3 if frequency == "Q" else months
+        step = 3 if frequency == "Q" else 1
+        labels = (periods * step).astype("datetime64[M]").astype("datetime64[D]")
+    elif frequency == "Y":
+        periods = days.astype("datetime64[Y]")
+        labels = periods.astype("datetime64[D]")
+    else:
+        raise ValueError(f"Unknown frequency {frequency!r}")
+    starts = np.flatnonzero(np.diff(periods.astype(np.int64), prepend=-(2**62)))
+    return Buckets(
+        labels=labels[starts],
+        starts=starts,
+        ends=np.append(starts[1:], len(days)),
+    )
+
+
+def resample(
+    dates: np.ndarray, values: np.ndarray, frequency: str, how: str = "last"
+) -> tuple[np.ndarray, np.ndarray]:
+    """Values at `frequency`: the last value carried forward to the end of each period, or the
+    mean of the values in it (ignoring gaps). `values` has a row for each of `dates`"""
+    if frequency == RAW:
+        return dates, values
+    b = buckets(dates, frequency)
+    if how == "last":
+        return b.labels, forward_fill(values)[b.ends - 1]
+    if how == "mean":
+        present = ~np.isnan(values)
+        totals = np.add.reduceat(np.where(present, values, 0), b.starts)
+        counts = np.add.reduceat(present, b.starts)
+        with np.errstate(invalid="ignore"):
+            return b.labels, totals / counts
+    raise ValueError(f"Unknown aggregation {how!r}")
+
+
+def resample_ohlc(dates: np.ndarray, values: np.ndarray, frequency: str) -> OHLC:
+    """First, highest, lowest and last value in each period. The open and close are carried
+    forward from earlier periods over gaps"""
+    if frequency == RAW:
+        filled = forward_fill(values)
+        return OHLC(dates, filled, values, values, filled)
+    b = buckets(dates, frequency)
+    filled = forward_fill(values)
+    with np.errstate(invalid="ignore"):
+        high = np.fmax.reduceat(values, b.starts)
+        low = np.fmin.reduceat(values, b.starts)
+    return OHLC(
+        dates=b.labels,
+        open=filled[b.starts],
+        high=np.fmax(high, filled[b.starts]),
+        low=np.fmin(low, filled[b.starts]),
+        close=filled[b.ends - 1],
+    )
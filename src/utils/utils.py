@@ -1,14 +1,47 @@
 import csv
-import datetime
+import hashlib
+import json
 import math
+import os
 import pathlib
-from functools import partial
+from functools import lru_cache, partial
 
 BASE_PATH = pathlib.Path(__file__).parents[1]
 DATA_PATH = BASE_PATH.parent / "data"
-START_DATE = datetime.datetime(year=2018, month=1, day=1, tzinfo=datetime.UTC)
-CURRENT_DATE = datetime.datetime.now(tz=datetime.UTC)
-RETURNS_YEARS = [1, 3, 5]
+DAYS_PER_YEAR = 365.25
+EXPORTED_RETURNS_YEARS = (1, 3, 5)
+
+
+def _returns_years(setting: str) -> list[int]:
+    """Horizons from a comma separated list of years, e.g. 1,3,5,10. Only whole years, as they
+    name the returns columns (`annualised3_percent`), so year to date or fractional horizons
+    aren't supported"""
+    try:
+        years = {int(years) for years in setting.split(",") if years.strip()}
+    except ValueError:
+        years = set()
+    if not years or min(years) < 1:
+        raise ValueError(
+            f"Returns horizons must be whole numbers of years, such as 1,3,5, not {setting!r}"
+        )
+    return sorted(years)
+
+
+# The horizons that returns are shown over. The export has the returns over
+# `EXPORTED_RETURNS_YEARS`, and those over any other horizon are calculated from the prices
+RETURNS_YEARS = _returns_years(os.environ.get("MONEY_DASHBOARD_RETURNS_YEARS", "1,3,5"))
+UPDATE_LOG = DATA_PATH / "update_log.json"
+# Transaction ledgers and exchange rates are kept by hand rather than exported, so aren't in the
+# update log
+LEDGER_PATTERN = "*_transactions.*"
+FX_FILE = "fx_rates.csv"  # Rates quoted in `QUOTE_CURRENCY`
+QUOTE_CURRENCY = "GBP"  # Currency that the data is exported in
+CURRENCY_SYMBOLS = {"GBP": "£", "USD": "$", "EUR": "€", "JPY": "¥"}
+# Files shared by all the server's workers, such as background jobs and cached results. Has to
+# be on local disk
+CACHE_PATH = pathlib.Path(
+    os.environ.get("MONEY_DASHBOARD_CACHE_DIR", BASE_PATH.parent / ".cache")
+)
 
 type TableData = list[dict[str, str | float]]
 
@@ -40,3 +73,26 @@ def csv_to_dict(file_name: str) -> TableData:
                     row[col] = float("nan")
 
     return csv_data
+
+
+def data_generation() -> str:
+    """Identifier of the current data export, taken from the time recorded in the update log.
+    Changes whenever the data files are refreshed or a transaction ledger or the exchange rates
+    are edited, so can be used to key cached results"""
+    edited = tuple(
+        sorted(
+            (path.name, path.stat().st_mtime_ns)
+            for path in [*DATA_PATH.glob(LEDGER_PATTERN), *DATA_PATH.glob(FX_FILE)]
+        )
+    )
+    return _read_data_generation(UPDATE_LOG.stat().st_mtime_ns, edited)
+
+
+@lru_cache(maxsize=1)
+def _read_data_generation(mtime: int, edited: tuple[tuple[str, int], ...]) -> str:
+    with open(UPDATE_LOG) as f:
+        generation = json.load(f)["time"]
+    if edited:
+        digest = hashlib.sha1(repr(edited).encode()).hexdigest()[:12]
+        generation += f" edits {digest}"
+    return generation
@@ -0,0 +1,362 @@
+"""Checks of the exported data files: their columns, types and dates, and that the totals in
+different files agree.
+
+Each file is checked only when it changes, as the results are cached by its modification time
+and size. The checks run in a background thread, so a bad export never holds up the pages; the
+Info tab shows the latest results."""
+
+import csv
+import fnmatch
+import json
+import logging
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from utils.result_cache import disk_cached
+from utils.utils import DATA_PATH, EXPORTED_RETURNS_YEARS, UPDATE_LOG
+
+logger = logging.getLogger(__name__)
+
+type Columns = dict[str, np.ndarray]
+# (name, modification time, size) of a data file, or None if it doesn't exist
+type Signature = tuple[str, int, int] | None
+
+# Tolerances of the consistency checks
+SUM_TOLERANCE = 1e-3
+TOTAL_TOLERANCE = 0.01
+
+
+@dataclass(frozen=True)
+class Issue:
+    file: str
+    message: str
+    error: bool = True
+
+
+@dataclass(frozen=True)
+class Schema:
+    """Columns a data file must have. `numeric` columns must parse as numbers (every column but
+    `date` if it is "*"), `complete` ones must have no blank cells, and `date` must hold unique,
+    sorted dates. `checks` are further tests of the parsed columns, returning messages
+    """
+
+    required: tuple[str, ...] = ()
+    numeric: tuple[str, ...] | str = ()
+    complete: tuple[str, ...] | str = ()
+    date: str | None = None
+    checks: tuple[Callable[[Columns], list[str]], ...] = ()
+
+
+@dataclass(frozen=True)
+class ValidationReport:
+    files: list[str]
+    issues: list[Issue]
+
+    @property
+    def errors(self) -> list[Issue]:
+        return [issue for issue in self.issues if issue.error]
+
+
+def _percent_value_sums_to_one(columns: Columns) -> list[str]:
+    total = np.nansum(columns["percent_value"])
+    if abs(total - 1) > SUM_TOLERANCE:
+        return [f"percent_value sums to {total:.4f}, not 1"]
+    return []
+
+
+def _has_projection_start(columns: Columns) -> list[str]:
+    recorded = ~np.isnan(columns["actual_values"])
+    if not recorded.any():
+        return ["actual_values has no recorded values to project from"]
+    if recorded.all():
+        return ["actual_values has no blank years left to project"]
+    if (np.diff(recorded.astype(int)) > 0).any():
+        return ["actual_values has blank years between recorded ones"]
+    return []
+
+
+_SUMMARY_COLUMNS = ("commodity", "latest_price", "quantity", "value", "percent_value")
+# Matched in order, so specific names come before the patterns
+SCHEMAS = {
+    "assets_latest_summary.csv": Schema(
+        required=("Available Total", "Total"), numeric="*", complete="*"
+    ),
+    "assets_time_series.csv": Schema(
+        required=("date", "Total"), numeric="*", complete="*", date="date"
+    ),
+    "retirement_value_model.csv": Schema(
+        required=("year", "actual_values", "age"),
+        numeric=("year", "actual_values", "age"),
+        complete=("year", "age"),
+        checks=(_has_projection_start,),
+    ),
+    "*_price_time_series.csv": Schema(required=("date",), numeric="*", date="date"),
+    "*_summary.csv": Schema(
+        required=(*_SUMMARY_COLUMNS, "commodity_name", "commodity_type"),
+        numeric=(
+            *_SUMMARY_COLUMNS[1:],
+            *(f"annualised{y}_percent" for y in EXPORTED_RETURNS_YEARS),
+        ),
+        complete=_SUMMARY_COLUMNS,
+        checks=(_percent_value_sums_to_one,),
+    ),
+    "*_average_returns.csv": Schema(
+        required=tuple(f"year{y}" for y in EXPORTED_RETURNS_YEARS),
+        numeric="*",
+        complete="*",
+    ),
+    "*_grouped_by_type.csv": Schema(
+        required=("commodity_type", "type_value"),
+        numeric=("type_value",),
+        complete=("commodity_type", "type_value"),
+    ),
+}
+
+
+def schema_for(file: str) -> Schema | None:
+    return next(
+        (
+            schema
+            for pattern, schema in SCHEMAS.items()
+            if fnmatch.fnmatch(file, pattern)
+        ),
+        None,
+    )
+
+
+def signature(path: Path) -> Signature:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return path.name, stat.st_mtime_ns, stat.st_size
+
+
+def read_cells(path: Path) -> Columns:
+    """Cells of a CSV file as a string array per column, skipping unnamed (index) columns.
+    Raises ValueError if the rows are ragged"""
+    with open(path, newline="") as f:
+        header, *rows = list(csv.reader(f)) or [[]]
+    lengths = np.array([len(row) for row in rows], dtype=int)
+    ragged = np.flatnonzero(lengths != len(header))
+    if len(ragged):
+        row = ragged[0]
+        raise ValueError(
+            f"row {row + 2} has {lengths[row]} cells, the header has {len(header)}"
+        )
+    cells = np.array(rows, dtype=str).reshape(len(rows), len(header))
+    return {name: cells[:, i] for i, name in enumerate(header) if name}
+
+
+def _parse(cells: np.ndarray, dtype: str) -> np.ndarray:
+    """Parse a column of cells, with blanks as NaN or NaT. Raises ValueError naming the first
+    cell that isn't valid"""
+    blank = np.char.strip(cells) == ""
+    try:
+        return np.where(blank, "nan" if dtype == "float" else "NaT", cells).astype(
+            dtype
+        )
+    except ValueError:
+        for row, cell in enumerate(cells.tolist()):
+            try:
+                np.array([cell or "nan"]).astype(dtype)
+            except ValueError:
+                raise ValueError(f"row {row + 2} has {cell!r}") from None
+        raise
+
+
+def check_file(path: Path, schema: Schema) -> list[Issue]:
+    """Check one data file against its schema"""
+    file = path.name
+    try:
+        cells = read_cells(path)
+    except (OSError, ValueError, UnicodeDecodeError) as e:
+        return [Issue(file, f"Can't be read: {e}")]
+    missing = [col for col in schema.required if col not in cells]
+    if missing:
+        return [Issue(file, f"Missing columns: {', '.join(missing)}")]
+    if not cells or not next(iter(cells.values())).size:
+        return [Issue(file, "Has no rows")]
+
+    def selected(columns: tuple[str, ...] | str) -> list[str]:
+        if columns == "*":
+            return [col for col in cells if col != schema.date]
+        return [col for col in columns if col in cells]
+
+    issues = []
+    for col in selected(schema.complete):
+        blank = np.char.strip(cells[col]) == ""
+        if blank.any():
+            rows = ", ".join(str(row + 2) for row in np.flatnonzero(blank)[:5])
+            issues.append(
+                Issue(file, f"{blank.sum()} blank cells in {col} (rows {rows})")
+            )
+
+    parsed = {}
+    for col in selected(schema.numeric):
+        try:
+            parsed[col] = _parse(cells[col], "float")
+        except ValueError as e:
+            issues.append(Issue(file, f"{col} should be numeric, but {e}"))
+    if schema.date:
+        try:
+            dates = _parse(cells[schema.date], "datetime64[D]")
+        except ValueError as e:
+            issues.append(Issue(file, f"{schema.date} should be dates, but {e}"))
+        else:
+            steps = np.diff(dates).astype(int)
+            if np.isnat(dates).any():
+                issues.append(Issue(file, f"Blank {schema.date} cells"))
+            elif not ((steps > 0).all() or (steps < 0).all()):
+                issues.append(
+                    Issue(file, f"{schema.date} isn't in order, or has repeated dates")
+                )
+
+    if not issues:
+        for check in schema.checks:
+            issues.extend(Issue(file, message) for message in check(parsed))
+    return issues
+
+
+def check_totals(data_path: Path) -> list[Issue]:
+    """Check that the latest asset summary matches the newest row of the asset history, and the
+    sum of each portfolio summary"""
+    try:
+        latest = read_cells(data_path / "assets_latest_summary.csv")
+        history = read_cells(data_path / "assets_time_series.csv")
+        newest = np.argmax(_parse(history["date"], "datetime64[D]"))
+        summaries = {
+            column: _parse(read_cells(data_path / file)["value"], "float")
+            for column, file in [
+                ("Investments", "investments_summary.csv"),
+                ("Retirement", "retirement_summary.csv"),
+            ]
+        }
+        expected = {col: float(values[-1]) for col, values in latest.items()}
+    except (OSError, KeyError, ValueError):
+        # Already reported by the checks of the individual files
+        return []
+
+    def mismatch(column: str, actual: float) -> bool:
+        total = expected[column]
+        return abs(actual - total) > TOTAL_TOLERANCE * max(abs(total), 1)
+
+    issues = []
+    for col, values in history.items():
+        if col in expected and col != "date":
+            actual = float(values[newest])
+            if mismatch(col, actual):
+                issues.append(
+                    Issue(
+                        "assets_latest_summary.csv",
+                        f"{col} is {expected[col]:,.2f}, but {actual:,.2f} in the newest "
+                        f"row of assets_time_series.csv",
+                    )
+                )
+    for col, values in summaries.items():
+        if col in expected and mismatch(col, np.nansum(values)):
+            issues.append(
+                Issue(
+                    "assets_latest_summary.csv",
+                    f"{col} is {expected[col]:,.2f}, but the holdings in "
+                    f"{col.lower()}_summary.csv sum to {np.nansum(values):,.2f}",
+                    error=False,
+                )
+            )
+    return issues
+
+
+def validate_data(data_path: Path = DATA_PATH) -> ValidationReport:
+    """Check every file listed in the update log, and report CSV files that aren't listed"""
+    log = data_path / UPDATE_LOG.name
+    try:
+        with open(log) as f:
+            listed = json.load(f)["files"]
+    except (OSError, ValueError, KeyError) as e:
+        return ValidationReport([], [Issue(log.name, f"Can't be read: {e}")])
+
+    issues = []
+    for file in listed:
+        issues.extend(_check_file(str(data_path), file, signature(data_path / file)))
+    issues.extend(
+        _check_totals(
+            str(data_path),
+            tuple(signature(path) for path in sorted(data_path.glob("*.csv"))),
+        )
+    )
+    issues.extend(
+        Issue(path.name, f"Not listed in {log.name}, so not used", error=False)
+        for path in sorted(data_path.glob("*.csv"))
+        if path.name not in listed
+    )
+    return ValidationReport(files=listed, issues=issues)
+
+
+# The results are keyed on the file signatures, and on the app's source by `disk_cached`, so an
+# edited schema or check is run again rather than its old result being read
+@lru_cache(maxsize=64)
+@disk_cached
+def _check_file(data_path: str, file: str, signature: Signature) -> list[Issue]:
+    if signature is None:
+        return [Issue(file, "Listed in the update log, but missing")]
+    schema = schema_for(file)
+    if schema is None:
+        return [Issue(file, "No checks defined for this file", error=False)]
+    return check_file(Path(data_path) / file, schema)
+
+
+@lru_cache(maxsize=4)
+@disk_cached
+def _check_totals(data_path: str, signatures: tuple[Signature, ...]) -> list[Issue]:
+    return check_totals(Path(data_path))
+
+
+_lock = threading.Lock()
+_report: ValidationReport | None = None
+_report_signature: tuple[Signature, ...] | None = None
+_running: threading.Thread | None = None
+
+
+def _data_signature(data_path: Path) -> tuple[Signature, ...]:
+    return tuple(signature(path) for path in sorted(data_path.iterdir()))
+
+
+def start_validation(data_path: Path = DATA_PATH) -> None:
+    """Check the data in a background thread, unless a check is running or the files haven't
+    changed since the last one"""
+    global _running
+    with _lock:
+        if _running is not None and _running.is_alive():
+            return
+        if _report is not None and _report_signature == _data_signature(data_path):
+            return
+        _running = threading.Thread(
+            target=_run_validation, args=(data_path,), daemon=True
+        )
+        _running.start()
+
+
+def _run_validation(data_path: Path) -> None:
+    global _report, _report_signature
+    files = _data_signature(data_path)
+    try:
+        report = validate_data(data_path)
+    except Exception as e:
+        # Report the failure, or the Info tab would wait for results forever. The data isn't
+        # checked again until it changes
+        logger.exception("Data validation failed")
+        report = ValidationReport([], [Issue("", f"The checks failed: {e}")])
+    with _lock:
+        _report, _report_signature = report, files
+
+
+def latest_report(data_path: Path = DATA_PATH) -> ValidationReport | None:
+    """Results of the last completed check, or None if the first is still running. Starts a new
+    check in the background if the data has changed since"""
+    start_validation(data_path)
+    return _report
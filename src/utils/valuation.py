@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from utils.fx import QUOTE_CURRENCY, converted_prices
+from utils.portfolio import load_portfolio
+from utils.result_cache import disk_cached
+from utils.timeseries import PriceMatrix
+from utils.utils import TableData, data_generation
+
+
+@dataclass(frozen=True)
+class Valuation:
+    """Value of a portfolio on every date of its price series, in total and by investment type"""
+
+    dates: np.ndarray
+    types: list[str]
+    by_type: np.ndarray
+    total: np.ndarray
+
+    def as_of(self, idx: int) -> dict[str, float]:
+        """Value of each investment type at row `idx`"""
+        return dict(zip(self.types, self.by_type[idx].tolist()))
+
+
+def portfolio_valuation(prefix: str, currency: str = QUOTE_CURRENCY) -> Valuation:
+    """Valuation of the current holdings of a portfolio over time in `currency`, recalculated
+    only when the data is updated"""
+    return _portfolio_valuation(prefix, currency, data_generation())
+
+
+@lru_cache(maxsize=8)
+@disk_cached
+def _portfolio_valuation(prefix: str, currency: str, generation: str) -> Valuation:
+    return value_holdings(
+        converted_prices(prefix, currency), load_portfolio(prefix).summary
+    )
+
+
+def value_holdings(prices: PriceMatrix, summary: TableData) -> Valuation:
+    """Value the holdings in `summary` at every date in `prices`.
+
+    Prices are carried forward over gaps, and a commodity is worth nothing before its first
+    price. The per-type values come from a single product of the (dates x commodities) value
+    matrix with a (commodities x types) indicator matrix"""
+    columns = prices.column_indices([row["commodity"] for row in summary])
+    quantities = np.array([row["quantity"] for row in summary], dtype=float)
+    quantities[columns < 0] = 0
+    filled = np.nan_to_num(prices.filled[:, np.maximum(columns, 0)])
+
+    types, type_idx = np.unique(
+        [str(row["commodity_type"]) for row in summary], return_inverse=True
+    )
+    type_matrix = np.zeros((len(summary), len(types)))
+    type_matrix[np.arange(len(summary)), type_idx] = quantities
+    by_type = filled @ type_matrix
+    return Valuation(
+        dates=prices.dates,
+        types=types.tolist(),
+        by_type=by_type,
+        total=by_type.sum(axis=1),
+    )
@@ -0,0 +1,10 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Keep the results cached by the tests out of the app's cache. Set before any test module
+# imports utils.result_cache, which reads it
+_RESULT_CACHE_DIR = tempfile.mkdtemp(prefix="money_dashboard_results_")
+os.environ["MONEY_DASHBOARD_RESULT_CACHE_DIR"] = _RESULT_CACHE_DIR
+atexit.register(shutil.rmtree, _RESULT_CACHE_DIR, ignore_errors=True)
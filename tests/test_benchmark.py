@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from utils.benchmark import relative_performance
+from utils.timeseries import PriceMatrix
+
+NAN = float("nan")
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(1)
+    dates = np.arange("2020-01-01", "2024-01-01", 7, dtype="datetime64[D]")
+    index = 100 * np.cumprod(1 + rng.normal(0.002, 0.02, len(dates)))
+    index_returns = index[1:] / index[:-1] - 1
+    leveraged = 50 * np.cumprod(np.append(1, 1 + 2 * index_returns))
+    late = np.where(dates < np.datetime64("2023-06-01"), NAN, 10.0)
+    return PriceMatrix(
+        dates=dates,
+        columns=["Index", "Tracker", "Leveraged", "Late"],
+        values=np.column_stack([index, 3 * index, leveraged, late]),
+    )
+
+
+def test_tracker(prices):
+    result = relative_performance(prices, "Index", years=3)
+    assert result.beta[1] == pytest.approx(1)
+    assert result.alpha[1] == pytest.approx(0, abs=1e-12)
+    assert result.tracking_error[1] == pytest.approx(0, abs=1e-12)
+    assert result.excess_return[1] == pytest.approx(0, abs=1e-12)
+
+
+def test_leveraged(prices):
+    result = relative_performance(prices, "Index", years=3)
+    assert result.beta[2] == pytest.approx(2)
+    assert result.tracking_error[2] > 0
+
+
+def test_missing_prices_in_horizon(prices):
+    assert np.isnan(relative_performance(prices, "Index", years=3).beta[3])
+    assert not np.isnan(relative_performance(prices, "Index", years=0.5).beta[3])
@@ -0,0 +1,33 @@
+import numpy as np
+import plotly.express as px
+
+from utils.dash_format import compact_array, compact_figure
+
+
+def test_compact_array_rounds_to_float32_when_exact_enough():
+    values = np.array([626363.601527780, 1.4, np.nan])
+    compact = compact_array(values, precision=0)
+    assert compact.dtype == np.float32
+    np.testing.assert_array_equal(compact, np.array([626364, 1, np.nan], np.float32))
+
+
+def test_compact_array_keeps_float64_when_float32_would_lose_precision():
+    values = np.array([626363.601527780, 1.23456])
+    compact = compact_array(values, precision=2)
+    assert compact.dtype == np.float64
+    np.testing.assert_array_equal(compact, [626363.6, 1.23])
+
+
+def test_compact_array_dates():
+    dates = np.array(["2024-01-01", "2024-01-02"], dtype="datetime64[ns]")
+    assert compact_array(dates, 0).tolist() == ["2024-01-01", "2024-01-02"]
+    times = np.array(["2024-01-01T12:00"], dtype="datetime64[ns]")
+    assert compact_array(times, 0) is times
+
+
+def test_compact_figure_shrinks_json():
+    dates = np.arange("2020-01-01", "2024-01-01", dtype="datetime64[D]")
+    values = np.linspace(1000, 600000, len(dates)) + 0.123456789
+    full_size = len(px.line(x=dates, y=values).to_json())
+    compact = compact_figure(px.line(x=dates, y=values), precision=0)
+    assert len(compact.to_json()) < full_size * 0.7
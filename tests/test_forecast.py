@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from utils.forecast import PERCENTILES, fit_growth, forecast
+from utils.history import AssetHistory
+
+
+@pytest.fixture
+def history():
+    dates = np.datetime64("2020-01-01") + np.arange(0, 6 * 365, 365).astype(
+        "timedelta64[D]"
+    )
+    years = (dates - dates[0]).astype(float) / 365.25
+    return AssetHistory(
+        dates=dates[::-1],  # Newest first, like the exported history
+        columns=["Investments", "Savings", "Total"],
+        values=np.column_stack([100 * 1.1**years, 1_000.0 * years, np.zeros(6)])[::-1],
+    )
+
+
+def test_fit_growth(history):
+    fit = fit_growth(history, ["Investments", "Savings"])
+    assert fit.compounding.tolist() == [True, False]
+    np.testing.assert_allclose(fit.trend, [np.log(1.1), 1_000])
+    np.testing.assert_allclose(fit.volatility, [0, 0], atol=1e-6)
+    assert fit.describe("Investments") == "+10.0% a year"
+    assert fit.describe("Savings") == "+£1,000 a year"
+
+
+def test_forecast_without_volatility_follows_trend(history):
+    result = forecast(history, ["Investments", "Savings"], years=2)
+    assert result.dates[0] == history.dates[0]
+    assert len(result.dates) == 25
+    # Two years on from the last snapshot, in whole steps rather than the rounded dates
+    end = (history.dates[0] - history.dates[-1]).astype(float) / 365.25 + 2
+    expected = [100 * 1.1**end, 1_000 * end]
+    np.testing.assert_allclose(result.median[-1], expected, rtol=1e-6)
+    assert result.total.shape == (len(PERCENTILES), 25)
+    np.testing.assert_allclose(result.total[:, -1], sum(expected), rtol=1e-6)
+
+
+def test_forecast_years_are_independent_of_horizon(history):
+    noise = np.array([1.0, 1.05, 0.97, 1.02, 0.99, 1.04])[:, None]
+    noisy = AssetHistory(history.dates, history.columns, history.values * noise)
+    short = forecast(noisy, ["Investments", "Savings"], years=1)
+    long = forecast(noisy, ["Investments", "Savings"], years=3)
+    assert long.median.shape == (37, 2)
+    # The paths are built a year at a time, so the first year is the same whatever the horizon
+    np.testing.assert_array_equal(long.median[:13], short.median)
+    np.testing.assert_array_equal(long.total[:, :13], short.total)
+    assert (np.diff(long.total, axis=0) >= 0).all()
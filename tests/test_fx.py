@@ -0,0 +1,88 @@
+import os
+import shutil
+
+import numpy as np
+
+from utils import fx, utils
+from utils.fx import FxRates, commodity_currencies, convert_summary
+from utils.portfolio import Portfolio
+
+
+def test_factors_use_latest_rate_on_or_before_date():
+    rates = FxRates(
+        dates=np.array(["2024-01-01", "2024-02-01"], dtype="datetime64[D]"),
+        currencies=["GBP", "USD"],
+        values=np.array([[1.0, 0.8], [1.0, 0.75]]),
+    )
+    dates = np.array(["2023-12-01", "2024-01-15", "2024-03-01"], dtype="datetime64[D]")
+    np.testing.assert_allclose(
+        rates.factors(dates, ["USD", "GBP"], "GBP"),
+        [[0.8, 1.0], [0.8, 1.0], [0.75, 1.0]],
+    )
+    np.testing.assert_allclose(
+        rates.factors(dates[-1:], ["USD", "GBP"], "USD"), [[1.0, 1 / 0.75]]
+    )
+
+
+def test_unlisted_currencies_default_to_gbp():
+    summary = [
+        {"commodity": "A", "commodity_currency": "GBP"},
+        {"commodity": "B", "commodity_currency": float("nan")},
+    ]
+    assert commodity_currencies(summary, ["A", "B", "Index"]) == ["GBP"] * 3
+
+
+def test_convert_summary_converts_values_from_gbp(monkeypatch):
+    rates = FxRates(
+        dates=np.array(["2024-01-01"], dtype="datetime64[D]"),
+        currencies=["GBP", "USD"],
+        values=np.array([[1.0, 0.8]]),
+    )
+    monkeypatch.setattr(fx, "fx_rates", lambda: rates)
+    summary = [
+        {
+            "commodity": "AAPL",
+            "commodity_currency": "USD",
+            "latest_price": 100.0,
+            "value": 80.0,
+            "percent_value": 0.5,
+        },
+        {"commodity": "AZN", "latest_price": 10.0, "value": 80.0, "percent_value": 0.5},
+    ]
+    converted = convert_summary(summary, "USD")
+    assert [row["latest_price"] for row in converted] == [100.0, 12.5]
+    assert [row["value"] for row in converted] == [100.0, 100.0]
+    assert [row["percent_value"] for row in converted] == [0.5, 0.5]
+
+
+def test_converted_prices_kept_with_the_portfolio(monkeypatch):
+    rates = FxRates(
+        dates=np.array(["2024-01-01"], dtype="datetime64[D]"),
+        currencies=["GBP", "USD"],
+        values=np.array([[1.0, 0.8]]),
+    )
+    monkeypatch.setattr(fx, "fx_rates", lambda: rates)
+    prices = [{"date": "2024-01-01", "AZN": 10.0}]
+    loaded = Portfolio("isa", "gen1", [{"commodity": "AZN"}], prices, [], [])
+    monkeypatch.setattr(fx, "load_portfolio", lambda prefix: loaded)
+
+    assert fx.converted_prices("isa", "GBP") is loaded.price_matrix
+    usd = fx.converted_prices("isa", "USD")
+    np.testing.assert_allclose(usd.values, [[12.5]])
+    assert fx.converted_prices("isa", "USD") is usd
+    # A reloaded portfolio starts without the old conversions
+    loaded = Portfolio("isa", "gen2", [{"commodity": "AZN"}], prices, [], [])
+    assert fx.converted_prices("isa", "USD") is not usd
+
+
+def test_rate_edits_change_data_generation(tmp_path, monkeypatch):
+    shutil.copy(utils.UPDATE_LOG, tmp_path / "update_log.json")
+    monkeypatch.setattr(utils, "DATA_PATH", tmp_path)
+    monkeypatch.setattr(utils, "UPDATE_LOG", tmp_path / "update_log.json")
+    exported = utils.data_generation()
+    rates = tmp_path / utils.FX_FILE
+    rates.write_text("date,GBP,USD\n2024-01-01,1,0.8\n")
+    edited = utils.data_generation()
+    assert edited.startswith(exported) and edited != exported
+    os.utime(rates, ns=(0, 0))
+    assert utils.data_generation() not in (exported, edited)
@@ -0,0 +1,39 @@
+import os
+import threading
+
+import pytest
+from dash import Dash, html
+
+from utils import health
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(health, "_ready", threading.Event())
+    app = Dash(__name__)
+    app.layout = html.Div()
+    health.register_health(app)
+    return app.server.test_client()
+
+
+def test_healthz(client):
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert response.json["pid"] == os.getpid()
+    assert response.headers["Cache-Control"] == "no-store"
+
+
+def test_readyz(client, monkeypatch):
+    assert client.get("/readyz").status_code == 503
+
+    health.mark_ready()
+    monkeypatch.setattr(health, "STALE_AFTER_HOURS", 1e9)
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json["generation"] == "2024-12-20 21:01:33.163728+00:00"
+    assert response.json["stale"] is False
+    assert response.json["missing_files"] == []
+    assert "investments_summary.csv" in response.json["file_age_seconds"]
+
+    monkeypatch.setattr(health, "STALE_AFTER_HOURS", 1)
+    assert client.get("/readyz").json["stale"] is True
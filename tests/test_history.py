@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from utils.history import (
+    AssetHistory,
+    HistoryError,
+    append_snapshot,
+    append_snapshots,
+    history_from_table,
+    history_subset_total,
+    read_history,
+)
+
+NAN = float("nan")
+
+
+def test_append_and_read(tmp_path):
+    path = tmp_path / "history.bin"
+    append_snapshot(path, "2024-01-01", {"Savings": 100.0, "Houses": 200_000.0})
+    append_snapshot(path, "2024-02-01", {"Savings": 150.5})
+
+    history = read_history(path)
+    assert history.columns == ["Savings", "Houses"]
+    assert history.dates.tolist() == [
+        np.datetime64("2024-01-01"),
+        np.datetime64("2024-02-01"),
+    ]
+    np.testing.assert_array_equal(history.values, [[100.0, 200_000.0], [150.5, NAN]])
+    assert isinstance(history.values, np.memmap)
+
+
+def test_append_out_of_order(tmp_path):
+    path = tmp_path / "history.bin"
+    append_snapshot(path, "2024-02-01", {"Savings": 1.0})
+    with pytest.raises(HistoryError):
+        append_snapshot(path, "2024-01-01", {"Savings": 2.0})
+
+
+def test_partial_record_ignored_and_replaced(tmp_path):
+    path = tmp_path / "history.bin"
+    append_snapshot(path, "2024-01-01", {"Savings": 1.0})
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 5)  # An interrupted append
+    assert len(read_history(path).dates) == 1
+
+    append_snapshot(path, "2024-01-02", {"Savings": 2.0})
+    np.testing.assert_array_equal(read_history(path).column("Savings"), [1.0, 2.0])
+
+
+def test_not_a_history_file(tmp_path):
+    path = tmp_path / "history.bin"
+    path.write_bytes(b"date,Savings\n2024-01-01,1\n")
+    with pytest.raises(HistoryError):
+        read_history(path)
+
+
+def test_history_from_table():
+    table = [
+        {"": 0.0, "date": "2024-02-01", "Savings": 2.0},
+        {"": 1.0, "date": "2024-01-01", "Savings": 1.0},
+    ]
+    history = history_from_table(table)
+    assert history.columns == ["Savings"]
+    assert history.dates.astype(str).tolist() == ["2024-01-01", "2024-02-01"]
+    np.testing.assert_array_equal(history.column("Savings"), [1.0, 2.0])
+
+
+def test_subset_total():
+    history = AssetHistory(
+        dates=np.array(["2024-01-01", "2024-02-01"], dtype="datetime64[D]"),
+        columns=["Savings", "Houses", "Total", "Investments"],
+        values=np.array([[100.0, 300.0, 600.0, 200.0], [50.0, 150.0, 400.0, 200.0]]),
+    )
+    assert history.base_columns == ["Savings", "Houses", "Investments"]
+    mask = history.subset_mask(["Investments", "Total", "Savings"])
+    assert mask == 0b101
+
+    subset = history_subset_total(history, mask)
+    assert subset.columns == ["Savings", "Investments"]
+    np.testing.assert_array_equal(subset.total, [300.0, 250.0])
+    np.testing.assert_allclose(subset.share, [[1 / 3, 2 / 3], [0.2, 0.8]])
+    np.testing.assert_array_equal(
+        history_subset_total(history, 0b111).total, history.column("Total")
+    )
+
+
+def test_append_unknown_column(tmp_path):
+    path = tmp_path / "history.bin"
+    append_snapshot(path, "2024-01-01", {"Savings": 1.0})
+    with pytest.raises(HistoryError, match="Pension"):
+        append_snapshot(path, "2024-02-01", {"Savings": 2.0, "Pension": 3.0})
+    assert len(read_history(path).dates) == 1
+
+
+def test_append_no_rows(tmp_path):
+    path = tmp_path / "history.bin"
+    append_snapshots(path, np.array([], dtype="datetime64[D]"), [])
+    assert not path.exists()
+
+
+def test_subset_total_ignores_gaps_in_deselected_columns():
+    history = AssetHistory(
+        dates=np.array(["2024-01-01", "2024-02-01"], dtype="datetime64[D]"),
+        columns=["Savings", "Houses"],
+        values=np.array([[100.0, NAN], [150.0, 200_000.0]]),
+    )
+    subset = history_subset_total(history, history.subset_mask(["Savings"]))
+    np.testing.assert_array_equal(subset.total, [100.0, 150.0])
+    np.testing.assert_array_equal(subset.share, [[1.0], [1.0]])
@@ -0,0 +1,82 @@
+import math
+from types import SimpleNamespace
+
+import pytest
+
+from utils import holdings as holdings_module
+from utils.holdings import aggregate_holdings
+
+
+def holding(commodity, commodity_id, value, returns, commodity_type="shares"):
+    row = {
+        "commodity": commodity,
+        "commodity_id": commodity_id,
+        "commodity_name": commodity,
+        "commodity_type": commodity_type,
+        "quantity": value / 10,
+        "value": value,
+    }
+    for year, annualised in zip([1, 3, 5], returns):
+        row[f"annualised{year}_percent"] = annualised
+    return row
+
+
+@pytest.fixture
+def holdings():
+    return aggregate_holdings(
+        {
+            "investments": [
+                holding("AZN", "AZN.L", 300, [0.1, 0.2, float("nan")]),
+                holding("FUND", "n/a", 100, [0.0, 0.0, 0.0], "bonds"),
+            ],
+            "retirement": [
+                holding("AZN", "AZN.L", 100, [0.5, 0.2, 0.1]),
+                holding("GILT", "n/a", 100, [0.1, 0.1, 0.1], "bonds"),
+            ],
+        }
+    )
+
+
+def test_joins_on_commodity_id(holdings):
+    azn = next(row for row in holdings.by_commodity if row["commodity_id"] == "AZN.L")
+    assert azn["value"] == 400
+    assert azn["quantity"] == 40
+    assert azn["portfolios"] == "investments, retirement"
+    assert azn["percent_value"] == pytest.approx(400 / 600)
+
+
+def test_missing_ids_fall_back_to_commodity(holdings):
+    assert len(holdings.by_commodity) == 3
+    assert holdings.total_value == 600
+
+
+def test_value_weighted_returns(holdings):
+    azn = next(row for row in holdings.by_commodity if row["commodity_id"] == "AZN.L")
+    assert azn["annualised1_percent"] == pytest.approx(0.2)
+    assert azn["annualised3_percent"] == pytest.approx(0.2)
+    # Only the retirement holding has a 5 year return
+    assert azn["annualised5_percent"] == pytest.approx(0.1)
+
+
+def test_type_mix(holdings):
+    by_type = {row["commodity_type"]: row for row in holdings.by_type}
+    assert by_type["shares"]["value"] == 400
+    assert by_type["bonds"]["value"] == 200
+    assert by_type["bonds"]["annualised1_percent"] == pytest.approx(0.05)
+    assert not math.isnan(by_type["shares"]["annualised5_percent"])
+
+
+def test_holdings_summary_uses_loaded_portfolios(monkeypatch):
+    loaded = []
+
+    def load_portfolio(prefix):
+        loaded.append(prefix)
+        return SimpleNamespace(
+            summary=[holding(prefix.upper(), "", 100, [0.1, 0.1, 0.1])]
+        )
+
+    monkeypatch.setattr(holdings_module, "discover_portfolios", lambda: ["isa", "sipp"])
+    monkeypatch.setattr(holdings_module, "load_portfolio", load_portfolio)
+    result = holdings_module._holdings_summary("test generation")
+    assert loaded == ["isa", "sipp"]
+    assert result.total_value == 200
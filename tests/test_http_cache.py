@@ -0,0 +1,52 @@
+import pytest
+from dash import Dash, html
+
+from utils import http_cache
+
+
+@pytest.fixture
+def generation(monkeypatch):
+    generation = ["gen1"]
+    monkeypatch.setattr(http_cache, "data_generation", lambda: generation[0])
+    return generation
+
+
+@pytest.fixture
+def client(tmp_path, generation):
+    (tmp_path / "style.css").write_text("body {}")
+    app = Dash(__name__, assets_folder=str(tmp_path))
+    app.layout = html.Div("Layout")
+    http_cache.register_http_caching(app)
+    return app.server.test_client()
+
+
+def test_layout_has_weak_etag(client):
+    response = client.get("/_dash-layout")
+    assert response.status_code == 200
+    etag, weak = response.get_etag()
+    assert weak and etag == http_cache._etag()
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_matching_etag_is_not_modified(client):
+    etag = client.get("/_dash-layout").headers["ETag"]
+    response = client.get("/_dash-layout", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_etag_changes_with_data_generation(client, generation):
+    etag = client.get("/_dash-layout").headers["ETag"]
+    generation[0] = "gen2"
+    response = client.get("/_dash-layout", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_assets_cached(client):
+    response = client.get("/assets/style.css")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == (
+        f"public, max-age={http_cache.STATIC_MAX_AGE}"
+    )
@@ -0,0 +1,164 @@
+import datetime
+import io
+import os
+import shutil
+
+import pytest
+
+from utils import utils
+from utils.ledger import (
+    Action,
+    LedgerError,
+    Transaction,
+    apply_positions,
+    final_positions,
+    parse_csv,
+    parse_journal,
+    positions_by_date,
+    read_transactions,
+)
+
+CSV = """date,action,commodity,quantity,amount
+2024-01-05,buy,AZN,10,"1,000.00"
+2024-01-05,buy,BARC,100,200
+2024-02-01,sell,AZN,4,480
+2024-03-01,dividend,AZN,,12.50
+2024-03-01,fee,,,5
+"""
+
+JOURNAL = """; Comments are ignored
+2024-01-05 * Buy
+    Assets:Investments:AZN      10 AZN @ 100.00
+    Assets:Investments:BARC     100 BARC @@ £200
+    Assets:Cash
+2024-02-01 Sell
+    Assets:Investments:AZN      -4 AZN @ 120
+    Assets:Cash                 480
+2024-03-01 Dividend and fee
+    Income:Dividends:AZN        -12.50
+    Expenses:Fees               5
+    Assets:Cash
+"""
+
+
+def test_csv_and_journal_agree():
+    from_csv = list(parse_csv(io.StringIO(CSV)))
+    from_journal = list(parse_journal(io.StringIO(JOURNAL)))
+    assert from_csv == from_journal
+    assert from_csv[0] == Transaction(
+        datetime.date(2024, 1, 5), Action.BUY, "AZN", 10.0, 1000.0
+    )
+    assert [t.action for t in from_csv] == [
+        Action.BUY,
+        Action.BUY,
+        Action.SELL,
+        Action.DIVIDEND,
+        Action.FEE,
+    ]
+
+
+def test_journal_currency_postings_are_money():
+    journal = """2024-01-05 * Buy
+    Assets:Investments:AZN      10 AZN @ 100.00 GBP
+    Assets:Cash                 -1000 GBP
+2024-03-01 Dividend
+    Income:Dividends:AZN        -12.50 GBP
+    Assets:Cash                 12.50 GBP
+2024-03-02 Fee
+    Expenses:Fees:AZN           5 GBP
+    Assets:Cash                 -5 GBP
+"""
+    assert list(parse_journal(io.StringIO(journal))) == [
+        Transaction(datetime.date(2024, 1, 5), Action.BUY, "AZN", 10.0, 1000.0),
+        Transaction(datetime.date(2024, 3, 1), Action.DIVIDEND, "AZN", 0.0, 12.5),
+        Transaction(datetime.date(2024, 3, 2), Action.FEE, "AZN", 0.0, 5.0),
+    ]
+
+
+def test_positions_by_date():
+    positions = list(positions_by_date(parse_csv(io.StringIO(CSV))))
+    assert [date.isoformat() for date, _ in positions] == [
+        "2024-01-05",
+        "2024-02-01",
+        "2024-03-01",
+    ]
+    assert positions[0][1] == {"AZN": 10.0, "BARC": 100.0}
+    assert positions[-1][1] == {"AZN": 6.0, "BARC": 100.0}
+
+
+def test_read_transactions_requires_date_order(tmp_path):
+    path = tmp_path / "test_transactions.csv"
+    path.write_text(
+        "date,action,commodity,quantity,amount\n"
+        "2024-02-01,buy,AZN,1,100\n"
+        "2024-01-01,buy,AZN,1,100\n"
+    )
+    with pytest.raises(LedgerError):
+        list(read_transactions(path))
+
+
+def test_read_transactions_streams_large_files(tmp_path):
+    path = tmp_path / "test_transactions.csv"
+    with open(path, "w") as f:
+        f.write("date,action,commodity,quantity,amount\n")
+        start = datetime.date(2000, 1, 1)
+        for day in range(200_000):
+            date = start + datetime.timedelta(days=day // 20)
+            f.write(f"{date},buy,C{day % 50},1,10\n")
+    positions = final_positions(read_transactions(path))
+    assert len(positions) == 50
+    assert positions["C0"] == 4_000
+
+
+def test_apply_positions():
+    summary = [
+        {"commodity": "AZN", "quantity": 1.0, "latest_price": 100.0, "value": 100.0},
+        {"commodity": "BARC", "quantity": 50.0, "latest_price": 2.0, "value": 100.0},
+    ]
+    apply_positions(summary, {"AZN": 3.0})
+    assert summary[0]["value"] == 300.0
+    assert summary[1]["quantity"] == 50.0
+    assert summary[0]["percent_value"] == 0.75
+
+
+def test_apply_positions_logs_commodities_only_in_ledger(caplog):
+    summary = [
+        {"commodity": "AZN", "quantity": 1.0, "latest_price": 100.0, "value": 100.0}
+    ]
+    apply_positions(summary, {"AZN": 3.0, "VOD": 20.0, "SOLD": 0.0})
+    assert [row["commodity"] for row in summary] == ["AZN"]
+    assert "not valued: VOD" in caplog.text
+
+
+def test_parse_csv_short_row():
+    lines = io.StringIO("date,action,commodity,quantity,amount\n2024-01-05,buy,AZN\n")
+    with pytest.raises(LedgerError, match="line 2: no quantity, amount"):
+        list(parse_csv(lines))
+    with pytest.raises(
+        LedgerError, match="line 2: no date, commodity, quantity, amount"
+    ):
+        list(parse_csv(io.StringIO("action,date,commodity,quantity,amount\nbuy\n")))
+
+
+def test_ledger_edits_change_data_generation(tmp_path, monkeypatch):
+    shutil.copy(utils.UPDATE_LOG, tmp_path / "update_log.json")
+    monkeypatch.setattr(utils, "DATA_PATH", tmp_path)
+    monkeypatch.setattr(utils, "UPDATE_LOG", tmp_path / "update_log.json")
+    exported = utils.data_generation()
+    ledger = tmp_path / "test_transactions.csv"
+    ledger.write_text(CSV)
+    edited = utils.data_generation()
+    assert edited.startswith(exported) and edited != exported
+    os.utime(ledger, ns=(0, 0))
+    assert utils.data_generation() not in (exported, edited)
+
+
+def test_apply_positions_keeps_values_in_quote_currency():
+    # Priced in USD, with the exported value in GBP at 0.8
+    summary = [
+        {"commodity": "AAPL", "quantity": 2.0, "latest_price": 100.0, "value": 160.0},
+        {"commodity": "NEW", "quantity": 0.0, "latest_price": 5.0, "value": 0.0},
+    ]
+    apply_positions(summary, {"AAPL": 3.0, "NEW": 2.0})
+    assert summary[0]["value"] == 240.0
+    assert summary[1]["value"] == 10.0
@@ -0,0 +1,159 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from utils import portfolio
+from utils.portfolio import Portfolio, add_average_returns, add_horizon_returns
+from utils.timeseries import PriceMatrix
+from utils.utils import _returns_years, csv_to_dict
+
+
+def test_add_horizon_returns():
+    prices = PriceMatrix(
+        dates=np.array(
+            ["2019-01-01", "2022-01-01", "2024-01-01"], dtype="datetime64[D]"
+        ),
+        columns=["A", "B"],
+        values=np.array([[1.0, np.nan], [2.0, 5.0], [4.0, 10.0]]),
+    )
+    summary = [
+        {"commodity": "A", "latest_price": 4.0, "value": 40.0},
+        {"commodity": "B", "latest_price": 10.0, "value": 60.0},
+        {"commodity": "C", "latest_price": 1.0, "value": 0.0},
+    ]
+    add_horizon_returns(summary, prices, [1, 3, 5])
+    assert summary[0]["price_year3"] == 2
+    assert summary[0]["year3_percent"] == 1
+    assert math.isclose(summary[0]["annualised5_percent"], 4**0.2 - 1)
+    assert math.isclose(summary[1]["year3_percent_value"], 60 * (2 ** (1 / 3) - 1))
+    assert math.isnan(summary[1]["annualised5_percent"])
+    assert math.isnan(summary[2]["annualised1_percent"])
+
+    avg_returns = add_average_returns([{"year1": 0.1}], summary)
+    assert avg_returns[0]["year1"] == 0.1
+    assert math.isclose(avg_returns[0]["year3"], 2 ** (1 / 3) - 1)
+    # B has no price five years ago, so only A's return counts, over the total value
+    assert math.isclose(avg_returns[0]["year5"], 0.4 * (4**0.2 - 1))
+
+    add_horizon_returns(summary, prices, [10])
+    assert all(math.isnan(row["annualised10_percent"]) for row in summary)
+
+
+def test_horizon_returns_match_export():
+    exported = csv_to_dict("investments_summary.csv")
+    columns = ["year3", "year3_percent", "annualised3_percent", "year3_percent_value"]
+    # Prices three years (of 365.25 days) apart, at the exported start and latest price of each
+    # holding
+    prices = PriceMatrix(
+        dates=np.array(["2020-12-31", "2024-01-01"], dtype="datetime64[D]"),
+        columns=[row["commodity"] for row in exported],
+        values=np.array(
+            [
+                [row["price_year3"] for row in exported],
+                [row["latest_price"] for row in exported],
+            ]
+        ),
+    )
+    summary = [
+        {key: value for key, value in row.items() if key not in columns}
+        for row in exported
+    ]
+    add_horizon_returns(summary, prices, [3])
+    for column in columns:
+        np.testing.assert_allclose(
+            [row[column] for row in summary], [row[column] for row in exported]
+        )
+
+    avg_returns = add_average_returns([{}], summary)
+    exported_avg = csv_to_dict("investments_average_returns.csv")[0]
+    assert math.isclose(avg_returns[0]["year3"], exported_avg["year3"])
+
+
+def test_returns_years_setting():
+    assert _returns_years("5, 1,3,,10") == [1, 3, 5, 10]
+    for setting in ["ytd", "0.5", "0", ""]:
+        with pytest.raises(ValueError, match="whole numbers of years"):
+            _returns_years(setting)
+
+
+@pytest.fixture
+def loader(monkeypatch):
+    """Portfolios read by a stub rather than from CSVs, with the clock and data generation set
+    by the test"""
+    state = SimpleNamespace(now=0.0, generation="gen1", reads=[])
+
+    def read(prefix, generation):
+        state.reads.append(prefix)
+        return Portfolio(prefix, generation, [], [], [], [])
+
+    monkeypatch.setattr(portfolio, "_loaded", OrderedDict())
+    monkeypatch.setattr(portfolio, "_read_portfolio", read)
+    monkeypatch.setattr(portfolio, "data_generation", lambda: state.generation)
+    monkeypatch.setattr(portfolio, "time", SimpleNamespace(monotonic=lambda: state.now))
+    monkeypatch.setattr(portfolio, "MAX_LOADED_PORTFOLIOS", 2)
+    monkeypatch.setattr(portfolio, "MAX_IDLE_SECONDS", 100)
+    return state
+
+
+def test_discover_portfolios(tmp_path, monkeypatch):
+    monkeypatch.setattr(portfolio, "DATA_PATH", tmp_path)
+    for name in portfolio.PORTFOLIO_FILES:
+        (tmp_path / f"isa_{name}.csv").touch()
+    (tmp_path / "sipp_summary.csv").touch()  # Incomplete, so not a portfolio
+    assert portfolio.discover_portfolios() == ["isa"]
+
+
+def test_load_portfolio_on_first_use(loader):
+    assert portfolio.loaded_portfolios() == []
+    first = portfolio.load_portfolio("isa")
+    assert portfolio.load_portfolio("isa") is first
+    assert loader.reads == ["isa"]
+
+    loader.generation = "gen2"
+    assert portfolio.load_portfolio("isa").generation == "gen2"
+    assert loader.reads == ["isa", "isa"]
+
+
+def test_least_recently_used_evicted(loader):
+    for prefix in ["a", "b", "a", "c"]:
+        portfolio.load_portfolio(prefix)
+    assert portfolio.loaded_portfolios() == ["a", "c"]
+    portfolio.load_portfolio("b")
+    assert loader.reads == ["a", "b", "c", "b"]
+
+
+def test_idle_evicted(loader):
+    portfolio.load_portfolio("a")
+    loader.now = 50
+    portfolio.load_portfolio("b")
+    loader.now = 120
+    portfolio.load_portfolio("b")
+    assert portfolio.loaded_portfolios() == ["b"]
+    # The most recently used is kept however long it has been idle
+    loader.now = 1_000
+    portfolio.load_portfolio("c")
+    assert portfolio.loaded_portfolios() == ["c"]
+
+
+def test_concurrent_first_use_reads_once(loader, monkeypatch):
+    read = portfolio._read_portfolio
+
+    def slow_read(prefix, generation):
+        time.sleep(0.05)
+        return read(prefix, generation)
+
+    monkeypatch.setattr(portfolio, "_read_portfolio", slow_read)
+    threads = [
+        threading.Thread(target=portfolio.load_portfolio, args=("isa",))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.reads == ["isa"]
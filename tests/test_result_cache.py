@@ -0,0 +1,99 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from utils import result_cache
+from utils.result_cache import ResultCache, cache_key, disk_cached
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path / "results", max_bytes=10_000)
+    monkeypatch.setattr(result_cache, "RESULT_CACHE", cache)
+    return cache
+
+
+def test_disk_cached(cache):
+    calls = []
+
+    @disk_cached
+    def square(x, generation):
+        calls.append(x)
+        return np.arange(x) ** 2
+
+    assert square(4, "gen1").tolist() == [0, 1, 4, 9]
+    assert square(4, "gen1").tolist() == [0, 1, 4, 9]
+    assert square(4, "gen2").tolist() == [0, 1, 4, 9]
+    assert calls == [4, 4]
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 2, 2)
+
+
+def test_key_depends_on_code_and_arguments():
+    def f(x):
+        return x + 1
+
+    def g(x):
+        return x + 2
+
+    g.__qualname__ = f.__qualname__
+    assert cache_key(f, (1,), {}) == cache_key(f, (1,), {})
+    assert cache_key(f, (1,), {}) != cache_key(f, (2,), {})
+    assert cache_key(f, (1,), {}) != cache_key(g, (1,), {})
+
+
+def test_eviction_removes_least_recently_used(cache):
+    for i in range(3):
+        cache.put(str(i) * 64, b"x" * 3_000)
+        path = cache._entry(str(i) * 64)
+        os.utime(path, ns=(i * 10**9, i * 10**9))
+    cache.get("0" * 64)  # Now the most recently used
+
+    cache.put("3" * 64, b"x" * 3_000)
+
+    with pytest.raises(KeyError):
+        cache.get("1" * 64)
+    assert cache.get("0" * 64) == b"x" * 3_000
+    assert cache.stats().size_bytes <= cache.max_bytes
+
+
+def test_unreadable_entry_is_a_miss(cache):
+    key = "a" * 64
+    cache.put(key, [1, 2])
+    cache._entry(key).write_bytes(b"truncated")
+    with pytest.raises(KeyError):
+        cache.get(key)
+    assert not cache._entry(key).exists()
+    assert not list(cache.path.glob("*/*.tmp"))
+
+
+def test_key_depends_on_source(monkeypatch):
+    def f(x):
+        return x + 1
+
+    key = cache_key(f, (1,), {})
+    monkeypatch.setattr(result_cache, "CODE_VERSION", "edited")
+    assert cache_key(f, (1,), {}) != key
+
+
+def test_tests_use_a_temporary_cache():
+    assert result_cache.RESULT_CACHE_PATH == Path(
+        os.environ["MONEY_DASHBOARD_RESULT_CACHE_DIR"]
+    )
+    assert not result_cache.RESULT_CACHE_PATH.is_relative_to(result_cache.CACHE_PATH)
+
+
+def test_running_size(cache):
+    cache.put("a" * 64, b"x" * 3_000)
+    cache.put("b" * 64, b"x" * 3_000)
+    assert cache._size_bytes == cache.stats().size_bytes
+    cache.clear()
+    assert cache._size_bytes == 0
+
+
+def test_unpicklable_value_not_cached(cache):
+    cache.put("a" * 64, lambda: None)
+    assert cache.stats().entries == 0
+    assert not list(cache.path.glob("*/*.tmp"))
@@ -1,6 +1,10 @@
+import numpy as np
 import pytest
 
 from pages import retirement_model
+from utils.drawdown import simulate_drawdown
+from utils.scenarios import Scenario
+from utils.tax import DEFAULT_TAX_YEAR, TAX_YEARS, gross_income, income_tax, net_income
 
 
 @pytest.mark.parametrize(
@@ -13,3 +17,170 @@ def test_calculate_gross_income(net_income: float | int, gross_income_required:
 
     answer = retirement_model.calculate_gross_income(net_income)
     assert answer == gross_income_required
+
+
+@pytest.fixture
+def value_model():
+    return [
+        {"year": 2020, "age": 40, "actual_values": 100.0},
+        {"year": 2021, "age": 41, "actual_values": 110.0},
+        {"year": 2022, "age": 42, "actual_values": float("nan")},
+        {"year": 2023, "age": 43, "actual_values": float("nan")},
+        {"year": 2024, "age": 44, "actual_values": float("nan")},
+    ]
+
+
+@pytest.mark.parametrize("net_returns, contributions", [(1.0, 0), (1.1, 0), (1.05, 20), (0.9, 5)])
+@pytest.mark.parametrize("target", [50, 120, 140, 1_000])
+def test_target_met_ages_matches_single_projection(value_model, target, net_returns, contributions):
+    model = retirement_model.RetirementModel(value_model)
+    model.calculate_model_value(net_returns=net_returns, contributions=contributions)
+    model.set_target(target)
+    try:
+        expected = model.target_met_age
+    except ValueError:
+        expected = float("nan")
+
+    met_ages = retirement_model.RetirementModel(value_model).target_met_ages(
+        target, np.array([[net_returns]]), np.array([contributions])
+    )
+    np.testing.assert_array_equal(met_ages, [[expected]])
+
+
+def test_sensitivity_grid_shape():
+    grid = retirement_model.sensitivity_grid(500_000)
+    assert grid.shape == (
+        len(retirement_model.SWEEP_RETURNS),
+        len(retirement_model.SWEEP_INFLATION),
+        len(retirement_model.SWEEP_CONTRIBUTIONS),
+    )
+    # Higher returns and contributions never delay meeting the target
+    filled = np.nan_to_num(grid, nan=1_000)
+    assert (np.diff(filled, axis=0) <= 0).all()
+    assert (np.diff(filled, axis=2) <= 0).all()
+
+
+def test_retirement_target():
+    target = retirement_model.retirement_target(monthly_income=2_500, removal_rate=4, lump_sum=10_000)
+    assert target.annual_income_net == 30_000
+    assert target.annual_income_gross == retirement_model.calculate_gross_income(30_000)
+    assert target.income_sum == int(target.annual_income_gross / 0.04)
+    assert target.total_sum == target.income_sum + 10_000
+
+
+@pytest.mark.parametrize(
+    "income, tax",
+    [(0, 0), (12_570, 0), (50_270, 7_540), (100_000, 27_432), (110_000, 33_432), (125_140, 42_516), (150_000, 53_703)],
+)
+def test_income_tax(income, tax):
+    """All bands and the personal allowance taper, 2024/25 rates"""
+    assert income_tax(income, "2024/25") == pytest.approx(tax)
+
+
+def test_gross_income_inverts_net_income_across_bands():
+    gross = np.linspace(0, 300_000, 30_001)
+    for tax_year in TAX_YEARS:
+        net = net_income(gross, tax_year)
+        np.testing.assert_allclose(gross_income(net, tax_year), gross, atol=0.01)
+
+
+def test_calculate_gross_income_higher_rate():
+    gross = retirement_model.calculate_gross_income(60_000)
+    assert net_income(gross) == pytest.approx(60_000, abs=0.01)
+    assert gross > 60_000 + income_tax(0.75 * 60_000)
+
+
+def test_simulate_drawdown_without_volatility_matches_annuity():
+    """With no volatility or inflation every path is the same, and a pot of 10 years' gross
+    withdrawals at 0% real returns runs out after 10 years"""
+    gross = gross_income(20_000)
+    drawdown = simulate_drawdown(
+        pot=10 * gross + 1, start_age=60, end_age=80, net_income=20_000, real_returns=0, volatility=0, inflation=0
+    )
+    np.testing.assert_allclose(drawdown.withdrawals, gross)
+    np.testing.assert_array_equal(drawdown.depletion_ages, 70)
+    assert drawdown.survival_rate == 0
+    np.testing.assert_allclose(drawdown.pot[:, 10], 1)
+
+
+def test_simulate_drawdown_distribution():
+    drawdown = simulate_drawdown(
+        pot=800_000, start_age=65, end_age=100, net_income=30_000, real_returns=3, volatility=12, inflation=2.5
+    )
+    assert drawdown.pot.shape == (3, 36)
+    assert 0 < drawdown.survival_rate < 1
+    assert (drawdown.pot[0] <= drawdown.pot[1]).all() and (drawdown.pot[1] <= drawdown.pot[2]).all()
+    # Frozen tax thresholds make the real cost of the same net income rise
+    assert (np.diff(drawdown.withdrawals) >= 0).all()
+
+
+def test_start_year_index_errors(value_model):
+    recorded = [{**row, "actual_values": 1.0} for row in value_model]
+    with pytest.raises(ValueError, match="no years without actual_values"):
+        _ = retirement_model.RetirementModel(recorded).start_year_index
+    blank = [{**row, "actual_values": float("nan")} for row in value_model]
+    with pytest.raises(ValueError, match="no recorded actual_values"):
+        _ = retirement_model.RetirementModel(blank).start_year_index
+
+
+def test_project_matches_single_model(value_model):
+    single = retirement_model.RetirementModel(value_model)
+    single.calculate_model_value(net_returns=1.05, contributions=10)
+    values = retirement_model.RetirementModel(value_model).project(
+        np.array([1.0, 1.05]), np.array([0, 10])
+    )
+    assert values.shape == (2, 5)
+    np.testing.assert_allclose(values[1], single.model_values)
+    np.testing.assert_allclose(values[0], [np.nan, 110, 110, 110, 110])
+
+
+def test_retirement_drawdown_withdraws_removal_rate_after_lump_sum():
+    target = retirement_model.retirement_target(2_000, 4, 50_000)
+    drawdown = retirement_model.retirement_drawdown(
+        target.total_sum + 10_000, 60, target, removal_rate=4, end_age=90, real_returns=0, volatility=0, inflation=0, tax_year=DEFAULT_TAX_YEAR
+    )
+    assert drawdown.withdrawals[0] == pytest.approx(0.04 * (target.income_sum + 10_000), abs=0.01)
+
+
+def test_drawdown_start_is_none_when_target_never_met(value_model):
+    projection = retirement_model.RetirementModel(value_model)
+    projection.calculate_model_value(net_returns=1.05, contributions=10)
+    projection.set_target(target_value=1_000)
+    assert retirement_model.drawdown_start(projection) is None
+    projection.set_target(target_value=120)
+    assert retirement_model.drawdown_start(projection) == (42, pytest.approx(125.5))
+
+
+def test_evaluate_scenarios_skips_those_that_cant_be_projected(value_model, monkeypatch):
+    monkeypatch.setattr(retirement_model, "load_value_model", lambda: value_model)
+    parameters = {"monthly_income": 1, "lump_sum": 0, "returns": 5, "inflation": 2, "contributions": 10}
+    good = Scenario(name="Good", removal_rate=4, **parameters)
+    bad = Scenario(name="Bad", removal_rate=0, **parameters)
+    results, skipped = retirement_model.evaluate_scenarios([bad, good])
+    assert [result.scenario for result in results] == [good]
+    assert skipped == {"Bad": "Removal rate must be more than 0"}
+
+
+def test_depletion_figure_when_every_path_survives():
+    target = retirement_model.retirement_target(2_000, 4, 0)
+    drawdown = retirement_model.retirement_drawdown(
+        target.total_sum, 60, target, removal_rate=4, end_age=90, real_returns=5, volatility=0, inflation=2, tax_year=DEFAULT_TAX_YEAR
+    )
+    assert drawdown.survival_rate == 1
+    fig = retirement_model.depletion_figure(drawdown)
+    assert not fig.data
+    assert fig.layout.annotations[0].text == "No return path runs out of money"
+
+
+def test_scenario_results_are_shared_through_the_disk_cache(value_model, monkeypatch):
+    monkeypatch.setattr(retirement_model, "load_value_model", lambda: value_model)
+    monkeypatch.setattr(retirement_model, "data_generation", lambda: "shared")
+    parameters = {"monthly_income": 1, "lump_sum": 0, "returns": 5, "inflation": 2, "contributions": 10}
+    scenario = Scenario(name="Shared", removal_rate=4, **parameters)
+    (first,), _ = retirement_model.evaluate_scenarios([scenario])
+    # As in another worker, which hasn't projected the scenario itself
+    retirement_model._scenario_result.cache_clear()
+    monkeypatch.setattr(retirement_model, "project_scenarios", None)
+    (second,), _ = retirement_model.evaluate_scenarios([scenario])
+    assert second.target == first.target
+    np.testing.assert_array_equal(second.model_values, first.model_values)
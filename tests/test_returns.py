@@ -0,0 +1,56 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from utils.ledger import Action, Transaction
+from utils.returns import PORTFOLIO, cash_flows, performance, xirr
+from utils.timeseries import PriceMatrix
+
+
+def test_xirr_solves_every_row():
+    amounts = np.array(
+        [
+            [-1000, 0, 1100],
+            [-1000, 0, 1210],
+            [-1000, 500, 500],
+            [-1000, -1000, 0],  # Never paid back, so no rate
+        ]
+    )
+    years = np.array([0.0, 1.0, 2.0])
+    rates = xirr(amounts, years)
+    np.testing.assert_allclose(rates[:3], [0.04880885, 0.1, 0.0], atol=1e-8)
+    assert np.isnan(rates[3])
+
+
+def test_xirr_falls_back_to_bisection():
+    # Newton's method from 10% overshoots below -100% for such a large loss
+    rates = xirr(np.array([[-1000.0, 1.0]]), np.array([0.0, 1.0]))
+    assert rates[0] == pytest.approx(-0.999)
+
+
+def test_performance():
+    start = datetime.date(2023, 1, 1)
+    prices = PriceMatrix.from_table(
+        [
+            {"date": "2023-01-01", "A": 10.0, "B": 1.0},
+            {"date": "2023-07-02", "A": 10.0, "B": 1.0},
+            {"date": "2024-01-01", "A": 20.0, "B": 1.0},
+        ]
+    )
+    flows = cash_flows(
+        [
+            Transaction(start, Action.BUY, "A", 10.0, 100.0),
+            Transaction(start, Action.BUY, "B", 100.0, 100.0),
+            Transaction(datetime.date(2023, 7, 2), Action.BUY, "A", 10.0, 100.0),
+        ]
+    )
+    result = performance(flows, prices)
+    # Price of A doubled over the year, whenever the money went in
+    assert result.twr["A"] == pytest.approx(1.0, rel=1e-2)
+    assert result.twr["B"] == pytest.approx(0.0)
+    # ...but half of the money in A was only invested for the second half year
+    assert result.xirr["A"] > result.twr["A"]
+    assert result.xirr[PORTFOLIO] == pytest.approx(
+        xirr(np.array([[-200, -100, 500]]), np.array([0, 0.5, 1.0]))[0], rel=1e-2
+    )
@@ -0,0 +1,83 @@
+import pytest
+
+from utils.scenarios import (
+    MAX_NAME_LENGTH,
+    Scenario,
+    ScenarioError,
+    check_scenario,
+    delete_scenario,
+    load_scenarios,
+    save_scenario,
+)
+
+
+def scenario(name: str, **parameters) -> Scenario:
+    defaults = {
+        "monthly_income": 2_000,
+        "removal_rate": 4,
+        "lump_sum": 0,
+        "returns": 5,
+        "inflation": 2.5,
+        "contributions": 6_000,
+    }
+    return Scenario(name=name, **{**defaults, **parameters})
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "scenarios.db"
+    assert load_scenarios(path) == []
+    save_scenario(scenario("Retire early", contributions=12_000), path)
+    save_scenario(scenario(" Baseline "), path)
+    assert load_scenarios(path) == [
+        scenario("Baseline"),
+        scenario("Retire early", contributions=12_000),
+    ]
+
+
+def test_save_replaces_same_name(tmp_path):
+    path = tmp_path / "scenarios.db"
+    save_scenario(scenario("Baseline"), path)
+    save_scenario(scenario("Baseline", returns=7), path)
+    assert load_scenarios(path) == [scenario("Baseline", returns=7)]
+
+
+def test_delete(tmp_path):
+    path = tmp_path / "scenarios.db"
+    save_scenario(scenario("Baseline"), path)
+    delete_scenario("Baseline", path)
+    delete_scenario("Missing", path)
+    assert load_scenarios(path) == []
+
+
+@pytest.mark.parametrize("name", ["", "   ", "x" * (MAX_NAME_LENGTH + 1)])
+def test_invalid_names(tmp_path, name):
+    with pytest.raises(ScenarioError):
+        save_scenario(scenario(name), tmp_path / "scenarios.db")
+
+
+def test_from_parameters_ignores_unknown_and_defaults_missing():
+    parameters = scenario("Old").parameters
+    del parameters["volatility"]
+    parameters["retired_field"] = 1
+    assert Scenario.from_parameters("Old", parameters) == scenario("Old")
+
+
+@pytest.mark.parametrize(
+    "parameters, message",
+    [
+        ({"removal_rate": 0}, "Removal rate must be more than 0"),
+        ({"removal_rate": 101}, "Removal rate must be from 0 to 100"),
+        ({"monthly_income": -1}, "Monthly income must be at least 0"),
+        ({"end_age": 200}, "End age must be from 50 to 120"),
+        ({"volatility": -5}, "Volatility must be at least 0"),
+        ({"returns": float("nan")}, "Returns must be a number"),
+        ({"inflation": "3"}, "Inflation must be a number"),
+        ({"tax_year": "1999/00"}, "Unknown tax year 1999/00"),
+    ],
+)
+def test_invalid_parameters(tmp_path, parameters, message):
+    path = tmp_path / "scenarios.db"
+    with pytest.raises(ScenarioError, match=message):
+        save_scenario(scenario("Baseline", **parameters), path)
+    assert load_scenarios(path) == []
+    check_scenario(scenario("Baseline"))
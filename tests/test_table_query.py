@@ -0,0 +1,59 @@
+import pytest
+
+from utils.table_query import Filter, TableIndex, parse_filter
+from utils.utils import sort_data
+
+NAN = float("nan")
+
+
+@pytest.fixture
+def index():
+    return TableIndex(
+        [
+            {"id": "A", "commodity": "Alpha Fund", "value": 100.0, "growth": 0.05},
+            {"id": "B", "commodity": "beta Trust", "value": 300.0, "growth": NAN},
+            {"id": "C", "commodity": "Gamma Fund", "value": 200.0, "growth": 0.10},
+            {"id": "D", "commodity": "Delta", "value": 200.0, "growth": -0.02},
+        ]
+    )
+
+
+def ids(page):
+    return [row["id"] for row in page.rows]
+
+
+def test_parse_filter():
+    assert parse_filter('{value} s> 150 && {commodity} icontains "fund"') == [
+        Filter("value", ">", 150.0),
+        Filter("commodity", "contains", "fund", case_sensitive=False),
+    ]
+    assert parse_filter("{value} ge 3 && nonsense") == [Filter("value", ">=", 3.0)]
+    assert parse_filter(None) == []
+
+
+@pytest.mark.parametrize("column", ["value", "growth", "commodity"])
+@pytest.mark.parametrize("ascending", [True, False])
+def test_sort_matches_sort_data(index, column, ascending):
+    direction = "asc" if ascending else "desc"
+    page = index.query([{"column_id": column, "direction": direction}], "", 0, 10)
+    expected = sort_data(index.rows, column=column, sort_ascending=ascending)
+    assert ids(page) == [row["id"] for row in expected]
+
+
+def test_filter(index):
+    assert ids(index.query([], "{value} s>= 200", 0, 10)) == ["B", "C", "D"]
+    assert ids(index.query([], "{commodity} scontains Fund", 0, 10)) == ["A", "C"]
+    assert ids(index.query([], "{commodity} icontains beta", 0, 10)) == ["B"]
+    assert ids(index.query([], "{commodity} s= Delta", 0, 10)) == ["D"]
+    assert ids(index.query([], "{growth} s< 0.07", 0, 10)) == ["A", "D"]
+    assert ids(index.query([], "{missing} s= 1", 0, 10)) == []
+
+
+def test_paging(index):
+    sort_by = [{"column_id": "value", "direction": "desc"}]
+    first = index.query(sort_by, "", 0, 3)
+    second = index.query(sort_by, "", 1, 3)
+    assert (ids(first), ids(second)) == (["B", "C", "D"], ["A"])
+    assert (first.page_count, first.matched) == (2, 4)
+    filtered = index.query(sort_by, "{value} s< 150", 0, 3)
+    assert (ids(filtered), filtered.page_count) == (["A"], 1)
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from utils.timeseries import (
+    RAW,
+    PriceMatrix,
+    buckets,
+    horizon_index,
+    horizon_start,
+    resample,
+    resample_ohlc,
+)
+
+NAN = float("nan")
+
+
+@pytest.fixture
+def series():
+    dates = np.array(
+        ["2024-01-01", "2024-01-10", "2024-01-31", "2024-02-05", "2024-04-01", "2025-01-02"],
+        dtype="datetime64[D]",
+    )
+    values = np.array([[1.0], [3.0], [NAN], [4.0], [NAN], [2.0]])
+    return dates, values
+
+
+@pytest.mark.parametrize(
+    "frequency, labels, starts",
+    [
+        ("M", ["2024-01-01", "2024-02-01", "2024-04-01", "2025-01-01"], [0, 3, 4, 5]),
+        ("Q", ["2024-01-01", "2024-04-01", "2025-01-01"], [0, 4, 5]),
+        ("Y", ["2024-01-01", "2025-01-01"], [0, 5]),
+        # 2024-01-01 was a Monday, and 2024-02-05 is the Monday after 2024-01-31
+        ("W", ["2024-01-01", "2024-01-08", "2024-01-29", "2024-02-05", "2024-04-01", "2024-12-30"], [0, 1, 2, 3, 4, 5]),
+    ],
+)
+def test_buckets(series, frequency, labels, starts):
+    b = buckets(series[0], frequency)
+    assert b.labels.astype(str).tolist() == labels
+    assert b.starts.tolist() == starts
+    assert b.ends.tolist() == starts[1:] + [6]
+
+
+def test_resample_last_carries_forward(series):
+    _, values = resample(*series, "M", "last")
+    np.testing.assert_array_equal(values[:, 0], [3.0, 4.0, 4.0, 2.0])
+
+
+def test_resample_mean_ignores_gaps(series):
+    _, values = resample(*series, "Q", "mean")
+    np.testing.assert_array_equal(values[:, 0], [8 / 3, NAN, 2.0])
+
+
+def test_resample_raw_unchanged(series):
+    dates, values = resample(*series, RAW, "mean")
+    assert dates is series[0] and values is series[1]
+
+
+def test_resample_ohlc(series):
+    ohlc = resample_ohlc(*series, "Y")
+    np.testing.assert_array_equal(ohlc.open[:, 0], [1.0, 2.0])
+    np.testing.assert_array_equal(ohlc.high[:, 0], [4.0, 2.0])
+    np.testing.assert_array_equal(ohlc.low[:, 0], [1.0, 2.0])
+    np.testing.assert_array_equal(ohlc.close[:, 0], [4.0, 2.0])
+
+
+def test_horizon_index():
+    dates = np.arange(np.datetime64("2019-01-01"), np.datetime64("2024-12-31"), np.timedelta64(7, "D"))
+    index = horizon_index(dates, [5, 1, 3, 1])
+    assert list(index.starts) == [1, 3, 5]
+    for years in [1, 3, 5, 10, 0.5]:
+        assert index.start(years) == (dates < horizon_start(dates, years)).sum()
+    assert index.start(10) == 0
+    assert index.covers(5) and not index.covers(10)
+
+
+@pytest.fixture
+def prices():
+    return PriceMatrix.from_table(
+        [
+            {"date": "2024-01-01", "A": 1.0, "B": NAN},
+            {"date": "2024-01-10", "A": NAN, "B": 10.0},
+            {"date": "2024-02-01", "A": 2.0, "B": NAN},
+        ]
+    )
+
+
+def test_first_valid(prices):
+    assert prices.first_valid.tolist() == [0, 1]
+
+
+def test_rebased(prices):
+    dates, values = prices.rebased([0, 1])
+    assert dates.astype(str).tolist() == ["2024-01-10", "2024-02-01"]
+    np.testing.assert_array_equal(values, [[NAN, 100.0], [200.0, NAN]])
+
+    _, values = prices.rebased([0], start=1)
+    np.testing.assert_array_equal(values, [[NAN], [200.0]])
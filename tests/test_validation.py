@@ -0,0 +1,94 @@
+import json
+import shutil
+
+import pytest
+
+from utils import validation
+from utils.utils import DATA_PATH
+from utils.validation import SCHEMAS, check_file, schema_for, validate_data
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    """Copy of the listed data files"""
+    with open(DATA_PATH / "update_log.json") as f:
+        files = json.load(f)["files"]
+    for file in files + ["update_log.json"]:
+        shutil.copy(DATA_PATH / file, tmp_path / file)
+    return tmp_path
+
+
+def messages(report):
+    return [(issue.file, issue.message) for issue in report.issues]
+
+
+def test_data_passes(data_path):
+    assert messages(validate_data(data_path)) == []
+
+
+def test_schema_for():
+    assert (
+        schema_for("assets_latest_summary.csv") is SCHEMAS["assets_latest_summary.csv"]
+    )
+    assert schema_for("sipp_summary.csv") is SCHEMAS["*_summary.csv"]
+    assert schema_for("notes.csv") is None
+
+
+def test_stray_and_missing_files(data_path):
+    shutil.copy(
+        data_path / "retirement_value_model.csv",
+        data_path / "retirement_value_model_.csv",
+    )
+    (data_path / "retirement_summary.csv").unlink()
+    report = validate_data(data_path)
+    assert (
+        "retirement_summary.csv",
+        "Listed in the update log, but missing",
+    ) in messages(report)
+    stray = [
+        issue for issue in report.issues if issue.file == "retirement_value_model_.csv"
+    ]
+    assert len(stray) == 1 and not stray[0].error
+
+
+def test_file_checks(tmp_path):
+    path = tmp_path / "test_price_time_series.csv"
+    path.write_text("date,A,B\n2024-01-02,1.0,\n2024-01-01,2.0,x\n2024-01-03,3.0,4\n")
+    issues = [issue.message for issue in check_file(path, schema_for(path.name))]
+    assert issues == [
+        "B should be numeric, but row 3 has 'x'",
+        "date isn't in order, or has repeated dates",
+    ]
+
+    path = tmp_path / "retirement_value_model.csv"
+    path.write_text(",year,actual_values,age\n0,2020,1.0,40\n1,2021,2.0,\n")
+    issues = [issue.message for issue in check_file(path, schema_for(path.name))]
+    assert issues == ["1 blank cells in age (rows 3)"]
+
+    path.write_text(",year,actual_values,age\n0,2020,1.0,40\n1,2021,2.0,41\n")
+    issues = [issue.message for issue in check_file(path, schema_for(path.name))]
+    assert issues == ["actual_values has no blank years left to project"]
+
+
+def test_totals_must_match(data_path):
+    path = data_path / "assets_latest_summary.csv"
+    path.write_text(path.read_text().replace("626363.601527780", "500000.0"))
+    report = validate_data(data_path)
+    errors = [issue.message for issue in report.errors]
+    assert any("Retirement is 500,000.00" in message for message in errors)
+    assert any(
+        "retirement_summary.csv sum to" in issue.message for issue in report.issues
+    )
+
+
+def test_failed_validation_is_reported(data_path, monkeypatch):
+    def fail(data_path):
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr(validation, "validate_data", fail)
+    monkeypatch.setattr(validation, "_report", None)
+    monkeypatch.setattr(validation, "_report_signature", None)
+    validation._run_validation(data_path)
+    report = validation._report
+    assert messages(report) == [("", "The checks failed: disk on fire")]
+    assert report.errors
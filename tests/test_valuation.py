@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from utils.timeseries import PriceMatrix, forward_fill
+from utils.valuation import value_holdings
+
+NAN = float("nan")
+
+
+@pytest.fixture
+def prices():
+    return PriceMatrix.from_table(
+        [
+            {"date": "2024-01-01", "A": 1.0, "B": NAN},
+            {"date": "2024-01-10", "A": NAN, "B": 10.0},
+            {"date": "2024-02-01", "A": 2.0, "B": NAN},
+        ]
+    )
+
+
+def test_forward_fill():
+    values = np.array([[NAN, 1.0], [2.0, NAN], [NAN, NAN], [3.0, 4.0]])
+    expected = np.array([[NAN, 1.0], [2.0, 1.0], [2.0, 1.0], [3.0, 4.0]])
+    np.testing.assert_array_equal(forward_fill(values), expected)
+
+
+def test_value_holdings(prices):
+    summary = [
+        {"commodity": "A", "quantity": 10.0, "commodity_type": "shares"},
+        {"commodity": "B", "quantity": 2.0, "commodity_type": "bonds"},
+        {"commodity": "C", "quantity": 5.0, "commodity_type": "shares"},
+    ]
+    valuation = value_holdings(prices, summary)
+    assert valuation.types == ["bonds", "shares"]
+    np.testing.assert_array_equal(valuation.total, [10.0, 30.0, 40.0])
+    assert valuation.as_of(1) == {"bonds": 20.0, "shares": 10.0}